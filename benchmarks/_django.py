@@ -0,0 +1,32 @@
+"""
+Django bootstrap for benchmark scripts.
+
+Benchmarks default to the test settings (in-memory SQLite). Point
+DJANGO_SETTINGS_MODULE at ``django_landing.settings`` to run against Postgres.
+"""
+import os
+
+import django
+
+
+def setup(sqlite_path=None):
+    """
+    Configure Django and create the schema when running on SQLite.
+
+    ``sqlite_path`` switches the test settings to a database file, for benchmarks
+    that query from several threads (an in-memory database is per connection).
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_landing.settings_test')
+    from django.conf import settings
+
+    on_sqlite = settings.DATABASES['default']['ENGINE'].endswith('sqlite3')
+    if on_sqlite and sqlite_path:
+        settings.DATABASES['default']['NAME'] = sqlite_path
+    django.setup()
+
+    from django.core.management import call_command
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    if on_sqlite:
+        call_command('migrate', verbosity=0)
@@ -0,0 +1,126 @@
+"""
+Page import with sequential vs. concurrent asset downloads, against a local HTTP server.
+
+    python -m benchmarks.bench_asset_download --images 300 --latency 20
+
+The server serves a page with ``--images`` images, a header background and a
+stylesheet with ``--css-images`` background images, and delays every response by
+``--latency`` ms to stand in for the network. Modes:
+
+- ``requests.get``: one ``requests.get`` per asset, like the importer used to do
+- ``sequential``: ``PageParserService`` with one worker and one connection
+- ``concurrent``: ``PageParserService`` with the configured worker/per-host limits
+"""
+import argparse
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from benchmarks._django import setup
+
+
+class AssetHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        body, content_type = self.server.files.get(self.path, (None, None))
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def site_files(images, css_images, image_size):
+    payload = b'\x89PNG' + b'\0' * image_size
+    files = {}
+    tags = []
+    for i in range(images):
+        files[f'/img/{i}.png'] = (payload, 'image/png')
+        tags.append(f'<div class="card"><h3>Card {i}</h3><p>Text</p><img src="/img/{i}.png"></div>')
+    css = []
+    for i in range(css_images):
+        files[f'/css/bg/{i}.png'] = (payload, 'image/png')
+        css.append(f'.bg-{i} {{ background-image: url(bg/{i}.png) }}')
+    files['/header.png'] = (payload, 'image/png')
+    files['/css/site.css'] = ('\n'.join(css).encode(), 'text/css')
+    files['/'] = ((
+        '<html><head><title>Asset benchmark</title><link rel="stylesheet" href="/css/site.css"></head>'
+        '<body><header style="background-image: url(/header.png)"><h1>Assets</h1></header>'
+        f'<section>{"".join(tags)}</section></body></html>'
+    ).encode(), 'text/html; charset=utf-8')
+    return files
+
+
+def start_server(files, latency):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), AssetHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.files = files
+    server.latency = latency
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=300)
+    parser.add_argument('--css-images', type=int, default=50)
+    parser.add_argument('--image-size', type=int, default=20_000, help='bytes per image')
+    parser.add_argument('--latency', type=float, default=20, help='ms added to every response')
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--per-host', type=int, default=6)
+    args = parser.parse_args()
+
+    setup()
+    from django.test import override_settings
+
+    from landing.services.page_parser import PageParserService
+
+    files = site_files(args.images, args.css_images, args.image_size)
+    server = start_server(files, args.latency / 1000)
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+    assets = [path for path in files if path != '/']
+    print(f"{len(assets)} assets of {args.image_size} bytes, {args.latency:.0f} ms latency")
+
+    server.connections = 0
+    started = time.perf_counter()
+    for path in assets:
+        requests.get(base + path, timeout=10).raise_for_status()
+    elapsed = time.perf_counter() - started
+    print(f"{'requests.get':>12}: {elapsed:7.2f} s  {server.connections:4} connections  (downloads only)")
+
+    for name, workers, per_host in (('sequential', 1, 1), ('concurrent', args.workers, args.per_host)):
+        with tempfile.TemporaryDirectory() as root:
+            with override_settings(STATIC_ROOT=f'{root}/static', MEDIA_ROOT=f'{root}/media',
+                                   LANDING_ASSET_WORKERS=workers, LANDING_ASSET_PER_HOST=per_host):
+                server.connections = 0
+                started = time.perf_counter()
+                page = PageParserService(base + '/').parse_and_import()
+                elapsed = time.perf_counter() - started
+        images = page.elements.exclude(image='').count()
+        print(f"{name:>12}: {elapsed:7.2f} s  {server.connections:4} connections  "
+              f"(full import, {images} images, workers={workers}, per host={per_host})")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Concurrency of the async views vs. the sync views, both served through Django's ASGI handler.
+
+Every SQL query gets an artificial delay (``--db-latency``) to model a remote Postgres,
+then ``--concurrency`` requests are in flight at once for ``--requests`` requests total.
+
+    python -m benchmarks.bench_async --concurrency 50 --requests 500 --db-latency 20
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import types
+
+from benchmarks._django import setup
+
+
+def install_db_latency(seconds):
+    from django.db.backends.signals import connection_created
+
+    def delay(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def on_connection(sender, connection, **kwargs):
+        connection.execute_wrappers.append(delay)
+
+    connection_created.connect(on_connection, weak=False)
+
+
+def make_urlconf(name, module):
+    from django.urls import path
+
+    urlconf = types.ModuleType(name)
+    urlconf.urlpatterns = [
+        path('landing/page/<slug:slug>/', module.page_view),
+        path('landing/api/element/<int:element_id>/has-content/', getattr(module, 'element_has_content')),
+    ]
+    sys.modules[name] = urlconf
+    return name
+
+
+async def asgi_get(app, path):
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'',
+        'headers': [(b'host', b'testserver')], 'server': ('testserver', 80), 'client': ('127.0.0.1', 0),
+    }
+    status = None
+    requested = False
+    finished = asyncio.Event()
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await finished.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+        elif message['type'] == 'http.response.body' and not message.get('more_body'):
+            finished.set()
+
+    await app(scope, receive, send)
+    return status
+
+
+async def run_load(app, paths, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(path):
+        async with semaphore:
+            started = time.perf_counter()
+            status = await asgi_get(app, path)
+            latencies.append(time.perf_counter() - started)
+            assert status == 200, f'{path} returned {status}'
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(path) for path in paths))
+    return time.perf_counter() - started, sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--db-latency', type=float, default=20, help='milliseconds added to every query')
+    parser.add_argument('--sections', type=int, default=2)
+    parser.add_argument('--items', type=int, default=5)
+    args = parser.parse_args()
+
+    setup(sqlite_path=os.path.join(tempfile.mkdtemp(), 'bench.sqlite3'))
+    from django.core.asgi import get_asgi_application
+    from django.test import override_settings
+
+    from benchmarks.bench_renderer import build_page
+    from landing import api_views, async_views, views
+
+    page = build_page(args.sections, args.items)
+    element_id = page.elements.values_list('id', flat=True).first()
+    install_db_latency(args.db_latency / 1000)
+
+    paths = [f'/landing/page/{page.slug}/' if i % 2 else f'/landing/api/element/{element_id}/has-content/'
+             for i in range(args.requests)]
+    sync_views = types.SimpleNamespace(page_view=views.page_view, element_has_content=api_views.element_has_content)
+    dummy_cache = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+    for name, module in (('sync', sync_views), ('async', async_views)):
+        urlconf = make_urlconf(f'benchmarks._urls_{name}', module)
+        with override_settings(ROOT_URLCONF=urlconf, CACHES=dummy_cache):
+            app = get_asgi_application()
+            elapsed, latencies = asyncio.run(run_load(app, paths, args.concurrency))
+        p50 = latencies[len(latencies) // 2]
+        p95 = latencies[int(len(latencies) * 0.95)]
+        print(f"{name:>6}: {len(paths) / elapsed:7.1f} req/s  p50 {p50 * 1000:7.1f} ms  "
+              f"p95 {p95 * 1000:7.1f} ms  ({args.concurrency} concurrent, {args.db_latency:g} ms/query)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+URL rewriting of large generated stylesheets: the previous cssutils path
+(parse, rewrite background properties, serialize) against ``rewrite_urls``.
+Assets are not downloaded; every URL maps to a made-up asset path.
+
+    python -m benchmarks.bench_css_rewrite --sizes 0.5 1 5 20
+"""
+import argparse
+import gc
+import hashlib
+import logging
+import time
+
+RULES = '''.btn-{i}:hover, .btn-{i}:focus {{ color: #fff; background-color: #0b5ed7; border-color: #0a58ca;
+  box-shadow: 0 0 0 .25rem rgba(49, 132, 253, .5); transition: color .15s ease-in-out }}
+.hero-{i} {{ background-image: url("../img/hero-{i}.jpg"); background-size: cover }}
+.icon-{i} {{ background: url(../img/icons.png) no-repeat -{i}px 0, url('../img/shadow.png') repeat-x }}
+@media (min-width: 768px) {{ .col-md-{i} {{ flex: 0 0 auto; width: 50%; background: url(../img/md-{i}.png) }} }}
+@font-face {{ font-family: "Font {i}"; src: url(../fonts/f{i}.woff2) format("woff2"), url(../fonts/f{i}.woff) format("woff") }}
+'''
+
+
+def generate_css(size_mib):
+    rules = []
+    size = i = 0
+    while size < size_mib * 2 ** 20:
+        rule = RULES.format(i=i % 500)
+        rules.append(rule)
+        size += len(rule)
+        i += 1
+    return ''.join(rules)
+
+
+def asset_url(url):
+    return f"/media/assets/{hashlib.md5(url.encode()).hexdigest()}.png"
+
+
+def rewrite_cssutils(css):
+    """The former ``CSSProcessor`` path: only background properties of top-level style rules."""
+    import cssutils
+    cssutils.log.setLevel(logging.CRITICAL)  # It reports every multi-layer background as invalid
+
+    sheet = cssutils.parseString(css)
+    count = 0
+    for rule in sheet:
+        if rule.type == rule.STYLE_RULE:
+            for prop in rule.style:
+                if prop.name in ('background', 'background-image') and 'url(' in prop.value:
+                    url = prop.value.replace('url(', '').replace(')', '').strip("'\"")
+                    prop.value = f"url({asset_url(url)})"
+                    count += 1
+    return sheet.cssText.decode('utf-8'), count
+
+
+def rewrite_tokenizer(css):
+    from landing.services.css_urls import rewrite_urls
+
+    count = 0
+
+    def replace(url, kind):
+        nonlocal count
+        count += 1
+        return asset_url(url)
+
+    return rewrite_urls(css, replace), count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=float, nargs='+', default=[0.5, 1, 5, 20], help='stylesheet sizes in MiB')
+    parser.add_argument('--skip-cssutils', type=float, default=1,
+                        help='skip the cssutils path above this size, it grows worse than linearly (default: 1 MiB)')
+    args = parser.parse_args()
+
+    rewrite_tokenizer(generate_css(0.01))  # Import and compile the regexes
+
+    for size in args.sizes:
+        css = generate_css(size)
+        paths = [('tokenizer', rewrite_tokenizer)]
+        if size <= args.skip_cssutils:
+            paths.insert(0, ('cssutils', rewrite_cssutils))
+        for name, rewrite in paths:
+            gc.collect()  # Don't charge one path for collecting the other's garbage
+            started = time.perf_counter()
+            _, count = rewrite(css)
+            elapsed = time.perf_counter() - started
+            print(f"{len(css) / 2 ** 20:6.1f} MiB {name:>9}: {elapsed:7.2f} s  "
+                  f"{len(css) / 2 ** 20 / elapsed:6.1f} MiB/s  {count} URLs rewritten")
+
+
+if __name__ == '__main__':
+    main()
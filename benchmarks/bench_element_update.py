@@ -0,0 +1,102 @@
+"""
+Element edits through ``save()`` vs. ``PageElement.save_changes``.
+
+    python -m benchmarks.bench_element_update --edits 500 --attrs-size 2000
+
+Every edit changes the content of one text element, as the editor's content
+endpoint does. Reported per variant: time, queries, write statements, rows
+written, parameter bytes sent with the writes and the WAL the edits produced.
+On SQLite (the default) the database is a WAL-mode file with automatic
+checkpoints off, so the WAL is the growth of its ``-wal`` file; on Postgres it
+is the distance the WAL insert position moved.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks._django import setup
+
+WRITES = ('INSERT', 'UPDATE', 'DELETE')
+
+
+class WriteCounter:
+    """Execute wrapper counting queries, write statements, their rows and parameter bytes."""
+
+    def __init__(self):
+        self.queries = self.writes = self.rows = self.param_bytes = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        self.queries += 1
+        if sql.lstrip().upper().startswith(WRITES):
+            self.writes += 1
+            self.rows += max(context['cursor'].rowcount, 0)
+            for param in (params or ()):
+                self.param_bytes += len(param.encode() if isinstance(param, str) else str(param).encode())
+        return result
+
+
+def wal_position(connection):
+    """Bytes of WAL written so far: the Postgres insert LSN, or the size of SQLite's ``-wal`` file."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT pg_wal_lsn_diff(pg_current_wal_insert_lsn(), '0/0')")
+            return int(cursor.fetchone()[0])
+    wal = f"{connection.settings_dict['NAME']}-wal"
+    return os.path.getsize(wal) if os.path.exists(wal) else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--edits', type=int, default=500)
+    parser.add_argument('--shape', default='medium')
+    parser.add_argument('--attrs-size', type=int, default=2000,
+                        help='bytes of html_attrs/props per element, like the inline styles of imported pages')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-element-update-')
+    setup(sqlite_path=os.path.join(workdir, 'db.sqlite3'))
+    from django.db import connection
+
+    from benchmarks.trees import SHAPES, create_page
+    from landing.models import PageElement
+
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode=WAL')
+            cursor.execute('PRAGMA wal_autocheckpoint=0')
+
+    page = create_page(SHAPES[args.shape])
+    filler = 'x' * (args.attrs_size // 2)
+    PageElement.objects.filter(page=page).update(props={'data': filler}, html_attrs={'style': filler})
+    texts = list(PageElement.objects.filter(page=page, type='text').order_by('pk'))
+    print(f"{len(texts)} text elements, {args.edits} edits per variant, {connection.vendor}")
+
+    def full_save(element, content):
+        element.content = content
+        element.save()
+
+    def partial_save(element, content):
+        element.content = content
+        element.save_changes(['content'], expected_version=element.version)
+
+    for name, edit in (('save()', full_save), ('save_changes', partial_save)):
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        counter = WriteCounter()
+        wal_before = wal_position(connection)
+        with connection.execute_wrapper(counter):
+            started = time.perf_counter()
+            for number in range(args.edits):
+                edit(texts[number % len(texts)], f'{name} edit {number}')
+            elapsed = time.perf_counter() - started
+        wal = wal_position(connection) - wal_before
+        print(f"{name:>13}: {elapsed * 1000 / args.edits:6.2f} ms/edit  {counter.queries / args.edits:4.1f} queries"
+              f"  {counter.writes / args.edits:4.1f} writes  {counter.rows / args.edits:4.1f} rows"
+              f"  {counter.param_bytes / args.edits:7.0f} B params  {wal / args.edits:7.0f} B WAL  per edit")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+DOM vs. streaming parse of large generated pages: time and peak Python memory
+(tracemalloc) to build the unsaved element tree. "parse" is the peak minus the
+memory still held by the built elements, i.e. what the parser itself needed.
+
+    python -m benchmarks.bench_html_parse --sections 200 1000 4000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from benchmarks._django import setup
+
+
+def generate_html(sections, cards=10):
+    card = ''.join(
+        f'<div class="card feature"><h3>Card {i}</h3><p>Some <strong>text</strong> for card {i}, '
+        f'with <a href="/more/{i}">a link</a>.</p><ul><li>One</li><li>Two</li></ul></div>'
+        for i in range(cards)
+    )
+    body = ''.join(f'<section id="s{i}"><h2>Section {i}</h2><div class="row">{card}</div></section>'
+                   for i in range(sections))
+    return f'<html><head><title>Large page</title></head><body>{body}</body></html>'.encode()
+
+
+def measure(build):
+    started = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - started  # Without tracemalloc, which slows parsing down a lot
+
+    tracemalloc.start()
+    roots = build()
+    gc.collect()  # The parsed documents are reference cycles
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return roots, elapsed, peak, held
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sections', type=int, nargs='+', default=[200, 1000, 4000])
+    parser.add_argument('--chunk-size', type=int, default=64 * 1024)
+    args = parser.parse_args()
+
+    setup()
+    from bs4 import BeautifulSoup
+
+    from landing.services.page_parser import ElementTreeBuilder, StreamingTreeParser
+    from landing.services.tree_diff import walk
+
+    base_url = 'http://example.com/'
+    for sections in args.sections:
+        data = generate_html(sections)
+        chunks = [data[i:i + args.chunk_size] for i in range(0, len(data), args.chunk_size)]
+        modes = {
+            'dom': lambda: ElementTreeBuilder(None, base_url, None).build_elements(
+                BeautifulSoup(data.decode(), 'lxml').body),
+            'streaming': lambda: StreamingTreeParser(ElementTreeBuilder(None, base_url, None)).parse(iter(chunks)),
+        }
+        for name, build in modes.items():
+            roots, elapsed, peak, held = measure(build)
+            print(f"{len(data) / 2 ** 20:6.1f} MiB {name:>9}: {elapsed:6.2f} s  peak {peak / 2 ** 20:7.1f} MiB  "
+                  f"parse {(peak - held) / 2 ** 20:7.1f} MiB  {sum(1 for _ in walk(roots))} elements")
+
+
+if __name__ == '__main__':
+    main()
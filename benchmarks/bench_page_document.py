@@ -0,0 +1,67 @@
+"""
+Loading a page's element tree from the element rows vs. from its ``PageDocument``.
+
+    python -m benchmarks.bench_page_document --shapes small medium large --runs 20
+
+"rows" is the page, the validator aggregate and the tree query. "document" is
+the page joined with its document, the same aggregate (which the document has to
+match to be used) and the document decoded into the same tree. Rendering is
+left out; it is the same for both.
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks._django import setup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--shapes', nargs='+', default=['small', 'medium', 'large'])
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--compression', type=int, nargs='+', default=[0, 1, 6])
+    args = parser.parse_args()
+
+    setup()
+    from django.db import connection
+    from django.test import override_settings
+
+    from benchmarks.trees import SHAPES, create_page
+    from landing.cache import page_element_stats
+    from landing.models import Page
+    from landing.services.page_document import build_page_document, page_element_tree
+
+    def rows(slug):
+        page = Page.objects.get(slug=slug)
+        page_element_stats(page)
+        return page.get_element_tree()
+
+    def document(slug):
+        page = Page.objects.select_related('document').get(slug=slug)
+        return page_element_tree(page, page_element_stats(page))
+
+    def measure(load, slug):
+        """Median milliseconds and queries per load."""
+        queries, times = [], []
+        with connection.execute_wrapper(lambda execute, *params: queries.append(1) or execute(*params)):
+            for _ in range(args.runs):
+                started = time.perf_counter()
+                load(slug)
+                times.append(time.perf_counter() - started)
+        return statistics.median(times) * 1000, len(queries) // args.runs
+
+    for name in args.shapes:
+        page = create_page(SHAPES[name])
+        prefix = f"{name:>7} ({page.elements.count():5} elements)"
+        elapsed, queries = measure(rows, page.slug)
+        print(f"{prefix} {'rows':>22}: {elapsed:7.2f} ms  {queries} queries")
+        for level in args.compression:
+            with override_settings(LANDING_DOCUMENT_COMPRESSION=level):
+                size = len(build_page_document(Page.objects.get(pk=page.pk)).data)
+            elapsed, queries = measure(document, page.slug)
+            label = f"document z{level} {size / 1024:6.1f} KB"
+            print(f"{prefix} {label:>22}: {elapsed:7.2f} ms  {queries} queries")
+
+
+if __name__ == '__main__':
+    main()
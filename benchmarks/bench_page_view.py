@@ -0,0 +1,159 @@
+"""
+page_view latency, SQL queries, allocations and output size for generated page shapes.
+
+    python -m benchmarks.bench_page_view                     # all shapes, compare to the baseline
+    python -m benchmarks.bench_page_view --shape large --repeat 20
+    python -m benchmarks.bench_page_view --save              # record a new baseline
+
+Every shape (see ``benchmarks.trees.SHAPES``) is measured cold (page and fragment
+caches cleared before each request, i.e. a full render) and warm (served from
+the page cache, which streamed pages fill once they are sent). Results are
+compared with ``benchmarks/baselines/page_view.json`` for the same database
+vendor; the script exits with status 1 when a query count or the output size
+changed, or latency/allocations grew beyond ``--tolerance``.
+
+Runs on in-memory SQLite by default. For a local Postgres, migrate the database
+and run with ``DJANGO_SETTINGS_MODULE=django_landing.settings``.
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from asgiref.sync import async_to_sync
+
+from benchmarks._django import setup
+
+BASELINE_PATH = Path(__file__).parent / 'baselines' / 'page_view.json'
+
+# Metrics that must match the baseline exactly, and ones compared with a tolerance
+EXACT_METRICS = ('queries', 'bytes')
+TOLERANT_METRICS = ('p50_ms', 'alloc_kib')
+
+
+def fetch(client, url):
+    response = client.get(url)
+    assert response.status_code == 200, response.status_code
+    if not response.streaming:
+        return response.content
+    if not response.is_async:
+        return b''.join(response.streaming_content)
+
+    async def collect():
+        return b''.join([chunk async for chunk in response.streaming_content])
+
+    return async_to_sync(collect)()
+
+
+def measure(client, url, warm, repeat):
+    """Metrics of ``repeat`` requests for ``url``, from a cold or a warm cache."""
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    def prepare():
+        cache.clear()
+        if warm:
+            fetch(client, url)
+
+    prepare()
+    with CaptureQueriesContext(connection) as ctx:
+        body = fetch(client, url)
+    queries = len(ctx.captured_queries)
+
+    prepare()
+    tracemalloc.start()
+    fetch(client, url)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings = []
+    for _ in range(repeat):
+        prepare()
+        started = time.perf_counter()
+        fetch(client, url)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+
+    return {
+        'queries': queries,
+        'bytes': len(body),
+        'alloc_kib': round(peak / 1024, 1),
+        'p50_ms': round(statistics.median(timings) * 1000, 2),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 2),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Lines describing regressions of ``results`` against ``baseline``."""
+    regressions = []
+    for key, metrics in results.items():
+        expected = baseline.get(key)
+        if expected is None:
+            continue
+        for name in EXACT_METRICS:
+            if metrics[name] != expected[name]:
+                regressions.append(f"{key}: {name} {expected[name]} -> {metrics[name]}")
+        for name in TOLERANT_METRICS:
+            if metrics[name] > expected[name] * (1 + tolerance):
+                regressions.append(f"{key}: {name} {expected[name]} -> {metrics[name]} "
+                                   f"(+{(metrics[name] / expected[name] - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main():
+    from benchmarks.trees import SHAPES
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--shape', action='append', choices=sorted(SHAPES),
+                        help='shape to measure, may be repeated (default: all)')
+    parser.add_argument('--repeat', type=int, default=10, help='timed requests per shape and cache state')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed relative growth of latency and allocations (default: 0.25)')
+    parser.add_argument('--save', action='store_true', help='write the results as the new baseline')
+    args = parser.parse_args()
+
+    setup()
+    from django.db import connection
+    from django.test import Client
+
+    from benchmarks.trees import create_page
+
+    vendor = connection.vendor
+    client = Client()
+    results = {}
+    for name in args.shape or SHAPES:
+        page = create_page(SHAPES[name])
+        count = page.elements.count()
+        url = f'/landing/page/{page.slug}/'
+        for state in ('cold', 'warm'):
+            metrics = measure(client, url, state == 'warm', args.repeat)
+            results[f'{name}:{state}'] = metrics
+            print(f"{name:>7} {state}: {count:5} elements  p50 {metrics['p50_ms']:8.2f} ms  "
+                  f"p95 {metrics['p95_ms']:8.2f} ms  {metrics['queries']:2} queries  "
+                  f"alloc {metrics['alloc_kib']:9.1f} KiB  {metrics['bytes']:8} bytes")
+
+    baselines = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    if args.save:
+        baselines[vendor] = {**baselines.get(vendor, {}), **results}
+        BASELINE_PATH.parent.mkdir(exist_ok=True)
+        BASELINE_PATH.write_text(json.dumps(baselines, indent=2, sort_keys=True) + '\n')
+        print(f"baseline saved to {BASELINE_PATH}")
+        return
+
+    if vendor not in baselines:
+        print(f"no {vendor} baseline in {BASELINE_PATH}, run with --save to record one")
+        return
+    regressions = compare(results, baselines[vendor], args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if regressions:
+        sys.exit(1)
+    print("no regressions against the baseline")
+
+
+if __name__ == '__main__':
+    main()
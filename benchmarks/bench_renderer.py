@@ -0,0 +1,67 @@
+"""
+Compiled element renderer vs. rendering ``elements/_element_base.html`` per node.
+
+    python -m benchmarks.bench_renderer --sections 50 --items 20 --repeat 5
+"""
+import argparse
+import time
+
+from benchmarks._django import setup
+
+
+def build_page(sections, items):
+    from landing.models import Page, PageElement
+
+    page = Page.objects.create(title='Renderer benchmark', slug=f'bench-renderer-{time.time_ns()}')
+    for s in range(sections):
+        section = PageElement.objects.create(page=page, type='section', css_classes='section', order=s)
+        PageElement.objects.create(page=page, type='header', content=f'Section {s}', props={'level': 2},
+                                   parent=section, order=0)
+        card = PageElement.objects.create(page=page, type='card', parent=section, order=1,
+                                          html_attrs={'id': f'card-{s}', 'data-role': 'card'})
+        for i in range(items):
+            PageElement.objects.create(page=page, type='text', content=f'Item <b>{s}.{i}</b>',
+                                       css_classes='lead', parent=card, order=i)
+    return page
+
+
+def render_tree(render, roots, edit_mode):
+    def walk(element):
+        children_html = ''.join(walk(child) for child in element.get_cached_children())
+        return render(element, children_html, edit_mode)
+
+    return ''.join(walk(root) for root in roots)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sections', type=int, default=50)
+    parser.add_argument('--items', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--edit', action='store_true', help='render with the edit-mode wrapper')
+    args = parser.parse_args()
+
+    setup()
+    from landing.rendering import render_node, render_node_template
+
+    page = build_page(args.sections, args.items)
+    roots = page.get_element_tree()
+    count = page.elements.count()
+
+    results = {}
+    for name, render in (('template', render_node_template), ('compiled', render_node)):
+        best = float('inf')
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            html = render_tree(render, roots, args.edit)
+            best = min(best, time.perf_counter() - started)
+        results[name] = (best, html)
+        print(f"{name:>9}: {best * 1000:8.1f} ms for {count} elements "
+              f"({best / count * 1_000_000:6.1f} us/element, {len(html)} bytes)")
+
+    assert results['compiled'][1] == results['template'][1], 'renderers produced different HTML'
+    print(f"  speedup: {results['template'][0] / results['compiled'][0]:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Time-to-first-byte and peak memory of buffered vs. streamed page_view responses.
+
+    python -m benchmarks.bench_streaming --sections 200 --items 20
+"""
+import argparse
+import time
+import tracemalloc
+
+from benchmarks._django import setup
+
+
+def measure(view, request, slug):
+    """Return (ttfb, total, peak_bytes, size) for one request, consuming the body like a server would."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    response = view(request, slug=slug)
+    ttfb = None
+    size = 0
+    if response.streaming:
+        for chunk in response.streaming_content:
+            if ttfb is None:
+                ttfb = time.perf_counter() - started
+            size += len(chunk)
+    else:
+        ttfb = time.perf_counter() - started
+        size = len(response.content)
+    total = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return ttfb, total, peak, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sections', type=int, default=200)
+    parser.add_argument('--items', type=int, default=20)
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth.models import AnonymousUser
+    from django.test import RequestFactory, override_settings
+
+    from benchmarks.bench_renderer import build_page
+    from landing.views import page_view
+
+    page = build_page(args.sections, args.items)
+    request = RequestFactory().get(f'/landing/page/{page.slug}/')
+    request.user = AnonymousUser()
+    dummy_cache = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+    print(f"{page.elements.count()} elements")
+    for name, threshold in (('buffered', 10 ** 9), ('streamed', 0)):
+        with override_settings(CACHES=dummy_cache, LANDING_STREAM_THRESHOLD=threshold):
+            ttfb, total, peak, size = measure(page_view, request, page.slug)
+        print(f"{name:>9}: ttfb {ttfb * 1000:8.1f} ms  total {total * 1000:8.1f} ms  "
+              f"peak {peak / 1024 / 1024:6.1f} MiB  body {size / 1024:8.1f} KiB")
+
+
+if __name__ == '__main__':
+    main()
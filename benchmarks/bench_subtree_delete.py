@@ -0,0 +1,61 @@
+"""
+MPTT ``delete()`` vs. ``delete_subtree`` of the biggest section of a generated page.
+
+    python -m benchmarks.bench_subtree_delete --sizes 500 3000 10000
+
+Each variant deletes the same section from its own copy of the page, built in
+one tree (as imported pages are: everything under ``body``) so that the rest of
+the tree has to be renumbered.
+"""
+import argparse
+import time
+
+from benchmarks._django import setup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 3000, 10000])
+    parser.add_argument('--depth', type=int, default=8)
+    args = parser.parse_args()
+
+    setup()
+    from django.db import connection
+
+    from benchmarks.trees import TreeShape, create_page
+    from landing.models import PageElement
+    from landing.services.subtree import delete_subtree
+
+    def biggest_section(page):
+        section = max(PageElement.objects.filter(page=page, level=1), key=lambda element: element.rght - element.lft)
+        return section, (section.rght - section.lft + 1) // 2
+
+    for size in args.sizes:
+        variants = (('mptt delete()', lambda element: element.delete()), ('delete_subtree', delete_subtree))
+        for number, (name, delete) in enumerate(variants):
+            shape = TreeShape(f'delete-{size}-{number}', size=size, depth=args.depth, roots=max(size // 100, 1))
+            page = create_page(shape)
+            body = PageElement.objects.create(page=page, type='body')
+            for root in PageElement.objects.filter(page=page, parent=None).exclude(pk=body.pk).order_by('tree_id'):
+                root.move_to(body, 'last-child')
+            section, section_size = biggest_section(page)
+
+            counts = {'queries': 0, 'rows': 0}
+
+            def count(execute, sql, params, many, context):
+                result = execute(sql, params, many, context)
+                counts['queries'] += 1
+                if sql.lstrip().upper().startswith(('UPDATE', 'DELETE', 'INSERT')):
+                    counts['rows'] += max(context['cursor'].rowcount, 0)
+                return result
+
+            with connection.execute_wrapper(count):
+                started = time.perf_counter()
+                delete(section)
+                elapsed = time.perf_counter() - started
+            print(f"{size:6} elements, section of {section_size:5} {name:>15}: {elapsed * 1000:8.1f} ms"
+                  f"  {counts['queries']:5} queries  {counts['rows']:6} rows written")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""
+Per-element MPTT inserts vs. ``insert_element_tree`` for generated trees.
+
+    python -m benchmarks.bench_tree_insert --sizes 500 1000 5000
+"""
+import argparse
+import time
+
+from benchmarks._django import setup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 1000, 5000])
+    parser.add_argument('--depth', type=int, default=8)
+    parser.add_argument('--skip-per-element', type=int, default=5000,
+                        help='skip per-element inserts above this size (default: 5000)')
+    args = parser.parse_args()
+
+    setup()
+    from django.db import connection
+
+    from benchmarks.trees import TreeShape, create_page
+
+    for size in args.sizes:
+        shape = TreeShape(f'insert-{size}', size=size, depth=args.depth, roots=max(size // 100, 1))
+        for name, bulk in (('per-element', False), ('bulk', True)):
+            if not bulk and size > args.skip_per_element:
+                continue
+            queries = []
+            with connection.execute_wrapper(lambda execute, *params: queries.append(1) or execute(*params)):
+                started = time.perf_counter()
+                create_page(shape, bulk=bulk)
+                elapsed = time.perf_counter() - started
+            print(f"{size:6} elements {name:>11}: {elapsed:8.2f} s  {len(queries):6} queries")
+
+
+if __name__ == '__main__':
+    main()
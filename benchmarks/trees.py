@@ -0,0 +1,162 @@
+"""
+Synthetic ``Page``/``PageElement`` trees for benchmarks.
+
+Trees are shaped like the ones ``PageParserService`` builds from imported sites:
+sections at the root, grids/cards/containers/lists nesting down to headers,
+paragraphs, images, buttons and form fields. Generation is seeded, so the same
+shape always produces the same tree and the same HTML.
+"""
+import random
+import time
+from dataclasses import dataclass, field
+
+# Types that hold children, and the leaf types allowed inside them
+CONTAINER_TYPES = ('section', 'container', 'grid', 'card', 'list', 'form')
+LEAF_TYPES = ('header', 'text', 'image', 'button', 'list_item', 'label', 'input', 'textarea')
+
+# Roughly the type distribution of imported landing pages
+DEFAULT_MIX = {
+    'container': 8, 'grid': 3, 'card': 6, 'list': 2, 'form': 1,
+    'header': 10, 'text': 30, 'image': 10, 'button': 8, 'list_item': 10,
+    'label': 3, 'input': 3, 'textarea': 1,
+}
+
+
+@dataclass
+class TreeShape:
+    """Size, depth and type mix of a generated page."""
+    name: str
+    size: int
+    depth: int
+    roots: int = 5
+    mix: dict = field(default_factory=lambda: dict(DEFAULT_MIX))
+    seed: int = 0
+
+
+SHAPES = {
+    shape.name: shape for shape in (
+        TreeShape('small', size=50, depth=4, roots=3),
+        TreeShape('medium', size=500, depth=6, roots=8),
+        TreeShape('large', size=3000, depth=8, roots=20),
+        TreeShape('flat', size=1000, depth=2, roots=10),
+        TreeShape('deep', size=300, depth=30, roots=2),
+        TreeShape('media', size=500, depth=5, roots=8,
+                  mix={'card': 8, 'grid': 3, 'container': 2, 'image': 40, 'header': 5, 'text': 10}),
+    )
+}
+
+
+def element_fields(el_type, rng, number):
+    """Model fields for one element, with content and attributes like the parser's output."""
+    fields = {'type': el_type, 'props': {}, 'html_attrs': {}, 'content': '', 'css_classes': ''}
+    if el_type == 'section':
+        fields['html_attrs'] = {'id': f'section-{number}'}
+        fields['css_classes'] = 'section py-5'
+    elif el_type == 'grid':
+        fields['css_classes'] = 'row'
+        fields['props'] = {'columns': rng.choice((2, 3, 4))}
+    elif el_type == 'card':
+        fields['css_classes'] = 'card feature'
+        fields['props'] = {'layout': 'vertical'}
+    elif el_type == 'list':
+        fields['props'] = {'ordered': rng.random() < 0.2}
+    elif el_type == 'form':
+        fields['props'] = {'action': '/signup/', 'method': 'POST'}
+    elif el_type == 'header':
+        level = rng.choice((1, 2, 2, 3, 3, 4))
+        fields['props'] = {'level': level}
+        fields['content'] = f'Heading {number}'
+    elif el_type == 'text':
+        words = ' '.join(f'word{rng.randrange(1000)}' for _ in range(rng.randrange(5, 40)))
+        fields['content'] = f'Paragraph {number}: {words} <b>bold</b> <a href="/link/{number}">link</a>'
+        fields['css_classes'] = 'lead'
+    elif el_type == 'image':
+        fields['html_attrs'] = {'src': f'/static/images/img-{number}.jpg', 'alt': f'Image {number}'}
+        fields['css_classes'] = 'img-fluid'
+    elif el_type == 'button':
+        fields['props'] = {'href': f'/action/{number}/'}
+        fields['html_attrs'] = {'href': f'/action/{number}/', 'rel': ['noopener']}
+        fields['content'] = f'Button {number}'
+        fields['css_classes'] = 'btn btn-primary'
+    elif el_type == 'list_item':
+        fields['content'] = f'List item {number}'
+    elif el_type == 'label':
+        fields['props'] = {'for': f'field-{number}'}
+        fields['content'] = f'Label {number}'
+    elif el_type in ('input', 'textarea'):
+        fields['props'] = {'type': 'text', 'id': f'field-{number}', 'name': f'field_{number}'}
+        fields['html_attrs'] = {'name': f'field_{number}', 'placeholder': f'Field {number}'}
+    return fields
+
+
+def generate_tree(shape):
+    """
+    Generate a tree as nested ``(fields, children)`` tuples, ``shape.size`` nodes in total.
+
+    Nodes are added one at a time under a random container that is above
+    ``shape.depth``, so trees grow both wide and deep within the limits.
+    """
+    rng = random.Random(shape.seed)
+    leaf_types = [t for t in shape.mix if t in LEAF_TYPES]
+    leaf_weights = [shape.mix[t] for t in leaf_types]
+    all_types = list(shape.mix)
+    all_weights = [shape.mix[t] for t in all_types]
+
+    roots = []
+    open_nodes = []  # (node, depth) of containers that may take more children
+    for number in range(min(shape.roots, shape.size)):
+        node = (element_fields('section', rng, number), [])
+        roots.append(node)
+        open_nodes.append((node, 1))
+
+    for number in range(len(roots), shape.size):
+        parent, depth = rng.choice(open_nodes)
+        if depth + 1 < shape.depth:
+            el_type = rng.choices(all_types, all_weights)[0]
+        else:
+            el_type = rng.choices(leaf_types, leaf_weights)[0]
+        node = (element_fields(el_type, rng, number), [])
+        parent[1].append(node)
+        if el_type in CONTAINER_TYPES and depth + 1 < shape.depth:
+            open_nodes.append((node, depth + 1))
+    return roots
+
+
+def create_page(shape, slug=None, bulk=True):
+    """
+    Create a ``Page`` with the generated tree of ``shape`` and return it.
+
+    With ``bulk=False`` every element is saved on its own through MPTT, the way
+    elements used to be imported.
+    """
+    from landing.models import Page, PageElement, insert_element_tree
+
+    page = Page.objects.create(title=f'Benchmark {shape.name}',
+                               slug=slug or f'bench-{shape.name}-{time.time_ns()}')
+
+    def insert(nodes, parent):
+        for order, (fields, children) in enumerate(nodes):
+            element = PageElement.objects.create(page=page, parent=parent, order=order, **fields)
+            insert(children, element)
+
+    def build(nodes):
+        elements = []
+        for order, (fields, children) in enumerate(nodes):
+            element = PageElement(page=page, order=order, **fields)
+            element._cached_children = build(children)
+            elements.append(element)
+        return elements
+
+    if bulk:
+        insert_element_tree(build(generate_tree(shape)))
+    else:
+        insert(generate_tree(shape), None)
+    return page
+
+
+def tree_depth(nodes):
+    return max((1 + tree_depth(children) for _, children in nodes), default=0)
+
+
+def tree_size(nodes):
+    return sum(1 + tree_size(children) for _, children in nodes)
@@ -45,6 +45,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'landing.middleware.server_timing_middleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -92,6 +93,44 @@ DATABASES = {
 }
 
 
+CACHES = {
+    'default': {
+        'BACKEND': env('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': env('CACHE_LOCATION', ''),
+    },
+}
+
+# Rendered landing pages are cached per content version, so the timeout only bounds memory use
+LANDING_PAGE_CACHE_TIMEOUT = env.int('LANDING_PAGE_CACHE_TIMEOUT', 60 * 60 * 24)
+# Streamed pages larger than this many bytes are not buffered for the page cache (memcached's item limit is 1 MB)
+LANDING_PAGE_CACHE_MAX_SIZE = env.int('LANDING_PAGE_CACHE_MAX_SIZE', 1024 * 1024)
+# Rendered element subtrees, keyed by element id and a hash of the subtree's updated_at values
+LANDING_FRAGMENT_CACHE_TIMEOUT = env.int('LANDING_FRAGMENT_CACHE_TIMEOUT', 60 * 60 * 24)
+# Route landing pages and the element API to landing.async_views (we run under ASGI/uvicorn)
+LANDING_ASYNC_VIEWS = env.bool('LANDING_ASYNC_VIEWS', True)
+# Pages with at least this many elements are streamed to the client root element by root element
+LANDING_STREAM_THRESHOLD = env.int('LANDING_STREAM_THRESHOLD', 1000)
+# Render elements with landing.rendering.render_node instead of elements/_element_base.html
+LANDING_COMPILED_RENDERER = env.bool('LANDING_COMPILED_RENDERER', True)
+# The first images of a page (logo, hero) load eagerly, all later ones with loading="lazy"
+LANDING_EAGER_IMAGES = env.int('LANDING_EAGER_IMAGES', 2)
+# zlib level of the per-page element documents page views are rendered from; 0 stores them uncompressed
+LANDING_DOCUMENT_COMPRESSION = env.int('LANDING_DOCUMENT_COMPRESSION', 1)
+# Server-Timing header with SQL and element render times (landing.middleware)
+LANDING_SERVER_TIMING = env.bool('LANDING_SERVER_TIMING', True)
+# Also log the timings of every request as a JSON line to the 'landing.timing' logger
+LANDING_TIMING_LOG = env.bool('LANDING_TIMING_LOG', False)
+# Page import: parallel asset downloads, and at most this many at a time from one host
+LANDING_ASSET_WORKERS = env.int('LANDING_ASSET_WORKERS', 16)
+LANDING_ASSET_PER_HOST = env.int('LANDING_ASSET_PER_HOST', 6)
+# Validators and bodies of imported URLs, for conditional requests on re-import (empty disables)
+LANDING_HTTP_CACHE_DIR = env('LANDING_HTTP_CACHE_DIR', os.path.join(BASE_DIR, 'http_cache'))
+# Running import jobs whose worker has not reported (progress or heartbeat) for this many seconds are queued again
+LANDING_IMPORT_JOB_TIMEOUT = env.int('LANDING_IMPORT_JOB_TIMEOUT', 15 * 60)
+# prune_assets keeps unreferenced assets an import stored or reused less than this many seconds ago
+LANDING_ASSET_PRUNE_GRACE = env.int('LANDING_ASSET_PRUNE_GRACE', 60 * 60 * 24)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -136,6 +175,9 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# Pre-rendered published pages, served by Caddy (see Caddyfile)
+LANDING_PUBLISH_ROOT = env('LANDING_PUBLISH_ROOT', os.path.join(BASE_DIR, 'published'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -1,14 +1,25 @@
 from django.contrib import admin
+from django.db.models import Count
 from django.utils.safestring import mark_safe
 from django.utils.html import format_html
 from django.shortcuts import render, redirect
 from django.urls import path, reverse
 from django.contrib import messages
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
 from django.utils.html import format_html
 from mptt.admin import MPTTModelAdmin
 from adminsortable2.admin import SortableAdminBase, SortableInlineAdminMixin
-from .models import Page, PageElement
-from .services.page_parser import PageParserService
+from .models import Asset, ImportJob, Page, PageElement
+from .services.import_jobs import enqueue_import
+from .services.publisher import publish_page, unpublish_page
+
+
+def reset_image_variants(form):
+    """Variants and size imported for the previous image don't apply to a newly uploaded one."""
+    if 'image' in form.changed_data and 'image_variants' not in form.changed_data:
+        form.instance.image_width = form.instance.image_height = None
+        form.instance.image_variants = []
 
 
 class ImportPageForm:
@@ -32,10 +43,11 @@ class PageElementInline(SortableInlineAdminMixin, admin.TabularInline):
 
 @admin.register(Page)
 class PageAdmin(SortableAdminBase, admin.ModelAdmin):
-    list_display = ('title', 'slug', 'created_at', 'updated_at')
-    list_filter = ('created_at',)
+    list_display = ('title', 'slug', 'is_published', 'created_at', 'updated_at')
+    list_filter = ('created_at', 'is_published')
     search_fields = ('title', 'slug')
     inlines = [PageElementInline]
+    actions = ['publish_pages', 'unpublish_pages']
 
     change_list_template = 'admin/landing/page/change_list.html'
 
@@ -43,21 +55,38 @@ class PageAdmin(SortableAdminBase, admin.ModelAdmin):
         urls = super().get_urls()
         custom_urls = [
             path('import-from-url/', self.admin_site.admin_view(self.import_page_view), name='landing_page_import'),
+            path('import-jobs/<int:job_id>/', self.admin_site.admin_view(self.import_job_view),
+                 name='landing_page_import_job'),
+            path('import-jobs/<int:job_id>/status/', self.admin_site.admin_view(self.import_job_status_view),
+                 name='landing_page_import_job_status'),
         ]
         return custom_urls + urls
 
+    @admin.action(description='Publish selected pages as static files')
+    def publish_pages(self, request, queryset):
+        for page in queryset:
+            publish_page(page)
+        messages.success(request, f'Published {len(queryset)} page(s); the import worker writes their files')
+
+    @admin.action(description='Unpublish selected pages')
+    def unpublish_pages(self, request, queryset):
+        for page in queryset:
+            unpublish_page(page)
+        messages.success(request, f'Unpublished {len(queryset)} page(s)')
+
+    def save_formset(self, request, form, formset, change):
+        if formset.model is PageElement:
+            for element_form in formset.forms:
+                reset_image_variants(element_form)
+        super().save_formset(request, form, formset, change)
+
     def import_page_view(self, request):
-        """View for importing a page from URL."""
+        """View for importing a page from URL: queues an ImportJob for the import_worker command."""
         if request.method == 'POST':
             url = request.POST.get('url', '').strip()
             if url:
-                try:
-                    parser = PageParserService(url)
-                    page = parser.parse_and_import()
-                    messages.success(request, f'Successfully imported page: {page.title}')
-                    return redirect('admin:landing_page_change', page.id)
-                except Exception as e:
-                    messages.error(request, f'Failed to import page: {str(e)}')
+                job = enqueue_import(url, incremental=bool(request.POST.get('incremental')), user=request.user)
+                return redirect('admin:landing_page_import_job', job.id)
             else:
                 messages.error(request, 'Please provide a URL')
 
@@ -69,6 +98,33 @@ class PageAdmin(SortableAdminBase, admin.ModelAdmin):
         }
         return render(request, 'admin/landing/page/import_page.html', context)
 
+    def import_job_view(self, request, job_id):
+        """Progress of a queued import, polled from ``import_job_status_view``."""
+        job = get_object_or_404(ImportJob, pk=job_id)
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Importing page',
+            'opts': self.model._meta,
+            'job': job,
+            'status': import_job_status(job),
+        }
+        return render(request, 'admin/landing/page/import_job.html', context)
+
+    def import_job_status_view(self, request, job_id):
+        return JsonResponse(import_job_status(get_object_or_404(ImportJob, pk=job_id)))
+
+
+def import_job_status(job):
+    return {
+        'status': job.status,
+        'stage': job.stage,
+        'assets_done': job.assets_done,
+        'assets_total': job.assets_total,
+        'error': job.error,
+        'summary': job.summary,
+        'page_url': reverse('admin:landing_page_change', args=[job.page_id]) if job.page_id else None,
+    }
+
 
 @admin.register(PageElement)
 class PageElementAdmin(MPTTModelAdmin):
@@ -88,6 +144,10 @@ class PageElementAdmin(MPTTModelAdmin):
         qs = super().get_queryset(request)
         return qs.select_related('page').prefetch_related('children')
 
+    def save_model(self, request, obj, form, change):
+        reset_image_variants(form)
+        super().save_model(request, obj, form, change)
+
     def formfield_for_dbfield(self, db_field, request, **kwargs):
         formfield = super().formfield_for_dbfield(db_field, request, **kwargs)
         if db_field.name in ['props', 'html_attrs']:
@@ -97,3 +157,32 @@ class PageElementAdmin(MPTTModelAdmin):
             formfield.widget.attrs['rows'] = 6
             formfield.widget.attrs['style'] = 'width: 100%;'
         return formfield
+
+
+@admin.register(Asset)
+class AssetAdmin(admin.ModelAdmin):
+    list_display = ('file', 'size', 'content_type', 'width', 'height', 'page_count', 'created_at')
+    readonly_fields = ('sha256', 'file', 'size', 'content_type', 'width', 'height', 'original', 'created_at')
+    search_fields = ('sha256', 'file')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(page_count=Count('pages'))
+
+    @admin.display(ordering='page_count', description='Pages')
+    def page_count(self, obj):
+        return obj.page_count
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ('url', 'status', 'stage', 'assets_done', 'assets_total', 'page', 'created_by', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('url',)
+    readonly_fields = ('page', 'created_by', 'worker', 'attempts', 'created_at', 'started_at', 'finished_at')
+    actions = ['requeue_jobs']
+
+    @admin.action(description='Queue selected jobs again')
+    def requeue_jobs(self, request, queryset):
+        count = queryset.exclude(status=ImportJob.RUNNING).update(
+            status=ImportJob.QUEUED, stage='', assets_done=0, assets_total=0, error='', attempts=0)
+        messages.success(request, f'Queued {count} job(s) again')
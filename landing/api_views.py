@@ -1,11 +1,19 @@
 # views.py
+from dataclasses import asdict
+
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 import json
 
-from landing.models import PageElement
+from landing.cache import page_element_stats, page_validators
+from landing.models import Page, PageElement, VersionConflict
+from landing.services.element_batch import apply_batch
+from landing.services.page_tree import page_tree_data
+from landing.services.subtree import delete_subtree
+from landing.views import add_validators
 
 
 @require_http_methods(["GET"])
@@ -24,12 +32,19 @@ def update_element_content(request, element_id):
     element = get_object_or_404(PageElement, id=element_id)
     data = json.loads(request.body)
     element.content = data.get('content', '')
-    element.save()
-    return JsonResponse({'success': True})
+    try:
+        element.save_changes(['content'], expected_version(data.get('version')))
+    except (ValueError, VersionConflict) as e:
+        return edit_error_response(e)
+    return JsonResponse({'success': True, 'version': element.version})
 
 @require_http_methods(["GET"])
 def element_config(request, element_id):
     element = get_object_or_404(PageElement, id=element_id)
+    return JsonResponse(element_config_data(element))
+
+
+def element_config_data(element):
     form_html = f"""
         <input type="hidden" name="element_id" value="{element.id}">
         <div>
@@ -41,11 +56,11 @@ def element_config(request, element_id):
         </div>
         <!-- Добавь другие поля в зависимости от типа -->
     """
-    return JsonResponse({
+    return {
         'id': element.id,
         'type': element.type,
         'form_html': form_html
-    })
+    }
 
 @csrf_exempt
 @require_http_methods(["POST"])
@@ -53,12 +68,89 @@ def update_element_config(request, element_id):
     element = get_object_or_404(PageElement, id=element_id)
     form_data = request.POST
     element.css_classes = form_data.get('css_classes', '')
-    element.save()
-    return JsonResponse({'success': True})
+    try:
+        element.save_changes(['css_classes'], expected_version(form_data.get('version')))
+    except (ValueError, VersionConflict) as e:
+        return edit_error_response(e)
+    return JsonResponse({'success': True, 'version': element.version})
+
+
+def expected_version(value):
+    """The element ``version`` an edit was based on, None if the client sent none."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool) or not str(value).isdigit():
+        raise ValueError('version must be a positive integer')
+    return int(value)
+
+
+def edit_error_response(error):
+    """400 for an invalid edit; 409 with the stored ``version`` when it was based on an outdated one."""
+    if isinstance(error, VersionConflict):
+        return JsonResponse({'success': False, 'error': str(error), 'version': error.current}, status=409)
+    return JsonResponse({'success': False, 'error': str(error)}, status=400)
 
 @csrf_exempt
 @require_http_methods(["POST"])
 def delete_element(request, element_id):
     element = get_object_or_404(PageElement, id=element_id)
-    element.delete()
-    return JsonResponse({'success': True})
\ No newline at end of file
+    delete_subtree(element)
+    return JsonResponse({'success': True})
+
+
+@require_http_methods(["POST"])
+def apply_element_batch(request, slug):
+    """Apply the editor's queued changes to the page in one transaction, see ``landing.services.element_batch``."""
+    if not Page.can_edit(request):
+        return JsonResponse({'success': False, 'error': 'Permission denied'}, status=403)
+    page = get_object_or_404(Page, slug=slug)
+    try:
+        result = apply_batch(page, batch_operations(request))
+    except VersionConflict as e:
+        return edit_error_response(e)
+    except ValueError as e:
+        return batch_error_response(e)
+    return JsonResponse({'success': True, **asdict(result)})
+
+
+def batch_operations(request):
+    """``operations`` of the JSON request body; raises ValueError for malformed bodies."""
+    data = json.loads(request.body)
+    if not isinstance(data, dict):
+        raise ValueError('Expected a JSON object with operations')
+    return data.get('operations')
+
+
+def batch_error_response(error):
+    data = {'success': False, 'error': str(error)}
+    if hasattr(error, 'index'):
+        data['operation'] = error.index
+    return JsonResponse(data, status=400)
+
+
+@require_http_methods(["GET"])
+def page_tree(request, slug):
+    """The page's elements as compact JSON for the editor, see ``landing.services.page_tree``."""
+    if not Page.can_edit(request):
+        return JsonResponse({'success': False, 'error': 'Permission denied'}, status=403)
+    page = get_object_or_404(Page, slug=slug)
+    try:
+        since = tree_since(request)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    etag, last_modified = page_validators(page, page_element_stats(page))
+    response = get_conditional_response(request, etag=etag, last_modified=int(last_modified.timestamp()))
+    if response is None:
+        response = JsonResponse(page_tree_data(page, since))
+    return add_validators(response, etag, last_modified)
+
+
+def tree_since(request):
+    """The ``since`` version of a delta request, or None for the whole tree."""
+    since = request.GET.get('since')
+    if not since:
+        return None
+    if not since.isdigit():
+        raise ValueError('since must be a version returned by an earlier response')
+    return int(since)
@@ -0,0 +1,182 @@
+"""
+Async versions of the page and element API views, used by ``landing.urls``.
+
+They use the async ORM, so under ASGI (uvicorn workers) a request waiting on the
+database does not hold a worker thread. The synchronous views in ``views`` and
+``api_views`` are kept for WSGI deployments and as the benchmark baseline.
+"""
+import json
+from dataclasses import asdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.core.mail import send_mail
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404, redirect
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+
+from .api_views import (batch_error_response, batch_operations, edit_error_response, element_config_data,
+                        expected_version, tree_since)
+from .cache import acache_page_stream, aget_cached_page, apage_element_stats, aset_cached_page, page_validators
+from .models import Page, PageElement, VersionConflict
+from .rendering import astream_page, page_context
+from .services.element_batch import apply_batch
+from .services.page_document import page_element_tree
+from .services.page_tree import page_tree_data
+from .services.subtree import delete_subtree
+from .timing import record_fragments
+from .views import add_validators
+
+
+async def page_view(request, slug):
+    page = await aget_object_or_404(Page.objects.select_related('document'), slug=slug)
+    can_edit_page = await Page.acan_edit(request)
+    edit_mode = request.GET.get('edit') == '1' and can_edit_page
+
+    element_stats = await apage_element_stats(page)
+
+    # Answer revalidations with 304 before doing any rendering work (not in edit mode)
+    etag = last_modified = None
+    if not edit_mode:
+        etag, last_modified = page_validators(page, element_stats)
+        response = get_conditional_response(request, etag=etag, last_modified=int(last_modified.timestamp()))
+        if response is not None:
+            return add_validators(response, etag, last_modified)
+
+    # Editors always get a fresh render, everyone else is served from the page cache
+    if not can_edit_page:
+        cached_html = await aget_cached_page(page)
+        if cached_html is not None:
+            return add_validators(HttpResponse(cached_html), etag, last_modified)
+
+    if can_edit_page:
+        root_elements = await page.aget_element_tree()
+    else:
+        root_elements = await sync_to_async(page_element_tree)(page, element_stats)
+    context = page_context(page, can_edit=can_edit_page, edit_mode=edit_mode, root_elements=root_elements)
+    record_fragments(context['fragment_stats'])
+
+    # Large pages are sent root element by root element instead of being built in memory,
+    # and cached like the others once the whole page went out
+    if element_stats['count'] >= settings.LANDING_STREAM_THRESHOLD:
+        chunks = astream_page(page.template, context, request)
+        if not can_edit_page:
+            chunks = acache_page_stream(page, chunks)
+        return add_validators(StreamingHttpResponse(chunks), etag, last_modified)
+
+    # Rendering is CPU work on the already loaded tree; keep it off the event loop
+    response = HttpResponse(await sync_to_async(render_to_string)(page.template, context, request))
+    if not can_edit_page:
+        await aset_cached_page(page, response.content)
+    return add_validators(response, etag, last_modified)
+
+
+async def signup_form(request, slug):
+    if request.method == 'POST':
+        user_name = request.POST.get('user_name')
+        user_email = request.POST.get('user_email')
+        user_message = request.POST.get('user_message')
+
+        try:
+            await sync_to_async(send_mail)(
+                subject=f"Message from {user_name}",
+                message=user_message,
+                from_email=user_email,
+                recipient_list=[settings.DEFAULT_FROM_EMAIL],
+                fail_silently=False,
+            )
+            messages.success(request, 'Your message has been sent successfully!')
+        except Exception as e:
+            messages.error(request, f'Error sending message: {str(e)}')
+
+        return redirect('landing_page', slug=slug)
+
+    page = await Page.objects.aget(slug=slug)
+    html = await sync_to_async(render_to_string)('landing/landing_basic.html', {'page': page}, request)
+    return HttpResponse(html)
+
+
+@require_http_methods(["GET"])
+async def element_has_content(request, element_id):
+    element = await aget_object_or_404(PageElement, id=element_id)
+    return JsonResponse(
+        {
+            'has_content': bool(element.content),
+            'content': element.content,
+        }
+    )
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+async def update_element_content(request, element_id):
+    element = await aget_object_or_404(PageElement, id=element_id)
+    data = json.loads(request.body)
+    element.content = data.get('content', '')
+    try:
+        await sync_to_async(element.save_changes)(['content'], expected_version(data.get('version')))
+    except (ValueError, VersionConflict) as e:
+        return edit_error_response(e)
+    return JsonResponse({'success': True, 'version': element.version})
+
+
+@require_http_methods(["GET"])
+async def element_config(request, element_id):
+    element = await aget_object_or_404(PageElement, id=element_id)
+    return JsonResponse(element_config_data(element))
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+async def update_element_config(request, element_id):
+    element = await aget_object_or_404(PageElement, id=element_id)
+    form_data = request.POST
+    element.css_classes = form_data.get('css_classes', '')
+    try:
+        await sync_to_async(element.save_changes)(['css_classes'], expected_version(form_data.get('version')))
+    except (ValueError, VersionConflict) as e:
+        return edit_error_response(e)
+    return JsonResponse({'success': True, 'version': element.version})
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+async def delete_element(request, element_id):
+    element = await aget_object_or_404(PageElement, id=element_id)
+    await sync_to_async(delete_subtree)(element)
+    return JsonResponse({'success': True})
+
+
+@require_http_methods(["POST"])
+async def apply_element_batch(request, slug):
+    if not await Page.acan_edit(request):
+        return JsonResponse({'success': False, 'error': 'Permission denied'}, status=403)
+    page = await aget_object_or_404(Page, slug=slug)
+    try:
+        result = await sync_to_async(apply_batch)(page, batch_operations(request))
+    except VersionConflict as e:
+        return edit_error_response(e)
+    except ValueError as e:
+        return batch_error_response(e)
+    return JsonResponse({'success': True, **asdict(result)})
+
+
+@require_http_methods(["GET"])
+async def page_tree(request, slug):
+    if not await Page.acan_edit(request):
+        return JsonResponse({'success': False, 'error': 'Permission denied'}, status=403)
+    page = await aget_object_or_404(Page, slug=slug)
+    try:
+        since = tree_since(request)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    etag, last_modified = page_validators(page, await apage_element_stats(page))
+    response = get_conditional_response(request, etag=etag, last_modified=int(last_modified.timestamp()))
+    if response is None:
+        response = JsonResponse(await sync_to_async(page_tree_data)(page, since))
+    return add_validators(response, etag, last_modified)
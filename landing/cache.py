@@ -0,0 +1,130 @@
+"""
+Caching of rendered landing pages.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils.http import quote_etag
+
+
+def page_version(page):
+    """Content version of a page: ``updated_at`` is bumped on every page or element change."""
+    return int(page.updated_at.timestamp() * 1_000_000)
+
+
+def page_cache_key(page):
+    return f"landing:page:{page.slug}:{page.pk}:{page.template}:{page_version(page)}"
+
+
+def page_element_stats(page):
+    """Latest element ``updated_at`` and the element count, in one aggregate query."""
+    return page.elements.aggregate(latest=Max('updated_at'), count=Count('id'))
+
+
+async def apage_element_stats(page):
+    return await page.elements.aaggregate(latest=Max('updated_at'), count=Count('id'))
+
+
+def page_validators(page, stats):
+    """
+    ETag and Last-Modified of a page, computed without rendering it.
+
+    Uses ``Page.updated_at`` plus the element stats from ``page_element_stats``,
+    so changes that bypass the model signals are still noticed.
+    """
+    last_modified = max(filter(None, (page.updated_at, stats['latest'])))
+    etag = hashlib.md5(
+        f"{page.pk}:{page.template}:{page_version(page)}:{stats['latest']}:{stats['count']}".encode()
+    ).hexdigest()
+    return quote_etag(etag), last_modified
+
+
+def get_cached_page(page):
+    """Return the cached HTML (bytes) for the current version of the page, or None."""
+    return cache.get(page_cache_key(page))
+
+
+def set_cached_page(page, content):
+    cache.set(page_cache_key(page), content, settings.LANDING_PAGE_CACHE_TIMEOUT)
+
+
+async def aget_cached_page(page):
+    return await cache.aget(page_cache_key(page))
+
+
+async def aset_cached_page(page, content):
+    await cache.aset(page_cache_key(page), content, settings.LANDING_PAGE_CACHE_TIMEOUT)
+
+
+def cache_page_stream(page, chunks):
+    """
+    Pass the chunks of a streamed page through and cache the page once all of them
+    were sent. Pages larger than ``LANDING_PAGE_CACHE_MAX_SIZE`` are not cached:
+    buffering stops (and frees the chunks so far) once they grow past it.
+    """
+    parts, size = [], 0
+    for chunk in chunks:
+        if parts is not None:
+            parts.append(chunk.encode(settings.DEFAULT_CHARSET))
+            size += len(parts[-1])
+            if size > settings.LANDING_PAGE_CACHE_MAX_SIZE:
+                parts = None
+        yield chunk
+    if parts is not None:
+        set_cached_page(page, b''.join(parts))
+
+
+async def acache_page_stream(page, chunks):
+    parts, size = [], 0
+    async for chunk in chunks:
+        if parts is not None:
+            parts.append(chunk.encode(settings.DEFAULT_CHARSET))
+            size += len(parts[-1])
+            if size > settings.LANDING_PAGE_CACHE_MAX_SIZE:
+                parts = None
+        yield chunk
+    if parts is not None:
+        await aset_cached_page(page, b''.join(parts))
+
+
+def subtree_version(element):
+    """
+    Version of an element together with all of its descendants.
+
+    Hash of the element's own ``updated_at`` and its children's subtree versions,
+    so a change anywhere below only changes the versions on the path to the root.
+    Memoized on the instance for the lifetime of the loaded tree.
+    """
+    version = getattr(element, '_subtree_version', None)
+    if version is None:
+        children = ','.join(subtree_version(child) for child in element.get_cached_children())
+        stamp = int(element.updated_at.timestamp() * 1_000_000) if element.updated_at else 0
+        version = hashlib.md5(f"{element.pk}:{stamp}:{children}".encode()).hexdigest()
+        element._subtree_version = version
+    return version
+
+
+def fragment_cache_key(element, edit_mode, eager_images=0):
+    """``eager_images``: how many images of the subtree load eagerly, which depends on the images before it."""
+    return f"landing:fragment:{element.pk}:{subtree_version(element)}:{int(bool(edit_mode))}:{eager_images}"
+
+
+def get_cached_fragments(keys):
+    return cache.get_many(keys)
+
+
+def set_cached_fragment(key, html):
+    cache.set(key, html, settings.LANDING_FRAGMENT_CACHE_TIMEOUT)
+
+
+class FragmentStats:
+    """Fragment cache hit/miss counters for one page render."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def __str__(self):
+        return f"hits={self.hits}, misses={self.misses}"
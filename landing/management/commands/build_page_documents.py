@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from landing.cache import page_element_stats
+from landing.models import Page
+from landing.services.page_document import build_page_document, current_document
+
+
+class Command(BaseCommand):
+    help = 'Build the page documents page views are rendered from (import_worker rebuilds those of changed pages)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('slugs', nargs='*', help='Slugs of pages to build the documents of')
+        parser.add_argument('--all', action='store_true', help='Rebuild the documents of all pages')
+        parser.add_argument('--stale', action='store_true',
+                            help='Only build missing documents and those that no longer match their page')
+
+    def handle(self, *args, **options):
+        pages = Page.objects.select_related('document')
+        if options['slugs']:
+            pages = pages.filter(slug__in=options['slugs'])
+            missing = set(options['slugs']) - set(pages.values_list('slug', flat=True))
+            if missing:
+                raise CommandError(f"Pages not found: {', '.join(sorted(missing))}")
+        elif not (options['all'] or options['stale']):
+            raise CommandError('Pass page slugs, --all or --stale')
+
+        count = 0
+        for page in pages:
+            if options['stale'] and current_document(page, page_element_stats(page)) is not None:
+                continue
+            document = build_page_document(page)
+            count += 1
+            self.stdout.write(f"{page.slug}: {document.element_count} elements, {len(document.data)} bytes")
+        self.stdout.write(self.style.SUCCESS(f"Built {count} page document(s)"))
@@ -0,0 +1,53 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+
+from landing.services.assets import delete_queued_media
+from landing.services.import_jobs import claim_next_job, requeue_stale_jobs, run_job, worker_name
+from landing.services.publisher import rebuild_queued_pages
+
+
+class Command(BaseCommand):
+    help = ('Run the page imports queued from the admin (ImportJob), one at a time, rebuild the documents '
+            'of changed pages between them, and delete media files of deleted elements while idle')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Exit when the queue is empty instead of waiting for new jobs')
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Seconds between queue checks while it is empty (default: 2)')
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        worker = worker_name()
+        self.stdout.write(f"Import worker {worker} started")
+
+        while not self.stopping:
+            requeued = requeue_stale_jobs()
+            if requeued:
+                self.stdout.write(self.style.WARNING(f"Queued {requeued} stale job(s) again"))
+            rebuilt = rebuild_queued_pages()
+            if rebuilt:
+                self.stdout.write(f"Rebuilt {rebuilt} changed page(s)")
+            job = claim_next_job(worker)
+            if job is None:
+                deleted = delete_queued_media()
+                if deleted:
+                    self.stdout.write(f"Deleted {deleted} media file(s) of deleted elements")
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+                continue
+
+            self.stdout.write(f"Importing {job.url} (job {job.pk})...")
+            job = run_job(job)
+            if job.status == job.DONE:
+                self.stdout.write(self.style.SUCCESS(f"Imported {job.page.title} ({job.page.slug})"))
+            else:
+                self.stdout.write(self.style.ERROR(f"Job {job.pk} failed: {job.error}"))
+
+    def stop(self, signum, frame):
+        """Finish the running import, then exit."""
+        self.stopping = True
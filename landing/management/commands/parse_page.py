@@ -1,20 +1,82 @@
+import os
+import time
+
 from django.core.management.base import BaseCommand, CommandError
+from django.template.defaultfilters import filesizeformat
+
+from landing.services.batch_import import import_urls, read_url_file
 from landing.services.page_parser import PageParserService
 
 
 class Command(BaseCommand):
-    help = 'Parse URL and import structure into Page and PageElement models'
+    help = 'Parse URLs and import their structure into Page and PageElement models'
 
     def add_arguments(self, parser):
-        parser.add_argument('url', type=str, help='URL to parse')
+        parser.add_argument('urls', nargs='*', metavar='url', help='URLs to parse')
+        parser.add_argument('--file', '-f', dest='url_file',
+                            help='File with URLs to parse, one per line (# starts a comment)')
+        parser.add_argument('--workers', '-j', type=int, default=None,
+                            help='Worker processes for several URLs (default: number of CPUs)')
+        parser.add_argument('--incremental', action='store_true',
+                            help='Update an existing page with the same slug in place, writing only changed elements')
+        parser.add_argument('--streaming', action='store_true',
+                            help='Build the elements while the HTML downloads, without keeping the whole document')
 
     def handle(self, *args, **options):
-        url = options['url']
+        urls = list(options['urls'])
+        if options['url_file']:
+            try:
+                urls += read_url_file(options['url_file'])
+            except OSError as e:
+                raise CommandError(f"Cannot read {options['url_file']}: {e}")
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            raise CommandError('Pass one or more URLs or --file')
+        if len(urls) == 1:
+            self.import_one(urls[0], options['incremental'], options['streaming'])
+        else:
+            workers = options['workers'] or os.cpu_count() or 1
+            self.import_many(urls, workers, options['incremental'], options['streaming'])
+
+    def import_one(self, url, incremental, streaming):
         self.stdout.write(f"Parsing {url}...")
 
         try:
-            parser = PageParserService(url)
+            parser = PageParserService(url, incremental=incremental, streaming=streaming)
             page = parser.parse_and_import()
             self.stdout.write(self.style.SUCCESS(f"Successfully imported page: {page.title} ({page.slug})"))
+            if parser.http_cache_stats is not None:
+                self.stdout.write(str(parser.http_cache_stats))
+            if parser.tree_diff_stats is not None:
+                self.stdout.write(str(parser.tree_diff_stats))
         except Exception as e:
             raise CommandError(f"Failed to parse page: {e}")
+
+    def import_many(self, urls, workers, incremental, streaming):
+        self.stdout.write(f"Importing {len(urls)} pages with {min(workers, len(urls))} worker(s)...")
+        started = time.perf_counter()
+        results = []
+        for result in import_urls(urls, workers, incremental, streaming):
+            results.append(result)
+            progress = f"[{len(results)}/{len(urls)}]"
+            if result.ok:
+                self.stdout.write(self.style.SUCCESS(
+                    f"{progress} {result.url} -> {result.slug} ({result.seconds:.1f} s)"))
+            else:
+                self.stdout.write(self.style.ERROR(f"{progress} {result.url} failed: {result.error}"))
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write('')
+        self.stdout.write(f"{'Page':<40} {'Status':<6} {'Time':>8} {'Requests':>8} {'Downloaded':>11}")
+        for result in sorted(results, key=lambda result: urls.index(result.url)):
+            self.stdout.write(f"{result.slug if result.ok else result.url:<40} {'ok' if result.ok else 'FAILED':<6} "
+                              f"{result.seconds:>6.1f} s {result.requests:>8} "
+                              f"{filesizeformat(result.bytes_downloaded):>11}")
+        failed = [result for result in results if not result.ok]
+        self.stdout.write(
+            f"{len(results) - len(failed)} imported, {len(failed)} failed in {elapsed:.1f} s "
+            f"({sum(result.seconds for result in results):.1f} s of import time), "
+            f"{filesizeformat(sum(result.bytes_downloaded for result in results))} downloaded"
+        )
+        if failed:
+            raise CommandError(f"{len(failed)} of {len(urls)} imports failed")
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from landing.models import MediaCleanup
+from landing.services.assets import delete_queued_media, prune_assets, unreferenced_assets
+
+
+class Command(BaseCommand):
+    help = ('Delete stored assets no page refers to and no import stored in the last LANDING_ASSET_PRUNE_GRACE '
+            'seconds, and queued media files of deleted elements')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only list the assets that would be deleted')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            for asset in unreferenced_assets():
+                self.stdout.write(f"{asset.file.name} ({asset.size} bytes)")
+            for cleanup in MediaCleanup.objects.all():
+                self.stdout.write(f"{cleanup.name} (deleted element)")
+            return
+        count = prune_assets()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {count} unreferenced asset(s)"))
+        count = 0
+        while MediaCleanup.objects.exists():
+            count += delete_queued_media()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {count} media file(s) of deleted elements"))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from landing.models import Page
+from landing.services.publisher import publish_page, published_dir, unpublish_page, write_published_page
+
+
+class Command(BaseCommand):
+    help = 'Pre-render pages to static HTML files served directly by Caddy'
+
+    def add_arguments(self, parser):
+        parser.add_argument('slugs', nargs='*', help='Slugs of pages to publish')
+        parser.add_argument('--all', action='store_true', help='Publish all pages')
+        parser.add_argument('--refresh', action='store_true',
+                            help='Re-render every page that is already published')
+        parser.add_argument('--unpublish', action='store_true', help='Remove the static copies instead')
+
+    def handle(self, *args, **options):
+        if options['all']:
+            pages = Page.objects.all()
+        elif options['refresh']:
+            pages = Page.objects.filter(is_published=True)
+        elif options['slugs']:
+            pages = Page.objects.filter(slug__in=options['slugs'])
+            missing = set(options['slugs']) - set(pages.values_list('slug', flat=True))
+            if missing:
+                raise CommandError(f"Pages not found: {', '.join(sorted(missing))}")
+        else:
+            raise CommandError('Pass page slugs, --all or --refresh')
+
+        for page in pages:
+            if options['unpublish']:
+                unpublish_page(page)
+                self.stdout.write(f"Unpublished {page.slug}")
+            else:
+                if not page.is_published:
+                    publish_page(page)
+                write_published_page(page)
+                self.stdout.write(self.style.SUCCESS(f"Published {page.slug} -> {published_dir(page.slug)}"))
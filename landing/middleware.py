@@ -0,0 +1,85 @@
+"""
+Server-Timing instrumentation: SQL count/time, element render time by type, elements rendered,
+fragment cache hits and misses.
+
+Enabled with ``LANDING_SERVER_TIMING``; with ``LANDING_TIMING_LOG`` every request
+is also logged as one JSON line to the ``landing.timing`` logger. For streamed
+pages the header carries what was measured before the body started; the log
+line is written once the body has been sent and covers the whole render.
+"""
+import json
+import logging
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.utils.decorators import sync_and_async_middleware
+
+from landing import timing
+
+logger = logging.getLogger('landing.timing')
+
+
+def log_timings(request, response, timings):
+    if settings.LANDING_TIMING_LOG:
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            **timings.as_dict(),
+        }))
+
+
+def stream_with_timings(request, response, timings):
+    """Streamed content that renders with ``timings`` current and logs them at the end."""
+    chunks = response.streaming_content
+    if response.is_async:
+        async def content():
+            token = timing.resume(timings)
+            try:
+                async for chunk in chunks:
+                    yield chunk
+            finally:
+                timing.end_request(token)
+                log_timings(request, response, timings)
+    else:
+        def content():
+            token = timing.resume(timings)
+            try:
+                yield from chunks
+            finally:
+                timing.end_request(token)
+                log_timings(request, response, timings)
+    return content()
+
+
+def finish(request, response, timings):
+    response['Server-Timing'] = timings.server_timing()
+    if response.streaming:
+        response.streaming_content = stream_with_timings(request, response, timings)
+    else:
+        log_timings(request, response, timings)
+    return response
+
+
+@sync_and_async_middleware
+def server_timing_middleware(get_response):
+    if not settings.LANDING_SERVER_TIMING:
+        return get_response
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            timings, token = timing.start_request()
+            try:
+                response = await get_response(request)
+            finally:
+                timing.end_request(token)
+            return finish(request, response, timings)
+    else:
+        def middleware(request):
+            timings, token = timing.start_request()
+            try:
+                response = get_response(request)
+            finally:
+                timing.end_request(token)
+            return finish(request, response, timings)
+    return middleware
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('landing', '0002_alter_page_template'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='page',
+            name='is_published',
+            field=models.BooleanField(default=False, help_text='Serve a pre-rendered static copy of the page'),
+        ),
+        migrations.AlterField(
+            model_name='pageelement',
+            name='type',
+            field=models.CharField(choices=[('body', 'Body (page)'), ('pageheader', 'Header (page)'), ('legend', 'Legend'), ('header', 'Header (h1-h6)'), ('text', 'Text/Paragraph'), ('image', 'Image'), ('container', 'Simple Container'), ('grid', 'Grid Container'), ('card', 'Card/Block'), ('list', 'List (ul/ol)'), ('list_item', 'List item'), ('button', 'Button/Link'), ('section', 'Section'), ('form', 'Form'), ('label', 'Label'), ('input', 'Input'), ('textarea', 'TextArea')], max_length=50),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('landing', '0006_importjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pageelement',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
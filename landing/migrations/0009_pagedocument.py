@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('landing', '0008_mediacleanup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageDocument',
+            fields=[
+                ('page', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='document', serialize=False, to='landing.page')),
+                ('version', models.BigIntegerField()),
+                ('format', models.PositiveIntegerField()),
+                ('element_count', models.PositiveIntegerField()),
+                ('element_latest', models.DateTimeField(blank=True, null=True)),
+                ('compressed', models.BooleanField(default=False)),
+                ('data', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('landing', '0010_pagerebuild'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asset',
+            name='stored_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
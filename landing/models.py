@@ -1,7 +1,13 @@
-from django.db import models
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.db.models import F, Max
+from django.db.models.signals import post_save
+from django.utils import timezone
 from mptt.models import MPTTModel, TreeForeignKey
 import os
 
+from landing.transactions import on_commit_once
+
 def page_image_upload_to(instance, filename):
     """Generate path for downloading images based on page.slug"""
     return f"{instance.page.static_dir}/images/{os.path.basename(filename)}"
@@ -12,6 +18,7 @@ class Page(models.Model):
     template = models.CharField(max_length=255, default='landing_basic.html')
     external_url = models.URLField(blank=True, null=True)
     css_files = models.JSONField(default=list, blank=True)
+    is_published = models.BooleanField(default=False, help_text='Serve a pre-rendered static copy of the page')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -23,11 +30,182 @@ class Page(models.Model):
         """Path for page static files (page_<slug>/)"""
         return f"page_{self.slug}"
 
+    def get_element_tree(self):
+        """
+        Load all page elements with a single ordered query.
+
+        Returns the root elements in tree order. Every element gets its children
+        cached (see ``PageElement.get_cached_children``), so walking the tree
+        afterwards does not touch the database.
+        """
+        return build_element_tree(self.elements.order_by('tree_id', 'lft'))
+
+    async def aget_element_tree(self):
+        """Async version of ``get_element_tree``."""
+        return build_element_tree([element async for element in self.elements.order_by('tree_id', 'lft')])
+
+    @classmethod
+    def mark_changed(cls, page_id):
+        """
+        Bump ``updated_at`` after a content change so cached renders of the page
+        expire; once the transaction commits, however many rows it changed.
+        """
+        on_commit_once(('mark_changed', page_id),
+                       lambda: cls.objects.filter(pk=page_id).update(updated_at=timezone.now()), robust=True)
+
     @classmethod
     def can_edit(cls, request):
         # return True
         return request.user.is_authenticated and request.user.is_staff
 
+    @classmethod
+    async def acan_edit(cls, request):
+        user = await request.auser()
+        return user.is_authenticated and user.is_staff
+
+class Asset(models.Model):
+    """
+    A downloaded file, stored once under the SHA-256 of its content.
+
+    Pages referencing the file (element images, header backgrounds, rewritten
+    CSS) are tracked in ``pages``; files no page refers to any more are deleted
+    by ``prune_assets``. An import only links its assets to the page at the end,
+    so assets stored (or found already stored) recently are spared.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to='assets/', max_length=255)
+    size = models.PositiveIntegerField()
+    content_type = models.CharField(max_length=100, blank=True)
+    pages = models.ManyToManyField(Page, related_name='assets', blank=True)
+    # Pixel size of images, set by ``image_variants``; 0 when the file is not an image Pillow can read
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    # The image this one is a resized WebP variant of
+    original = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='variants')
+    created_at = models.DateTimeField(auto_now_add=True)
+    stored_at = models.DateTimeField(default=timezone.now)  # Last returned by ``store_asset``
+
+    def __str__(self):
+        return self.file.name
+
+
+class ImportJob(models.Model):
+    """
+    A page import queued from the admin and run by the ``import_worker`` command.
+
+    The worker records the import's stage and asset download progress while it
+    runs, so the admin can poll it instead of waiting for the import itself.
+    """
+    QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+
+    url = models.URLField(max_length=2000)
+    incremental = models.BooleanField(default=False)
+    streaming = models.BooleanField(default=False)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED, db_index=True)
+    stage = models.CharField(max_length=20, blank=True)  # See PageParserService.STAGES
+    assets_done = models.PositiveIntegerField(default=0)
+    assets_total = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    summary = models.TextField(blank=True)  # HTTP cache and tree diff stats of a finished import
+    page = models.ForeignKey(Page, on_delete=models.SET_NULL, null=True, blank=True, related_name='import_jobs')
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    worker = models.CharField(max_length=100, blank=True)  # host:pid of the worker that claimed the job
+    attempts = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)  # Also the running job's heartbeat
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.url} ({self.status})"
+
+    @property
+    def finished(self):
+        return self.status in (self.DONE, self.FAILED)
+
+
+class PageDocument(models.Model):
+    """
+    All elements of a page serialized into one row, the read model of page views.
+
+    Built from the element rows, which stay the source of truth for editing, by
+    ``landing.services.page_document``; used while it matches the page's version and element rows.
+    """
+    page = models.OneToOneField(Page, on_delete=models.CASCADE, primary_key=True, related_name='document')
+    version = models.BigIntegerField()  # page_version() of the page it was built from
+    format = models.PositiveIntegerField()  # Checksum of the serialized field list
+    element_count = models.PositiveIntegerField()
+    element_latest = models.DateTimeField(null=True, blank=True)  # Latest element updated_at
+    compressed = models.BooleanField(default=False)  # data is zlib-compressed
+    data = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Document of page {self.page_id} ({self.element_count} elements)"
+
+
+class PageRebuild(models.Model):
+    """
+    A page whose ``PageDocument`` and, if published, static files are rebuilt by
+    the import worker (``rebuild_queued_pages``).
+
+    Queued when changes commit, so edits do not pay for reading every element
+    row of the page and rewriting its document and files; until the worker gets
+    to it, page views render the page from the element rows.
+    """
+    page = models.OneToOneField(Page, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    queued_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Rebuild of page {self.page_id}"
+
+    @classmethod
+    def queue(cls, page_id):
+        cls.objects.bulk_create([cls(page_id=page_id)], ignore_conflicts=True)  # Queued once
+
+
+class MediaCleanup(models.Model):
+    """
+    A media file of deleted elements, removed later by ``delete_queued_media``.
+
+    Deleting the files in the request that deletes the elements would make it
+    wait on the storage; queued in the same transaction, they are only removed
+    if the deletion commits. Only files uploaded for an element are queued:
+    imported images are shared ``Asset`` files, left to ``prune_assets``.
+    """
+    name = models.CharField(max_length=255)  # Name in the default storage
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def queue(cls, names):
+        names = {name for name in names if name}
+        if names:
+            names -= set(Asset.objects.filter(file__in=names).values_list('file', flat=True))
+        cls.objects.bulk_create([cls(name=name) for name in sorted(names)])
+
+
+class VersionConflict(Exception):
+    """An edit based on an outdated ``PageElement.version``; ``current`` is the stored one (None: deleted)."""
+
+    def __init__(self, element_id, current):
+        super().__init__(f"Element {element_id} was changed by someone else" if current is not None
+                         else f"Element {element_id} was deleted")
+        self.element_id = element_id
+        self.current = current
+
+
 class PageElement(MPTTModel):
     ELEMENT_TYPES = (
         ('body', 'Body (page)'), # tag body
@@ -55,8 +233,12 @@ class PageElement(MPTTModel):
     props = models.JSONField(default=dict, blank=True)
     html_attrs = models.JSONField(default=dict, blank=True)
     image = models.ImageField(upload_to=page_image_upload_to, blank=True, null=True)  # Используем функцию
+    image_width = models.PositiveIntegerField(null=True, blank=True)
+    image_height = models.PositiveIntegerField(null=True, blank=True)
+    image_variants = models.JSONField(default=list, blank=True)  # [{'src': url, 'width': px}], smallest first
     css_classes = models.CharField(max_length=255, blank=True, null=True)
     order = models.PositiveIntegerField(default=0)
+    version = models.PositiveIntegerField(default=1)  # Bumped by every edit, for optimistic locking
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -71,6 +253,58 @@ class PageElement(MPTTModel):
     def __str__(self):
         return f"{self.get_tag()} ({self.type}) for {self.page.title} id {self.id}"
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+        super().save(*args, **kwargs)
+
+    def save_changes(self, fields, expected_version=None):
+        """
+        Write only ``fields`` of an existing element and bump its ``version``.
+
+        As long as neither parent nor order change, MPTT has nothing to renumber,
+        so instead of ``save`` (which rewrites every column, the JSON ones
+        included, after checking the tree position) this is a single UPDATE of
+        the given columns. With ``expected_version`` the change is only applied
+        to that version of the element, otherwise ``VersionConflict`` is raised.
+        """
+        fields = set(fields)
+        if fields & {'parent', 'order'}:
+            with transaction.atomic():
+                if expected_version is not None:
+                    current = PageElement.objects.select_for_update().filter(pk=self.pk) \
+                        .values_list('version', flat=True).first()
+                    if current != expected_version:
+                        raise VersionConflict(self.pk, current)
+                    self.version = current
+                self.save()
+            return
+
+        rows = PageElement.objects.filter(pk=self.pk)
+        if expected_version is not None:
+            rows = rows.filter(version=expected_version)
+        self.updated_at = timezone.now()
+        values = {self._meta.get_field(field).attname: getattr(self, self._meta.get_field(field).attname)
+                  for field in fields}
+        if not rows.update(**values, version=F('version') + 1, updated_at=self.updated_at):
+            raise VersionConflict(self.pk, PageElement.objects.filter(pk=self.pk)
+                                  .values_list('version', flat=True).first())
+        if expected_version is not None:
+            self.version = expected_version + 1
+        else:
+            self.refresh_from_db(fields=['version'])
+        # The same notification save() sends: page caches and the published copy are refreshed
+        post_save.send(sender=PageElement, instance=self, created=False, update_fields=frozenset(fields),
+                       raw=False, using=rows.db)
+
+    def get_cached_children(self):
+        """Children from the tree cache when loaded via ``Page.get_element_tree``."""
+        if hasattr(self, '_cached_children'):
+            return self._cached_children
+        return list(self.children.all())
+
     def get_render_props(self):
         if self.type == 'image':
             return {
@@ -126,4 +360,112 @@ class PageElement(MPTTModel):
             'textarea': 'textarea',
             'legend': 'legend',
         }
-        return tag_map.get(self.type, 'div')
\ No newline at end of file
+        return tag_map.get(self.type, 'div')
+
+
+def build_element_tree(elements):
+    """
+    Link a flat list of elements (ordered by tree_id, lft) into trees.
+
+    Children are stored in ``_cached_children``, the attribute MPTT itself uses
+    for ``get_children()``. Returns the list of root elements.
+    """
+    elements = list(elements)
+    by_id = {}
+    for element in elements:
+        element._cached_children = []
+        by_id[element.id] = element
+
+    roots = []
+    for element in elements:
+        parent = by_id.get(element.parent_id)
+        if parent is None:
+            roots.append(element)
+        else:
+            parent._cached_children.append(element)
+    return roots
+
+
+def number_element_tree(roots, tree_ids):
+    """
+    Set ``parent`` and the MPTT fields of elements linked through ``_cached_children``.
+
+    Root ``i`` gets ``tree_ids[i]``. Returns the elements grouped by level, top down.
+    """
+    levels = []
+
+    def number(element, tree_id, left, level):
+        element.tree_id = tree_id
+        element.lft = left
+        element.level = level
+        if len(levels) == level:
+            levels.append([])
+        levels[level].append(element)
+        right = left + 1
+        for child in element._cached_children:
+            child.parent = element
+            right = number(child, tree_id, right, level + 1) + 1
+        element.rght = right
+        return right
+
+    for tree_id, root in zip(tree_ids, roots):
+        root.parent = None
+        number(root, tree_id, 1, 0)
+    return levels
+
+
+TREE_ID_LOCK = 0x6c616e64  # Advisory lock key guarding tree id allocation
+
+
+def next_tree_id():
+    """
+    First MPTT tree id after all existing trees (of every page).
+
+    Call it in the transaction inserting the new trees: on PostgreSQL it takes a
+    transaction-level advisory lock, so concurrent imports don't pick the same ids.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [TREE_ID_LOCK])
+    return (PageElement.objects.aggregate(max_id=Max('tree_id'))['max_id'] or 0) + 1
+
+
+def insert_element_tree(roots):
+    """
+    Insert new elements with one ``bulk_create`` per tree level.
+
+    ``roots`` are unsaved elements whose children are listed in ``_cached_children``
+    (as ``build_element_tree`` leaves them). The MPTT fields are computed here, each
+    root starting a new tree after the existing ones, instead of MPTT shifting
+    ``lft``/``rght`` on every single insert. Bulk inserts send no signals: callers
+    take care of ``Page.mark_changed`` and republishing.
+    """
+    with transaction.atomic():
+        first_tree_id = next_tree_id()
+        levels = number_element_tree(roots, range(first_tree_id, first_tree_id + len(roots)))
+        # Parents get their ids from the previous level's insert
+        for elements in levels:
+            PageElement.objects.bulk_create(elements)
+    return roots
+
+
+def delete_element_rows(pks):
+    """
+    Delete the elements with these ids with plain ``DELETE ... WHERE id IN``
+    statements; returns how many rows were deleted.
+
+    No signals, no cascade collection and no MPTT gap closing: callers delete
+    whole subtrees, renumber the tree themselves and queue the media of the
+    deleted elements (``MediaCleanup.queue``).
+    """
+    pks = list(pks)
+    table = connection.ops.quote_name(PageElement._meta.db_table)
+    column = connection.ops.quote_name(PageElement._meta.pk.column)
+    batch_size = max(connection.ops.bulk_batch_size(['id'], pks), 1)
+    deleted = 0
+    with connection.cursor() as cursor:
+        for start in range(0, len(pks), batch_size):
+            batch = pks[start:start + batch_size]
+            cursor.execute(f"DELETE FROM {table} WHERE {column} IN ({', '.join(['%s'] * len(batch))})", batch)
+            deleted += cursor.rowcount
+    return deleted
@@ -0,0 +1,281 @@
+"""
+HTML rendering of landing pages and their PageElement nodes.
+
+``render_node`` builds the markup of ``elements/_element_base.html`` directly with
+string formatting, skipping the template lookup, Context and tag loading that
+``render_to_string`` does for every element. ``render_node_template`` is the
+template based equivalent, kept for custom wrappers and as the reference output.
+"""
+import json
+import re
+from time import perf_counter
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils.html import escape, strip_spaces_between_tags
+from django.utils.safestring import mark_safe
+
+from landing.cache import FragmentStats, fragment_cache_key, get_cached_fragments, set_cached_fragment
+from landing.timing import current_timings, timed_call
+
+EDIT_WRAPPER_START = (
+    '\n<div\n'
+    '    data-element-id="{id}"\n'
+    '    data-has-children="{has_children}"\n'
+    '    data-element-type="{type}"\n'
+    '    class="editor-element"\n'
+    '    style="position: relative;"\n'
+    '>\n'
+)
+EDIT_WRAPPER_END = '</div>'
+
+STREAM_MARKER = '<!--landing:stream:{}-->'
+STREAM_MARKER_RE = re.compile(r'<!--landing:stream:(\d+)-->')
+
+
+def get_html_attrs(element):
+    html_attrs = element.html_attrs or {}
+    if isinstance(html_attrs, str):
+        try:
+            html_attrs = json.loads(html_attrs)
+        except ValueError:
+            html_attrs = {}
+    return html_attrs
+
+
+def element_attrs(element, html_attrs, eager=False):
+    """Attributes of the element's own tag as (name, value) pairs, in output order."""
+    is_image = element.type.lower() == 'image'
+    attrs = []
+    skipped = ()
+    if is_image:
+        src = timed_call('img', getattr, element.image, 'url') if element.image else html_attrs.get('src', '')
+        attrs.append(('src', src))
+        skipped = ('src', 'srcset') if element.image_variants else ('src',)
+    for key, value in html_attrs.items():
+        if value is not None and key not in skipped:
+            attrs.append((key, value))
+    if is_image:
+        attrs.extend(image_attrs(element, html_attrs, src, eager))
+    return attrs
+
+
+def image_attrs(element, html_attrs, src, eager=False):
+    """
+    Responsive attributes of an image: ``srcset`` of its imported variants and
+    the original at its own width, ``sizes`` capping it at that width, its
+    intrinsic size (so the browser reserves the space before it loads) and lazy
+    loading unless it is one of the first images of the page (``eager_images``).
+    Sizes and loading hints of the source page take precedence.
+    """
+    attrs = []
+    if element.image_variants:
+        candidates = [(variant['src'], variant['width']) for variant in element.image_variants]
+        if element.image_width and element.image_width not in {width for _, width in candidates}:
+            candidates.append((src, element.image_width))
+        attrs.append(('srcset', ', '.join(f"{url} {width}w" for url, width in candidates)))
+        width = html_attrs.get('width')
+        width = int(width) if str(width).isdigit() else element.image_width
+        if width and 'sizes' not in html_attrs:
+            attrs.append(('sizes', f"(max-width: {width}px) 100vw, {width}px"))
+    if element.image_width and 'width' not in html_attrs and 'height' not in html_attrs:
+        attrs += [('width', element.image_width), ('height', element.image_height)]
+    if 'loading' not in html_attrs and not eager:
+        attrs.append(('loading', 'lazy'))
+    if 'decoding' not in html_attrs:
+        attrs.append(('decoding', 'async'))
+    return attrs
+
+
+def format_attrs(attrs):
+    """`` name="value"`` pairs with escaped values; lists (e.g. ``rel``) are space separated."""
+    parts = []
+    for key, value in attrs:
+        if isinstance(value, (list, tuple)):
+            value = ' '.join(str(v) for v in value)
+        parts.append(f' {key}="{escape(value)}"')
+    return ''.join(parts)
+
+
+def eager_images(elements, count):
+    """
+    The first ``count`` images under ``elements`` in document order load eagerly.
+
+    Returns ``{element id: number of them in its subtree}`` for the elements
+    with any: the images themselves and their ancestors. The number is part of
+    their fragment cache key, as it depends on the images before them.
+    """
+    marks = {}
+
+    def mark(elements, count):
+        for element in elements:
+            if not count:
+                break
+            before = count
+            if element.type.lower() == 'image':
+                count -= 1
+            count = mark(element.get_cached_children(), count)
+            if count != before:
+                marks[element.pk] = before - count
+        return count
+
+    mark(elements, count)
+    return marks
+
+
+def element_style(element, html_attrs):
+    """Inline style for page headers: background image from props plus the original style."""
+    if element.type != 'header':
+        return ''
+    style_parts = []
+    bg_image = element.props.get('background_image')
+    if bg_image:
+        style_parts.append(f"background-image: url({bg_image});")
+    style_attr = html_attrs.get('style')
+    if style_attr:
+        style_parts.append(str(style_attr))
+    return '; '.join(style_parts)
+
+
+def element_content(element):
+    """Inner HTML of the element, without children. Content is trusted HTML from the import."""
+    if element.type.lower() == 'image' or not element.content:
+        return ''
+    if element.type == 'text':
+        return f"<p class='{escape(element.css_classes or '')}'>{element.content}</p>"
+    return element.content
+
+
+def render_node(element, children_html, edit_mode=False, eager=False):
+    """Render one element around its already rendered children; ``eager`` images are not lazy loaded."""
+    tag = escape(element.get_tag())
+    html_attrs = get_html_attrs(element)
+    css_classes = element.css_classes
+    style = element_style(element, html_attrs)
+
+    parts = ['\n']
+    if edit_mode:
+        parts.append(EDIT_WRAPPER_START.format(
+            id=escape(element.id),
+            has_children='true' if element.get_cached_children() else 'false',
+            type=escape(element.type),
+        ))
+    parts.append(f'\n\n<{tag}')
+    if css_classes:
+        parts.append(f' class="{escape(css_classes)}"')
+    parts.append(format_attrs(element_attrs(element, html_attrs, eager)))
+    if style:
+        parts.append(f' style="{escape(style)}"')
+    parts.append(f'>\n    {element_content(element)}\n    {children_html}\n</{tag}>\n\n')
+    if edit_mode:
+        parts.append(EDIT_WRAPPER_END)
+    return mark_safe(''.join(parts))
+
+
+def render_node_template(element, children_html, edit_mode=False, eager=False):
+    """Render one element through ``elements/_element_base.html``."""
+    html_attrs = get_html_attrs(element)
+    style = element_style(element, html_attrs)
+    context = {
+        'element': element,
+        'tag': element.get_tag(),
+        'css_classes': element.css_classes or '',
+        'html_attrs': mark_safe(format_attrs(element_attrs(element, html_attrs, eager))),
+        'style_str': mark_safe(f' style="{escape(style)}"') if style else '',
+        'content_html': element_content(element),
+        'children_html': children_html,
+        'edit_mode': edit_mode,
+    }
+    return render_to_string('elements/_element_base.html', context)
+
+
+def render_elements(context, elements, skip_errors=False):
+    """Render sibling subtrees with a single fragment cache lookup for all of them."""
+    edit_mode = context.get('edit_mode', False)
+    stats = context.get('fragment_stats')
+    eager = context.get('eager_images', {})
+    keys = [fragment_cache_key(element, edit_mode, eager.get(element.pk, 0)) for element in elements]
+    cached = timed_call('cache', get_cached_fragments, keys)
+
+    parts = []
+    for element, key in zip(elements, keys):
+        fragment = cached.get(key)
+        if fragment is None:
+            try:
+                fragment = render_element_html(context, element)
+            except:
+                if not skip_errors:
+                    raise
+                fragment = ''
+            else:
+                set_cached_fragment(key, fragment)
+            if stats is not None:
+                stats.misses += 1
+        elif stats is not None:
+            stats.hits += 1
+        parts.append(fragment)
+    return mark_safe(''.join(parts))
+
+
+def render_element_html(context, element):
+    edit_mode = context.get('edit_mode', False)
+    children = element.get_cached_children()
+    children_html = render_children(context, children) if (edit_mode or children) else ''
+    render = render_node if settings.LANDING_COMPILED_RENDERER else render_node_template
+    eager = element.pk in context.get('eager_images', {})
+    timings = current_timings()
+    if timings is None:
+        return render(element, children_html, edit_mode, eager)
+    started = perf_counter()
+    html = render(element, children_html, edit_mode, eager)
+    timings.add_element(element.type, perf_counter() - started)
+    return html
+
+
+def render_children(context, children):
+    return render_elements(context, children, skip_errors=True)
+
+
+def page_context(page, can_edit=False, edit_mode=False, root_elements=None):
+    """Template context for rendering a whole page with ``page.template``."""
+    if root_elements is None:
+        root_elements = page.get_element_tree()  # Whole tree in one query, children cached on each node
+    return {
+        'page': page,
+        'root_elements': root_elements,
+        'can_edit': can_edit,
+        'edit_mode': edit_mode,
+        'element_data': {},  # Для хранения данных элементов при редактировании
+        'fragment_stats': FragmentStats(),
+        'eager_images': eager_images(root_elements, settings.LANDING_EAGER_IMAGES),
+    }
+
+
+def stream_page(template_name, context, request=None):
+    """
+    Render a page as a sequence of chunks: the template up to the first root element,
+    then every root element as soon as it is rendered, then the rest of the template.
+
+    The template is rendered first with markers in place of the root elements (see
+    ``render_element``), so the <head> goes out before any element is rendered.
+    Element chunks are whitespace-collapsed like the {% spaceless %} block around
+    them in the page templates.
+    """
+    elements = []
+    html = render_to_string(template_name, {**context, 'stream_elements': elements}, request)
+    position = 0
+    for match in STREAM_MARKER_RE.finditer(html):
+        yield html[position:match.start()]
+        element = elements[int(match.group(1))]
+        yield strip_spaces_between_tags(timed_call('render', render_elements, context, [element]).strip())
+        position = match.end()
+    yield html[position:]
+
+
+async def astream_page(template_name, context, request=None):
+    """Async iterator over ``stream_page``, rendering each chunk in a worker thread."""
+    chunks = stream_page(template_name, context, request)
+    next_chunk = sync_to_async(next)
+    while (chunk := await next_chunk(chunks, None)) is not None:
+        yield chunk
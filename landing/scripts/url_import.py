@@ -5,12 +5,10 @@ import django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_landing.settings')
 django.setup()
 
-from landing.management.commands.parse_page import Command  # Или скопируйте _methods
+from django.core.management import call_command
 
 if __name__ == '__main__':
-    if len(sys.argv) != 2:
-        print("Usage: python url_import.py <url>")
+    if len(sys.argv) < 2:
+        print("Usage: python url_import.py <url> [<url> ...]")
         sys.exit(1)
-    url = sys.argv[1]
-    cmd = Command()
-    cmd.handle(url=url)
\ No newline at end of file
+    call_command('parse_page', *sys.argv[1:])
@@ -0,0 +1,96 @@
+"""
+Content-addressed storage of imported media.
+
+Every downloaded image is stored once as ``assets/<aa>/<sha256><ext>`` in the
+default storage, whatever page or URL it came from. Elements, header
+backgrounds and rewritten stylesheets point at that file, and the pages using
+it are recorded in ``Asset.pages``. Imports link their assets to the page
+when they are done; until then ``stored_at`` keeps ``prune_assets`` off them.
+"""
+import hashlib
+import mimetypes
+import os
+from datetime import timedelta
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from landing.models import Asset, MediaCleanup, PageElement
+
+
+def asset_path(sha256, extension):
+    return f"assets/{sha256[:2]}/{sha256}{extension}"
+
+
+def asset_extension(url, content_type=''):
+    extension = os.path.splitext(urlparse(url).path)[1].lower()
+    if not extension and content_type:
+        extension = mimetypes.guess_extension(content_type.split(';')[0].strip()) or ''
+    return extension
+
+
+def store_asset(content, url='', content_type=''):
+    """Return the ``Asset`` for ``content``, writing the file only if it is not stored yet."""
+    sha256 = hashlib.sha256(content).hexdigest()
+    asset = Asset.objects.filter(sha256=sha256).first()
+    if asset is not None:
+        # Refreshed once half a grace period old, leaving the import at least the other half to link it
+        now = timezone.now()
+        if asset.stored_at < now - timedelta(seconds=settings.LANDING_ASSET_PRUNE_GRACE / 2):
+            asset.stored_at = now
+            asset.save(update_fields=['stored_at'])
+        return asset
+
+    name = asset_path(sha256, asset_extension(url, content_type))
+    saved = None
+    if not default_storage.exists(name):
+        name = saved = default_storage.save(name, ContentFile(content))
+    asset, created = Asset.objects.get_or_create(sha256=sha256, defaults={
+        'file': name,
+        'size': len(content),
+        'content_type': content_type[:100],
+    })
+    if not created and saved is not None and saved != asset.file.name:
+        default_storage.delete(saved)  # Another import stored the same content first
+    return asset
+
+
+def unreferenced_assets(grace=None):
+    """Assets no page refers to, except those stored less than ``grace`` seconds ago."""
+    if grace is None:
+        grace = settings.LANDING_ASSET_PRUNE_GRACE
+    return Asset.objects.filter(pages=None, stored_at__lt=timezone.now() - timedelta(seconds=grace))
+
+
+def prune_assets(grace=None):
+    """Delete assets (rows and files) no page refers to; returns how many were deleted."""
+    count = 0
+    for asset in unreferenced_assets(grace):
+        asset.file.delete(save=False)
+        asset.delete()
+        count += 1
+    return count
+
+
+def delete_queued_media(limit=1000):
+    """
+    Delete up to ``limit`` files queued by ``MediaCleanup.queue``, skipping those
+    elements still use and asset files (whose references ``prune_assets`` tracks);
+    returns how many files were deleted.
+    """
+    queued = list(MediaCleanup.objects.order_by('pk')[:limit])
+    names = {cleanup.name for cleanup in queued}
+    in_use = set()
+    if names:
+        in_use.update(PageElement.objects.filter(image__in=names).values_list('image', flat=True))
+        in_use.update(Asset.objects.filter(file__in=names).values_list('file', flat=True))
+    count = 0
+    for name in names - in_use:
+        if default_storage.exists(name):
+            default_storage.delete(name)
+            count += 1
+    MediaCleanup.objects.filter(pk__in=[cleanup.pk for cleanup in queued]).delete()
+    return count
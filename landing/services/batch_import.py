@@ -0,0 +1,79 @@
+"""
+Import many pages at once.
+
+Every URL is imported by its own ``PageParserService`` in a pool of worker
+processes (parsing and tree building are CPU bound, so threads would not help).
+A failing URL is reported in its ``ImportResult`` and doesn't stop the others.
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+
+
+@dataclass
+class ImportResult:
+    url: str
+    slug: str = ''
+    title: str = ''
+    seconds: float = 0.0
+    requests: int = 0
+    bytes_downloaded: int = 0
+    error: str = ''
+
+    @property
+    def ok(self):
+        return not self.error
+
+
+def read_url_file(path):
+    """URLs listed one per line in ``path``; blank lines and ``#`` comments are skipped."""
+    with open(path, encoding='utf-8') as f:
+        lines = (line.split('#', 1)[0].strip() for line in f)
+        return [line for line in lines if line]
+
+
+def import_url(url, incremental=False, streaming=False):
+    """Import ``url``; errors are returned in the result instead of raised."""
+    from landing.services.page_parser import PageParserService  # Imported after django.setup() in workers
+
+    parser = PageParserService(url, incremental=incremental, streaming=streaming)
+    result = ImportResult(url)
+    started = time.perf_counter()
+    try:
+        page = parser.parse_and_import()
+        result.slug, result.title = page.slug, page.title
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    result.seconds = time.perf_counter() - started
+    result.requests = parser.requests
+    result.bytes_downloaded = parser.bytes_downloaded
+    return result
+
+
+def _init_worker():
+    import django
+    django.setup()  # Only needed when workers are spawned rather than forked
+
+
+def import_urls(urls, workers=1, incremental=False, streaming=False):
+    """
+    Import ``urls``, yielding an ``ImportResult`` for each as soon as it is done.
+
+    With ``workers`` > 1 the imports run in that many processes, each with its
+    own database connection; otherwise they run one after another in this process.
+    """
+    urls = list(dict.fromkeys(urls))
+    if workers <= 1 or len(urls) <= 1:
+        for url in urls:
+            yield import_url(url, incremental, streaming)
+        return
+
+    from django.db import connections
+    connections.close_all()  # Forked workers must not share this process's connections
+    with ProcessPoolExecutor(max_workers=min(workers, len(urls)), initializer=_init_worker) as pool:
+        futures = {pool.submit(import_url, url, incremental, streaming): url for url in urls}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:  # The worker process died
+                yield ImportResult(futures[future], error=f"{type(e).__name__}: {e}")
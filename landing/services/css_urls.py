@@ -0,0 +1,105 @@
+"""
+Finding and rewriting the URLs a stylesheet refers to.
+
+A single regex pass over the CSS text finds every ``url()`` (in any rule,
+``@font-face``, ``@media`` blocks, several per declaration) and every
+``@import`` target, skipping comments and strings. Rewriting only replaces the
+URL itself; everything else, formatting included, is copied unchanged.
+"""
+import codecs
+import re
+from dataclasses import dataclass
+
+_STRING = r'''"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*\''''
+_URL = r'''(?<![\w-])url\(\s*(?:"(?P<{p}dq>(?:\\.|[^"\\\n])*)"|'(?P<{p}sq>(?:\\.|[^'\\\n])*)'|(?P<{p}bare>(?:\\[0-9a-fA-F]{{1,6}}\s?|\\.|[^)\s"'\\])*))\s*\)'''
+
+TOKEN_RE = re.compile(
+    r'(?=[/@uU"\'])(?:'  # Cheap test for the first character before trying each alternative
+    r'/\*.*?(?:\*/|\Z)'  # Comments
+    r'|(?:@import\s*(?:' + _URL.format(p='i_') + r'|"(?P<i_dstr>(?:\\.|[^"\\\n])*)"'
+    r'|\'(?P<i_sstr>(?:\\.|[^\'\\\n])*)\'))'
+    r'|' + _URL.format(p='') +
+    r'|' + _STRING + ')',  # Other strings, so "url(" inside them is not taken for a URL
+    re.IGNORECASE | re.DOTALL,
+)
+ESCAPE_RE = re.compile(r'\\(?:([0-9a-fA-F]{1,6})\s?|\n|(.))', re.DOTALL)
+UNQUOTED_SPECIAL_RE = re.compile(r'''[()\s"'\\]''')
+CHARSET_RE = re.compile(rb'@charset "([^"]*)";')
+
+# Quote of the URL in each group that can hold one; "i_" groups are @import targets
+URL_GROUPS = {
+    'i_dq': '"', 'i_sq': "'", 'i_bare': '', 'i_dstr': '"', 'i_sstr': "'",
+    'dq': '"', 'sq': "'", 'bare': '',
+}
+
+
+@dataclass
+class CssUrl:
+    url: str  # Unescaped
+    kind: str  # 'import' or 'url'
+    start: int  # Span of the URL as written, without quotes
+    end: int
+    quote: str  # '"', "'" or '' for an unquoted url()
+
+
+def unescape(value):
+    def replace(match):
+        if match.group(1):
+            code = int(match.group(1), 16)
+            return chr(code) if 0 < code <= 0x10FFFF else '\ufffd'
+        return match.group(2) or ''  # An escaped newline is removed
+
+    return ESCAPE_RE.sub(replace, value) if '\\' in value else value
+
+
+def escape(url, quote):
+    """``url`` as written between ``quote``s, or in an unquoted ``url()`` when ``quote`` is empty."""
+    if quote:
+        return url.replace('\\', '\\\\').replace(quote, '\\' + quote).replace('\n', '\\a ')
+    return UNQUOTED_SPECIAL_RE.sub(lambda match: f'\\{ord(match.group()):x} ', url)
+
+
+def find_urls(css):
+    """All ``CssUrl`` references of the stylesheet text ``css``, in order."""
+    urls = []
+    for match in TOKEN_RE.finditer(css):
+        name = match.lastgroup  # None for comments and other strings
+        if name is not None:
+            kind = 'import' if name.startswith('i_') else 'url'
+            urls.append(CssUrl(unescape(match.group(name)), kind, match.start(name), match.end(name), URL_GROUPS[name]))
+    return urls
+
+
+def rewrite_urls(css, replace):
+    """
+    ``css`` with the URLs replaced by ``replace(url, kind)``.
+
+    ``replace`` gets the unescaped URL and ``'import'`` or ``'url'``, and returns
+    the new URL or None to keep the reference as it is.
+    """
+    parts = []
+    position = 0
+    for ref in find_urls(css):
+        new_url = replace(ref.url, ref.kind)
+        if new_url is None or new_url == ref.url:
+            continue
+        parts.append(css[position:ref.start])
+        parts.append(escape(new_url, ref.quote))
+        position = ref.end
+    parts.append(css[position:])
+    return ''.join(parts)
+
+
+def css_encoding(content, content_type=''):
+    """Encoding of a stylesheet: its BOM, else ``@charset``, else the HTTP charset, else UTF-8."""
+    if content.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    match = CHARSET_RE.match(content)
+    charset = match.group(1).decode('ascii', 'replace') if match else ''
+    if not charset:
+        params = [param.strip() for param in content_type.split(';')[1:]]
+        charset = next((param[8:].strip('"\'') for param in params if param.lower().startswith('charset=')), '')
+    try:
+        return codecs.lookup(charset).name if charset else 'utf-8'
+    except LookupError:
+        return 'utf-8'
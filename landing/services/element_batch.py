@@ -0,0 +1,201 @@
+"""
+Many editor changes to one page, applied in a single transaction.
+
+The editor queues its edits and sends them together as a list of operations:
+
+    {"op": "content", "id": 12, "content": "New text"}
+    {"op": "config", "id": 12, "css_classes": "lead"}
+    {"op": "move", "id": 12, "parent": 7, "position": 0}  # parent null: a root; no position: last
+    {"op": "delete", "id": 12}  # with its descendants
+
+Any operation may carry the ``version`` of the element it was based on (the
+editor always sends it); if the element has been edited since, the batch is
+rejected with ``VersionConflict``, so nothing is moved or deleted over changes
+the editor has not seen. Moves change the version of every element that gets a
+new parent or position, its siblings included.
+
+The page's tree is loaded with one query and the operations are applied to it
+in memory, in order; an invalid operation rejects the whole batch before
+anything is written. Changed rows are then saved with ``bulk_update`` and
+removed subtrees with a single DELETE. Moves renumber the tree in memory
+(``number_element_tree``) instead of MPTT shifting rows for every move.
+"""
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.utils import timezone
+
+from landing.models import (MediaCleanup, Page, PageElement, VersionConflict, build_element_tree,
+                            delete_element_rows, next_tree_id, number_element_tree)
+from landing.services.publisher import schedule_republish
+from landing.services.tree_diff import TREE_FIELDS, walk
+
+OPERATIONS = ('content', 'config', 'move', 'delete')
+CSS_CLASSES_MAX_LENGTH = PageElement._meta.get_field('css_classes').max_length
+
+
+class BatchError(ValueError):
+    """An invalid operation; ``index`` is its position in the batch."""
+
+    def __init__(self, index, message):
+        super().__init__(f"Operation {index}: {message}")
+        self.index = index
+
+
+@dataclass
+class BatchResult:
+    """Elements written by a batch."""
+    updated: int = 0  # Content or configuration changed (and possibly moved as well)
+    moved: int = 0  # Got a new parent or position
+    shifted: int = 0  # Only renumbered around moved or deleted elements
+    deleted: int = 0  # Including descendants
+
+    @property
+    def rows_written(self):
+        return self.updated + self.moved + self.shifted + self.deleted
+
+
+def tree_values(element):
+    return tuple(getattr(element, field) for field in TREE_FIELDS[1:]) + (element.parent_id,)
+
+
+class ElementBatch:
+    """The tree of ``page`` with ``operations`` applied in memory; ``save`` writes the result."""
+
+    def __init__(self, page, operations):
+        if not isinstance(operations, list):
+            raise BatchError(0, 'operations must be a list')
+        self.page = page
+        # Locked until the batch is saved, so single edits cannot slip in between the version checks and the writes
+        self.roots = build_element_tree(page.elements.select_for_update().order_by('tree_id', 'lft'))
+        self.tree_ids = sorted(root.tree_id for root in self.roots)
+        self.elements = {element.pk: element for element in walk(self.roots)}
+        self.before = {pk: tree_values(element) for pk, element in self.elements.items()}
+        self.parents = {child.pk: element for element in self.elements.values() for child in element._cached_children}
+        self.changed = set()  # pks with changed content or configuration
+        self.moved = set()
+        self.deleted = set()
+        for index, operation in enumerate(operations):
+            self.apply(index, operation)
+
+    def apply(self, index, operation):
+        if not isinstance(operation, dict) or operation.get('op') not in OPERATIONS:
+            raise BatchError(index, f"op must be one of {', '.join(OPERATIONS)}")
+        element = self.element(index, operation.get('id'))
+        version = operation.get('version')
+        if version is not None:
+            if not isinstance(version, int):
+                raise BatchError(index, 'version must be an integer')
+            if version != element.version:
+                raise VersionConflict(element.pk, element.version)
+        getattr(self, f"apply_{operation['op']}")(index, element, operation)
+
+    def element(self, index, pk):
+        element = self.elements.get(pk) if isinstance(pk, int) else None
+        if element is None or pk in self.deleted:
+            raise BatchError(index, f"no element {pk!r} on this page")
+        return element
+
+    def apply_content(self, index, element, operation):
+        content = operation.get('content')
+        if not isinstance(content, str):
+            raise BatchError(index, 'content must be a string')
+        element.content = content
+        self.changed.add(element.pk)
+
+    def apply_config(self, index, element, operation):
+        css_classes = operation.get('css_classes')
+        if not isinstance(css_classes, str) or len(css_classes) > CSS_CLASSES_MAX_LENGTH:
+            raise BatchError(index, f"css_classes must be a string of at most {CSS_CLASSES_MAX_LENGTH} characters")
+        element.css_classes = css_classes
+        self.changed.add(element.pk)
+
+    def apply_move(self, index, element, operation):
+        parent = None
+        if operation.get('parent') is not None:
+            parent = self.element(index, operation['parent'])
+            ancestor = parent
+            while ancestor is not None:
+                if ancestor is element:
+                    raise BatchError(index, 'an element cannot be moved into itself')
+                ancestor = self.parents.get(ancestor.pk)
+        self.siblings(element).remove(element)
+        siblings = parent._cached_children if parent is not None else self.roots
+        position = operation.get('position', len(siblings))
+        if not isinstance(position, int) or not 0 <= position <= len(siblings):
+            raise BatchError(index, f"position must be between 0 and {len(siblings)}")
+        siblings.insert(position, element)
+        if parent is None:
+            self.parents.pop(element.pk, None)
+        else:
+            self.parents[element.pk] = parent
+        for order, sibling in enumerate(siblings):
+            sibling.order = order
+        self.moved.add(element.pk)
+
+    def apply_delete(self, index, element, operation):
+        self.siblings(element).remove(element)
+        self.deleted.update(descendant.pk for descendant in walk([element]))
+
+    def siblings(self, element):
+        parent = self.parents.get(element.pk)
+        return parent._cached_children if parent is not None else self.roots
+
+    def save(self):
+        """Write the changes with bulk queries; returns a ``BatchResult``."""
+        result = BatchResult()
+        renumber = bool(self.moved or self.deleted)
+        if renumber:
+            # Keep the page's tree ids where possible; roots added by moves get new ids
+            tree_ids = self.tree_ids
+            if len(self.roots) > len(tree_ids):
+                first_new = next_tree_id()
+                tree_ids += range(first_new, first_new + len(self.roots) - len(tree_ids))
+            number_element_tree(self.roots, tree_ids)
+
+        now = timezone.now()
+        content_updates, tree_updates = [], []
+        for element in walk(self.roots):
+            if renumber:
+                element.parent_id = element.parent.pk if element.parent else None
+            if element.pk in self.changed:
+                element.updated_at = now
+                element.version += 1
+                content_updates.append(element)
+            elif renumber and tree_values(element) != self.before[element.pk]:
+                order, *_, parent_id = self.before[element.pk]
+                if (element.order, element.parent_id) != (order, parent_id):
+                    element.updated_at = now
+                    element.version += 1
+                tree_updates.append(element)
+                if element.pk in self.moved:
+                    result.moved += 1
+                else:
+                    result.shifted += 1
+        result.updated = len(content_updates)
+
+        if content_updates:
+            PageElement.objects.bulk_update(content_updates,
+                                            ['content', 'css_classes', 'updated_at', 'version', *TREE_FIELDS])
+        if tree_updates:
+            PageElement.objects.bulk_update(tree_updates, ['updated_at', 'version', *TREE_FIELDS])
+        if self.deleted:
+            # One DELETE for all removed subtrees, without MPTT closing the gap row by row; renumbered above
+            delete_element_rows(self.deleted)
+            MediaCleanup.queue(self.elements[pk].image.name for pk in self.deleted)
+            result.deleted = len(self.deleted)
+
+        if result.rows_written:
+            Page.mark_changed(self.page.pk)
+            schedule_republish(self.page.pk)
+        return result
+
+
+def apply_batch(page, operations):
+    """
+    Apply the editor ``operations`` to ``page`` atomically; raises ``BatchError``
+    for invalid ones and ``VersionConflict`` for outdated ones.
+    """
+    with transaction.atomic():
+        Page.objects.select_for_update().filter(pk=page.pk).first()  # One batch per page at a time
+        return ElementBatch(page, operations).save()
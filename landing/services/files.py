@@ -0,0 +1,18 @@
+"""
+File helpers shared by the services writing to disk (publishing, the HTTP cache).
+"""
+import os
+import tempfile
+
+
+def write_atomic(path, data):
+    """Write to a temp file in the same directory and rename it over ``path``."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
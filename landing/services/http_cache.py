@@ -0,0 +1,187 @@
+"""
+Persistent HTTP cache for page imports.
+
+Responses carrying an ``ETag`` or ``Last-Modified`` are kept in
+``LANDING_HTTP_CACHE_DIR`` (one metadata JSON plus the body per URL). When the
+same URL is fetched again the request is made conditional; on ``304 Not
+Modified`` the stored body is used, so unchanged HTML, CSS and images of a
+re-imported site are not transferred again.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import requests
+from django.conf import settings
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from landing.services.files import write_atomic
+
+# Response headers kept with a cached body
+STORED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Cache-Control')
+
+
+class HttpCacheStats:
+    """Revalidation hits and misses of one import, by kind of resource (html, css, asset)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.kinds = {}  # kind -> [hits, misses, bytes not transferred]
+
+    def record(self, kind, hit, size=0):
+        with self._lock:
+            counter = self.kinds.setdefault(kind, [0, 0, 0])
+            counter[0 if hit else 1] += 1
+            if hit:
+                counter[2] += size
+
+    @property
+    def hits(self):
+        return sum(hits for hits, _, _ in self.kinds.values())
+
+    @property
+    def requests(self):
+        return sum(hits + misses for hits, misses, _ in self.kinds.values())
+
+    @property
+    def bytes_saved(self):
+        return sum(saved for _, _, saved in self.kinds.values())
+
+    def hit_ratio(self, kind=None):
+        if kind is None:
+            hits, total = self.hits, self.requests
+        else:
+            hits, misses, _ = self.kinds.get(kind, (0, 0, 0))
+            total = hits + misses
+        return hits / total if total else 0.0
+
+    def __str__(self):
+        parts = [f"{kind} {hits}/{hits + misses}" for kind, (hits, misses, _) in sorted(self.kinds.items())]
+        return (f"HTTP cache hits {self.hits}/{self.requests} ({self.hit_ratio():.0%}; {', '.join(parts)}), "
+                f"{self.bytes_saved} bytes not transferred")
+
+
+def resource_kind(content_type):
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    if content_type == 'text/html':
+        return 'html'
+    if content_type == 'text/css':
+        return 'css'
+    return 'asset'
+
+
+class HttpCache:
+    """On-disk store of validators and bodies, keyed by URL."""
+
+    def __init__(self, root=None):
+        self.root = root or settings.LANDING_HTTP_CACHE_DIR
+        self.stats = HttpCacheStats()
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode()).hexdigest()
+        directory = os.path.join(self.root, key[:2])
+        return directory, os.path.join(directory, f'{key}.json'), os.path.join(directory, f'{key}.body')
+
+    def _load_meta(self, url):
+        _, meta_path, _ = self._paths(url)
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get('url') == url else None
+
+    def conditional_headers(self, url):
+        """``If-None-Match``/``If-Modified-Since`` for a cached ``url``, or an empty dict."""
+        meta = self._load_meta(url)
+        if meta is None:
+            return {}
+        headers = {}
+        if meta['headers'].get('ETag'):
+            headers['If-None-Match'] = meta['headers']['ETag']
+        if meta['headers'].get('Last-Modified'):
+            headers['If-Modified-Since'] = meta['headers']['Last-Modified']
+        return headers
+
+    def _storable(self, response):
+        self.stats.record(resource_kind(response.headers.get('Content-Type')), False)
+        if response.status_code != 200 or not (response.headers.get('ETag') or response.headers.get('Last-Modified')):
+            return False
+        return 'no-store' not in response.headers.get('Cache-Control', '')
+
+    def _meta(self, url, response):
+        return {
+            'url': url,
+            'headers': {name: response.headers[name] for name in STORED_HEADERS if name in response.headers},
+        }
+
+    def store(self, url, response):
+        """Keep a 200 response that can be revalidated later."""
+        if not self._storable(response):
+            return
+        directory, meta_path, body_path = self._paths(url)
+        os.makedirs(directory, exist_ok=True)
+        write_atomic(body_path, response.content)
+        write_atomic(meta_path, json.dumps(self._meta(url, response)).encode())
+
+    def store_stream(self, url, response, chunk_size):
+        """Yield the body of a streamed ``response`` chunk by chunk, keeping it like ``store`` does."""
+        if not self._storable(response):
+            yield from response.iter_content(chunk_size)
+            return
+        directory, meta_path, body_path = self._paths(url)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in response.iter_content(chunk_size):
+                    f.write(chunk)
+                    yield chunk
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, body_path)
+        except BaseException:  # Including a consumer that stopped reading
+            os.unlink(tmp_path)
+            raise
+        write_atomic(meta_path, json.dumps(self._meta(url, response)).encode())
+
+    def revalidated(self, url, not_modified, stream=False):
+        """
+        The cached response for ``url``, rebuilt after a ``304 Not Modified``.
+
+        Validators sent with the 304 replace the stored ones. With ``stream`` the
+        body is read from the cache file as the response is iterated. Returns None
+        when the cache entry disappeared in the meantime.
+        """
+        meta = self._load_meta(url)
+        _, meta_path, body_path = self._paths(url)
+        if meta is None:
+            return None
+        try:
+            body = open(body_path, 'rb')
+        except OSError:
+            return None
+        size = os.fstat(body.fileno()).st_size
+        if not stream:
+            with body:
+                content = body.read()
+
+        updated = {name: not_modified.headers[name] for name in STORED_HEADERS[1:] if name in not_modified.headers}
+        if updated:
+            meta['headers'].update(updated)
+            write_atomic(meta_path, json.dumps(meta).encode())
+
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.headers = CaseInsensitiveDict(meta['headers'])
+        response.encoding = get_encoding_from_headers(response.headers)
+        if stream:
+            response.raw = body
+        else:
+            response._content = content
+        response.from_cache = True
+        self.stats.record(resource_kind(response.headers.get('Content-Type')), True, size)
+        return response
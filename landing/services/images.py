@@ -0,0 +1,72 @@
+"""
+Responsive variants of imported images.
+
+Every image asset is decoded once with Pillow and encoded as WebP at each of
+``VARIANT_WIDTHS`` narrower than the image, plus its own width. The variants
+are assets themselves (``Asset.original``), so an image used on several pages
+or imported again is only processed the first time.
+"""
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+from landing.services.assets import store_asset
+
+VARIANT_WIDTHS = (480, 960, 1600)
+WEBP_QUALITY = 80
+
+
+def image_variants(asset):
+    """
+    ``(width, height, variants)`` of the image ``asset``, with its WebP variant
+    assets narrowest first. Width and height are None for files Pillow cannot read.
+    """
+    if asset.width is None:
+        return make_variants(asset)
+    if not asset.width:
+        return None, None, []
+    return asset.width, asset.height, list(asset.variants.order_by('width'))
+
+
+def make_variants(asset):
+    try:
+        asset.file.open('rb')
+        try:
+            image = Image.open(BytesIO(asset.file.read()))
+            image.load()
+        finally:
+            asset.file.close()
+        animated = getattr(image, 'is_animated', False)
+        image = ImageOps.exif_transpose(image)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        image = None
+
+    if image is None:
+        asset.width = asset.height = 0
+        asset.save(update_fields=['width', 'height'])
+        return None, None, []
+
+    width, height = image.size
+    asset.width, asset.height = width, height
+    asset.save(update_fields=['width', 'height'])
+    if animated:  # Only the first frame would survive
+        return width, height, []
+
+    if image.mode not in ('RGB', 'RGBA'):
+        transparent = image.mode in ('LA', 'PA') or 'transparency' in image.info
+        image = image.convert('RGBA' if transparent else 'RGB')
+    variants = []
+    for target in [w for w in VARIANT_WIDTHS if w < width] + [width]:
+        size = (target, max(round(height * target / width), 1))
+        resized = image if target == width else image.resize(size, Image.Resampling.LANCZOS)
+        buffer = BytesIO()
+        resized.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=4)
+        content = buffer.getvalue()
+        if target == width and len(content) >= asset.size:
+            break  # Already served at least as small as it is
+        variant = store_asset(content, content_type='image/webp')
+        variant.width, variant.height = size
+        variant.original = variant.original or asset
+        variant.save(update_fields=['width', 'height', 'original'])
+        variants.append(variant)
+    return width, height, variants
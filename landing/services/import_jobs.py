@@ -0,0 +1,142 @@
+"""
+Page imports queued in the database and run outside the web request.
+
+The admin enqueues an ``ImportJob`` and returns at once; ``import_worker``
+processes claim queued jobs one at a time and run them with
+``PageParserService``, saving the import's stage and download progress on the
+job as they go. A heartbeat thread keeps touching the job while it runs, so
+``requeue_stale_jobs`` can tell a dead worker from a long stage.
+"""
+import os
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.db.models import F
+from django.utils import timezone
+
+from landing.models import ImportJob
+
+SAVE_INTERVAL = 1.0  # At most one progress write a second, stage changes are always saved
+MAX_ATTEMPTS = 3
+
+
+def enqueue_import(url, incremental=False, streaming=False, user=None):
+    return ImportJob.objects.create(url=url, incremental=incremental, streaming=streaming,
+                                    created_by=user if user is not None and user.is_authenticated else None)
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"[:100]
+
+
+def claim_next_job(worker=''):
+    """
+    Mark the oldest queued job as running and return it, or None when the queue is empty.
+
+    The status is switched by a conditional UPDATE, so of several workers trying
+    to claim the same job only one succeeds; the others move on to the next job.
+    """
+    while True:
+        job = ImportJob.objects.filter(status=ImportJob.QUEUED).order_by('created_at', 'pk').first()
+        if job is None:
+            return None
+        now = timezone.now()
+        claimed = ImportJob.objects.filter(pk=job.pk, status=ImportJob.QUEUED).update(
+            status=ImportJob.RUNNING, worker=worker, attempts=F('attempts') + 1, started_at=now, updated_at=now)
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+def requeue_stale_jobs(timeout=None):
+    """
+    Queue running jobs again whose worker has not reported for ``timeout`` seconds
+    (``LANDING_IMPORT_JOB_TIMEOUT``): without its ``Heartbeat`` it died in the
+    middle of the import. Jobs that already took ``MAX_ATTEMPTS`` workers down
+    fail instead.
+    """
+    timeout = settings.LANDING_IMPORT_JOB_TIMEOUT if timeout is None else timeout
+    stale = ImportJob.objects.filter(status=ImportJob.RUNNING,
+                                     updated_at__lt=timezone.now() - timedelta(seconds=timeout))
+    stale.filter(attempts__gte=MAX_ATTEMPTS).update(
+        status=ImportJob.FAILED, error='The worker stopped responding', finished_at=timezone.now())
+    return stale.update(status=ImportJob.QUEUED, stage='', worker='')
+
+
+class JobProgress:
+    """``PageParserService`` progress callback saving the stage and download counts on the job."""
+
+    def __init__(self, job):
+        self.job = job
+        self.saved_at = 0.0
+
+    def __call__(self, stage, assets_done, assets_total):
+        job = self.job
+        if stage == job.stage and (assets_done, assets_total) == (job.assets_done, job.assets_total):
+            return
+        now = time.monotonic()
+        if stage == job.stage and assets_done < assets_total and now - self.saved_at < SAVE_INTERVAL:
+            return
+        job.stage, job.assets_done, job.assets_total = stage, assets_done, assets_total
+        job.save(update_fields=['stage', 'assets_done', 'assets_total', 'updated_at'])
+        self.saved_at = now
+
+
+class Heartbeat:
+    """
+    Touches the running job's ``updated_at`` every ``interval`` seconds (a
+    quarter of ``LANDING_IMPORT_JOB_TIMEOUT``) from a thread, as long as the
+    worker process is alive: progress reports alone stop during a single large
+    download or while a big page is saved, which can outlast the timeout.
+    """
+
+    def __init__(self, job, interval=None):
+        self.job = job
+        self.interval = settings.LANDING_IMPORT_JOB_TIMEOUT / 4 if interval is None else interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name=f"import-job-{job.pk}-heartbeat", daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                try:
+                    # Only while the job is still this worker's, not after it was queued again
+                    ImportJob.objects.filter(pk=self.job.pk, status=ImportJob.RUNNING, worker=self.job.worker).update(
+                        updated_at=timezone.now())
+                except DatabaseError:
+                    pass  # E.g. locked by the import's own writes; the next beat tries again
+        finally:
+            connection.close()  # The thread's own connection
+
+
+def run_job(job):
+    """Import the job's URL and record the outcome on the job. Returns the job."""
+    from landing.services.page_parser import PageParserService
+
+    progress = JobProgress(job)
+    parser = PageParserService(job.url, incremental=job.incremental, streaming=job.streaming, progress=progress)
+    try:
+        with Heartbeat(job):
+            job.page = parser.parse_and_import()
+        job.status = ImportJob.DONE
+        job.summary = '\n'.join(str(stats) for stats in (parser.http_cache_stats, parser.tree_diff_stats)
+                                if stats is not None)
+    except Exception as e:
+        job.status = ImportJob.FAILED
+        job.error = f"{type(e).__name__}: {e}"
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'page', 'summary', 'error', 'stage', 'assets_done', 'assets_total',
+                            'finished_at', 'updated_at'])
+    return job
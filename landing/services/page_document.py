@@ -0,0 +1,103 @@
+"""
+The denormalized read model of a page: all of its elements in one row.
+
+Element rows stay the source of truth for editing. For reading, a page's
+elements are serialized in tree order into its ``PageDocument``: one JSON array
+of rows, zlib-compressed at ``LANDING_DOCUMENT_COMPRESSION``, stored with the
+element count and latest ``updated_at`` it was built from. Page views fetch it
+together with the page (``select_related('document')``) and build the element
+tree from it instead of loading the element rows.
+
+A document is only used while it is current: built for the page's
+``page_version`` and matching the ``page_element_stats`` aggregate the view
+computes for its validators anyway, so even changes that bypass the model
+signals make views fall back to the element rows. Documents of changed pages
+are rebuilt by the import worker (``rebuild_queued_pages``), off the edit path,
+and by ``build_page_documents``; views never write them.
+"""
+import json
+import zlib
+from datetime import datetime
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from landing.cache import page_version
+from landing.models import PageDocument, PageElement, build_element_tree
+
+MODEL_FIELDS = [field.attname for field in PageElement._meta.concrete_fields]
+FIELDS = tuple(field for field in MODEL_FIELDS if field != 'page_id')  # The page is the document's own
+DATETIME_FIELDS = ('created_at', 'updated_at')
+# Documents written with another field list (before a migration) are rebuilt
+FORMAT = zlib.crc32(','.join(FIELDS).encode())
+
+
+def build_page_document(page):
+    """Serialize the page's elements into its ``PageDocument``: one query to read them, usually one to write."""
+    rows = [list(row) for row in page.elements.order_by('tree_id', 'lft').values_list(*FIELDS)]
+    updated_at = FIELDS.index('updated_at')
+    latest = max((row[updated_at] for row in rows), default=None)
+    for index in map(FIELDS.index, DATETIME_FIELDS):
+        for row in rows:
+            row[index] = row[index].isoformat()
+
+    data = json.dumps({'fields': FIELDS, 'elements': rows}, separators=(',', ':')).encode()
+    level = settings.LANDING_DOCUMENT_COMPRESSION
+    if level:
+        data = zlib.compress(data, level)
+    values = {'version': page_version(page), 'format': FORMAT, 'element_count': len(rows),
+              'element_latest': latest, 'compressed': bool(level), 'data': data}
+
+    document = PageDocument(page=page, **values)
+    if not PageDocument.objects.filter(page=page).update(**values):
+        try:
+            with transaction.atomic():
+                document.save(force_insert=True)
+        except IntegrityError:
+            pass  # Created concurrently by another rebuild of the page
+    page.document = document
+    return document
+
+
+def current_document(page, stats):
+    """
+    The ``PageDocument`` of ``page`` if it matches the element rows, else None.
+
+    ``stats`` is the page's ``page_element_stats``; the document is loaded with
+    the page (``select_related('document')``) or by one more query.
+    """
+    document = getattr(page, 'document', None)
+    if (document is None or document.format != FORMAT or document.version != page_version(page)
+            or document.element_count != stats['count'] or document.element_latest != stats['latest']):
+        return None
+    return document
+
+
+def page_element_tree(page, stats):
+    """Root elements of ``page``: from its document when current, from the element rows otherwise."""
+    document = current_document(page, stats)
+    if document is None:
+        return page.get_element_tree()
+    return document_element_tree(document, page)
+
+
+def document_element_tree(document, page):
+    """Root elements of the page, built from its document as ``Page.get_element_tree`` builds them from rows."""
+    data = bytes(document.data)
+    if document.compressed:
+        data = zlib.decompress(data)
+    rows = json.loads(data)['elements']
+    datetimes = [FIELDS.index(field) for field in DATETIME_FIELDS]
+    page_index = MODEL_FIELDS.index('page_id')
+    page_field = PageElement._meta.get_field('page')
+    db = PageElement.objects.db
+
+    elements = []
+    for row in rows:
+        for index in datetimes:
+            row[index] = datetime.fromisoformat(row[index])
+        row.insert(page_index, page.pk)  # With every field given, from_db skips its deferred field checks
+        element = PageElement.from_db(db, MODEL_FIELDS, row)
+        page_field.set_cached_value(element, page)
+        elements.append(element)
+    return build_element_tree(elements)
@@ -1,93 +1,302 @@
 """
 Service for parsing web pages and importing them into the database.
 """
+import codecs
 import os
+import re
 import shutil
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait as wait_for
 import requests
+from requests.adapters import HTTPAdapter
 from django.conf import settings
-from django.core.files.base import ContentFile
 from django.utils.text import slugify
 from bs4 import BeautifulSoup, Comment
-import cssutils
-from urllib.parse import urljoin, urlparse
-from landing.models import Page, PageElement
+from urllib.parse import urldefrag, urljoin, urlparse
+from landing.models import Page, PageElement, insert_element_tree
+from landing.services.assets import store_asset
+from landing.services.css_urls import css_encoding, find_urls, rewrite_urls
+from landing.services.http_cache import HttpCache
+from landing.services.images import image_variants
+from landing.services.publisher import schedule_republish
+from landing.services.tree_diff import apply_tree, walk
+
+
+BACKGROUND_IMAGE_RE = re.compile(r'background-image:\s*url\((.*?)\)')
+PROGRESS_INTERVAL = 0.5  # Seconds between progress reports while waiting for downloads
+
+
+class AssetFetcher:
+    """
+    Concurrent HTTP GETs for one import.
+
+    Keeps a keep-alive ``requests.Session`` per host, runs at most ``max_workers``
+    downloads at a time and at most ``per_host`` of them against the same host.
+    Responses fetched with ``prefetch`` are kept, so later ``get`` calls for the
+    same URL (from the tree builder or the CSS rewriter) don't hit the network.
+    With an ``HttpCache`` requests are revalidated against the previous import.
+    """
+
+    def __init__(self, max_workers=None, per_host=None, timeout=10, http_cache=None):
+        self.max_workers = max_workers or settings.LANDING_ASSET_WORKERS
+        self.per_host = per_host or settings.LANDING_ASSET_PER_HOST
+        self.timeout = timeout
+        self.http_cache = http_cache
+        self._sessions = {}
+        self._host_slots = defaultdict(lambda: threading.BoundedSemaphore(self.per_host))
+        self._lock = threading.Lock()
+        self._pool = None
+        self._results = {}  # url -> Future of the Response or of the exception raised while fetching it
+        self.requests = 0  # Requests sent over the network
+        self.bytes_downloaded = 0  # Response bodies received, 304s and cache hits are free
+        self.prefetched = self.prefetches_done = 0
+        self.progress = None  # progress(done, total) of the prefetched downloads, called in the importing thread
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+        for session in self._sessions.values():
+            session.close()
+        self._sessions.clear()
+
+    def _session(self, host):
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.per_host, pool_block=True)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._sessions[host] = session
+            return session, self._host_slots[host]
+
+    def _count(self, resp, stream=False):
+        with self._lock:
+            self.requests += 1
+            if not stream:
+                self.bytes_downloaded += len(resp.content)
+
+    def _request(self, url, timeout=None, stream=False):
+        """GET ``url``, conditional when it is in the HTTP cache; after a 304 the cached response is returned."""
+        session, slots = self._session(urlparse(url).netloc)
+        cache = self.http_cache
+        headers = cache.conditional_headers(url) if cache else {}
+        with slots:
+            resp = session.get(url, headers=headers, timeout=timeout or self.timeout, stream=stream)
+        self._count(resp, stream)
+        if cache is not None and resp.status_code == 304:
+            cached = cache.revalidated(url, resp, stream=stream)
+            if cached is not None:
+                return cached
+            with slots:  # The cache entry is gone, fetch the body after all
+                resp = session.get(url, timeout=timeout or self.timeout, stream=stream)
+            self._count(resp, stream)
+        return resp
+
+    def _fetch(self, url, timeout=None):
+        resp = self._request(url, timeout)
+        if getattr(resp, 'from_cache', False):
+            return resp
+        resp.raise_for_status()
+        if self.http_cache is not None:
+            self.http_cache.store(url, resp)
+        return resp
+
+    def _fetch_result(self, url):
+        try:
+            return self._fetch(url)
+        except Exception as e:
+            return e
+        finally:
+            with self._lock:
+                self.prefetches_done += 1
+
+    def _report_progress(self):
+        if self.progress is not None:
+            self.progress(self.prefetches_done, self.prefetched)
+
+    def prefetch(self, urls, wait=True):
+        """
+        Download all ``urls`` concurrently; failures are raised later by ``get``.
+
+        With ``wait=False`` the downloads go on in the background and ``get`` waits for them.
+        """
+        urls = [url for url in dict.fromkeys(urls) if url not in self._results]
+        if not urls:
+            return
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        futures = [self._pool.submit(self._fetch_result, url) for url in urls]
+        self._results.update(zip(urls, futures))
+        self.prefetched += len(urls)
+        self._report_progress()
+        while wait and futures:
+            futures = wait_for(futures, timeout=PROGRESS_INTERVAL).not_done
+            self._report_progress()
+
+    def stream(self, url, timeout=None, chunk_size=64 * 1024):
+        """
+        Like ``get``, but returns as soon as the headers arrived: the response and an
+        iterator over its body, which is downloaded (and cached) as it is consumed.
+        """
+        resp = self._request(url, timeout, stream=True)
+        if getattr(resp, 'from_cache', False):
+            return resp, self._body(resp, resp.iter_content(chunk_size), counted=False)
+        resp.raise_for_status()
+        if self.http_cache is not None:
+            chunks = self.http_cache.store_stream(url, resp, chunk_size)
+        else:
+            chunks = resp.iter_content(chunk_size)
+        return resp, self._body(resp, chunks, counted=True)
+
+    def _body(self, resp, chunks, counted):
+        try:
+            for chunk in chunks:
+                if counted:
+                    with self._lock:
+                        self.bytes_downloaded += len(chunk)
+                yield chunk
+        finally:
+            resp.close()
+
+    def get(self, url, timeout=None):
+        """Response for ``url``, prefetched or downloaded now. Raises on HTTP and network errors."""
+        future = self._results.get(url)
+        if future is None:
+            return self._fetch(url, timeout)
+        waited = not future.done()
+        result = future.result()
+        if waited:
+            self._report_progress()
+        if isinstance(result, Exception):
+            raise result
+        return result
 
 
 class CSSProcessor:
     """Handles CSS file downloading and URL rewriting."""
 
-    def __init__(self, base_url, static_base, page_slug):
+    def __init__(self, base_url, static_base, page_slug, fetcher=None):
         self.base_url = base_url
         self.static_base = static_base
         self.page_slug = page_slug
-        cssutils.log.setLevel('ERROR')  # Suppress warnings
+        self.fetcher = fetcher or AssetFetcher()
+        self.assets = set()  # Assets the rewritten stylesheets refer to
+        self._css_names = {}  # url -> file name of the local copy, for every stored stylesheet
         self.base_domain = urlparse(base_url).netloc
 
     def download_css_files(self, soup):
         """Download CSS files from the page or keep external URLs."""
-        css_files = []
-        links = soup.find_all('link', rel='stylesheet')
-
-        for link in links:
+        stylesheet_urls = []
+        for link in soup.find_all('link', rel='stylesheet'):
             href = link.get('href')
-            if not href:
-                continue
-
-            full_url = urljoin(self.base_url, href)
-            url_domain = urlparse(full_url).netloc
-
-            if url_domain and url_domain != self.base_domain:
-                css_files.append(full_url)
-                continue
+            if href:
+                stylesheet_urls.append(urljoin(self.base_url, href))
+
+        # Fetch the stylesheets level by level (they may @import more), then all their assets, concurrently
+        sheets = {}  # url -> (css text, encoding)
+        pending = [url for url in dict.fromkeys(stylesheet_urls) if not self._is_external(url)]
+        fetched = set(pending)
+        while pending:
+            self.fetcher.prefetch(pending)
+            for full_url in pending:
+                try:
+                    resp = self.fetcher.get(full_url)
+                    encoding = css_encoding(resp.content, resp.headers.get('Content-Type', ''))
+                    sheets[full_url] = (resp.content.decode(encoding, errors='replace'), encoding)
+                    self._css_names[full_url] = self._css_filename(full_url)
+                except Exception as e:
+                    print(f"Failed to download CSS {full_url}: {e}")
+            imports = [urljoin(css_url, ref.url) for css_url in pending if css_url in sheets
+                       for ref in find_urls(sheets[css_url][0]) if ref.kind == 'import']
+            pending = [url for url in dict.fromkeys(imports) if url not in fetched and not self._is_external(url)]
+            fetched.update(pending)
+        self.fetcher.prefetch(
+            asset_url for css_url, (css, _) in sheets.items() for asset_url in self._css_asset_urls(css, css_url)
+        )
 
+        for full_url, (css, encoding) in sheets.items():
             try:
-                resp = requests.get(full_url, timeout=10)
-                resp.raise_for_status()
-
-                filename = os.path.basename(urlparse(full_url).path) or f"style_{len(css_files)}.css"
-                css_path = os.path.join(self.static_base, 'css', filename)
-
+                css_path = os.path.join(self.static_base, 'css', self._css_names[full_url])
                 # Переписываем URLs и сохраняем изменённый CSS
-                sheet = self._rewrite_css_urls(resp.text, full_url, css_path)
-                with open(css_path, 'w', encoding='utf-8') as f:
-                    f.write(sheet.cssText.decode('utf-8'))  # Сохраняем изменённый CSS
-
-                css_files.append(f"page_{self.page_slug}/css/{filename}")
-
+                with open(css_path, 'wb') as f:
+                    f.write(self._rewrite_css_urls(css, full_url).encode(encoding))
             except Exception as e:
-                print(f"Failed to download CSS {full_url}: {e}")
+                print(f"Failed to save CSS {full_url}: {e}")
+                del self._css_names[full_url]
 
+        css_files = []
+        for full_url in stylesheet_urls:
+            if self._is_external(full_url):
+                css_files.append(full_url)
+            elif full_url in self._css_names:
+                css_files.append(f"page_{self.page_slug}/css/{self._css_names[full_url]}")
         return css_files
 
-    def _rewrite_css_urls(self, css_text, css_url, css_path):
-        """Rewrite URLs in CSS to local paths in MEDIA_ROOT and return modified sheet."""
-        sheet = cssutils.parseString(css_text)
+    def _css_filename(self, css_url):
+        """Unique file name in the page's css directory for the stylesheet at ``css_url``."""
+        name = os.path.basename(urlparse(css_url).path) or 'style.css'
+        stem, extension = os.path.splitext(name)
+        taken = set(self._css_names.values())
+        number = 1
+        while name in taken:
+            name = f"{stem}-{number}{extension or '.css'}"
+            number += 1
+        return name
+
+    def _is_external(self, url):
+        url_domain = urlparse(url).netloc
+        return bool(url_domain) and url_domain != self.base_domain
 
-        for rule in sheet:
-            if rule.type == rule.STYLE_RULE:
-                for prop in rule.style:
-                    if prop.name in ('background', 'background-image') and 'url(' in prop.value:
-                        old_url = prop.value.replace('url(', '').replace(')', '').strip("'\"")
-                        full_asset_url = urljoin(css_url, old_url)
-
-                        # Скачиваем изображение в MEDIA_ROOT
-                        image_file = AssetDownloader.download_to_media(full_asset_url, self.page_slug, 'images')
-                        if image_file:
-                            relative_path = f"images/{image_file.name}"
-                            prop.value = f"url(/media/page_{self.page_slug}/{relative_path})"
-                            print(f"Rewrote URL to: url(/media/page_{self.page_slug}/{relative_path})")
-
-        return sheet  # Возвращаем изменённый sheet
+    @staticmethod
+    def _is_downloadable(url):
+        return bool(url) and not url.startswith('#') and urlparse(url).scheme in ('', 'http', 'https')
+
+    def _css_asset_urls(self, css, css_url):
+        return [urldefrag(urljoin(css_url, ref.url)).url for ref in find_urls(css)
+                if ref.kind == 'url' and self._is_downloadable(ref.url)]
+
+    def _rewrite_css_urls(self, css, css_url):
+        """
+        Point the URLs of the stylesheet ``css`` at the stored assets and at the local
+        copies of imported stylesheets; anything else gets an absolute URL, since the
+        stylesheet is served from elsewhere now.
+        """
+        def replace(url, kind):
+            if not self._is_downloadable(url):
+                return None
+            full_url = urljoin(css_url, url)
+            if kind == 'import':
+                return self._css_names.get(full_url, full_url)  # The copies are in the same directory
+
+            # Скачиваем файл в MEDIA_ROOT
+            asset_url, fragment = urldefrag(full_url)
+            asset = AssetDownloader.store_asset(asset_url, fetcher=self.fetcher)
+            if not asset:
+                return full_url
+            self.assets.add(asset)
+            return f"{asset.file.url}#{fragment}" if fragment else asset.file.url
+
+        return rewrite_urls(css, replace)
 
 
 class AssetDownloader:
     """Handles downloading of images and other assets."""
 
     @staticmethod
-    def download_asset(asset_url, static_base, subdir='images'):
+    def download_asset(asset_url, static_base, subdir='images', fetcher=None):
         """Download an asset and return its relative path."""
         try:
-            resp = requests.get(asset_url, timeout=10)
+            resp = fetcher.get(asset_url) if fetcher else requests.get(asset_url, timeout=10)
             resp.raise_for_status()
 
             filename = os.path.basename(urlparse(asset_url).path)
@@ -106,24 +315,12 @@ class AssetDownloader:
             return None
 
     @staticmethod
-    def download_to_media(asset_url, page_slug, subdir='images'):
-        """Download asset directly to MEDIA_ROOT."""
+    def store_asset(asset_url, fetcher=None):
+        """Download an asset into the content-addressed asset store and return its ``Asset``."""
         try:
-            resp = requests.get(asset_url, timeout=10)
+            resp = fetcher.get(asset_url) if fetcher else requests.get(asset_url, timeout=10)
             resp.raise_for_status()
-
-            filename = os.path.basename(urlparse(asset_url).path)
-            if not filename:
-                filename = f"asset_{hash(asset_url) % 1000000}.jpg"
-
-            media_path = os.path.join(settings.MEDIA_ROOT, f"page_{page_slug}", subdir)
-            os.makedirs(media_path, exist_ok=True)
-
-            media_file_path = os.path.join(media_path, filename)
-            with open(media_file_path, 'wb') as f:
-                f.write(resp.content)
-
-            return ContentFile(resp.content, name=filename)
+            return store_asset(resp.content, asset_url, resp.headers.get('Content-Type', ''))
 
         except Exception as e:
             print(f"Failed to download to media {asset_url}: {e}")
@@ -149,46 +346,98 @@ class ElementTreeBuilder:
         'li': 'list_item',
         'a': 'button', 'button': 'button',
     }
+    # Kept as part of their parent's content instead of becoming elements
+    INLINE_TAGS = ('span', 'strong', 'em', 'b', 'input')
 
-    def __init__(self, page, base_url, static_base):
+    def __init__(self, page, base_url, static_base, fetcher=None):
         self.page = page
         self.base_url = base_url
         self.static_base = static_base
+        self.fetcher = fetcher or AssetFetcher()
+        self.assets = set()  # Assets used by the built elements
+
+    def asset_urls(self, elem):
+        """URLs of the images and header backgrounds ``build_tree`` will download for ``elem``."""
+        urls = (self.asset_url(tag) for tag in elem.find_all(['img', 'header']))
+        return [url for url in urls if url]
 
-    def build_tree(self, elem, parent=None, order=0):
-        """Recursively build PageElement tree."""
+    def asset_url(self, tag):
+        """URL of the image or header background the element for ``tag`` gets, if any."""
+        if tag.name not in ('img', 'header'):
+            return None
+        el_type = self._determine_element_type(tag, None)  # Decided by the tag's classes alone for these
+        if el_type == 'image' and tag.get('src'):
+            return urljoin(self.base_url, tag['src'])
+        if el_type == 'pageheader':
+            match = BACKGROUND_IMAGE_RE.search(tag.get('style', ''))
+            if match:
+                return urljoin(self.base_url, match.group(1).strip("'\""))
+        return None
+
+    def build_elements(self, elem):
+        """
+        Build the PageElement tree of ``elem`` in memory, without saving anything.
+
+        Returns the root elements, with their children in ``_cached_children``.
+        """
+        self.roots = []
+        self._build_node(elem)
+        return self.roots
+
+    def build_tree(self, elem):
+        """Build the PageElement tree of ``elem``, then insert it in bulk. Returns the root elements."""
+        return self.save_tree(self.build_elements(elem))
+
+    def save_tree(self, roots):
+        """Insert elements built by ``build_elements`` (or ``StreamingTreeParser``) for a new page."""
+        insert_element_tree(roots)
+        Page.mark_changed(self.page.pk)
+        schedule_republish(self.page.pk)
+        return roots
+
+    def _build_node(self, elem, parent=None, order=0):
+        """Recursively build unsaved PageElements."""
         if not elem.name:
-            return []
+            return
 
         el_type = self._determine_element_type(elem, parent)
 
         if el_type == 'body':
-            return self._process_body(elem, parent)
+            self._process_body(elem, parent)
+            return
+
+        pe = self.new_element(elem, el_type)
+        pe.parent = parent
+        pe.order = order
+        if parent is None:
+            self.roots.append(pe)
+        else:
+            parent._cached_children.append(pe)
 
+        # Process children
+        self._process_children(elem, pe)
+
+    def new_element(self, elem, el_type):
+        """Unsaved PageElement for the tag ``elem`` alone; parent, order and children are set by the caller."""
         props = self._extract_props(elem, el_type)
         content = self._extract_content(elem)
         html_attrs = dict(elem.attrs)
         css_classes = ' '.join(html_attrs.pop('class', []))
 
-        image_file = self._process_image(elem, el_type, html_attrs)
+        image_fields = self._process_image(elem, el_type, html_attrs)
 
-        # Create element
-        pe = PageElement.objects.create(
+        # Create element, saved later by insert_element_tree
+        pe = PageElement(
             page=self.page,
             type=el_type,
             content=content,
             props=props,
             html_attrs=html_attrs,
             css_classes=css_classes,
-            image=image_file,
-            parent=parent,
-            order=order,
+            **image_fields,
         )
-
-        # Process children
-        self._process_children(elem, pe)
-
-        return [pe] if parent is None else []
+        pe._cached_children = []
+        return pe
 
     def _determine_element_type(self, elem, parent):
         """Determine the element type based on tag and classes."""
@@ -256,13 +505,13 @@ class ElementTreeBuilder:
         style = elem.get('style', '')
 
         if 'background-image' in style:
-            import re
-            match = re.search(r'background-image:\s*url\((.*?)\)', style)
+            match = BACKGROUND_IMAGE_RE.search(style)
             if match:
                 bg_url = urljoin(self.base_url, match.group(1).strip("'\""))
-                image_file = AssetDownloader.download_to_media(bg_url, self.page.slug, 'images')
-                if image_file:
-                    props['background_image'] = f"/media/page_{self.page.slug}/images/{image_file.name}"
+                asset = AssetDownloader.store_asset(bg_url, fetcher=self.fetcher)
+                if asset:
+                    self.assets.add(asset)
+                    props['background_image'] = asset.file.url
 
         return props
 
@@ -272,29 +521,37 @@ class ElementTreeBuilder:
             str(child)
             for child in elem.contents
             if child.name is None and not isinstance(child, Comment)
-            or child.name in ['span', 'strong', 'em', 'b', 'input']
+            or child.name in self.INLINE_TAGS
         )
         return content.strip()
 
     def _process_image(self, elem, el_type, html_attrs):
-        """Process image element and download file."""
+        """Download the image of an image element; returns its PageElement image fields."""
         if el_type != 'image' or 'src' not in html_attrs:
-            return None
+            return {}
 
         src = urljoin(self.base_url, html_attrs['src'])
-        image_file = AssetDownloader.download_to_media(src, self.page.slug, 'images')
-
-        if image_file:
-            html_attrs['src'] = f"/media/page_{self.page.slug}/images/{image_file.name}"
-
-        return image_file
+        asset = AssetDownloader.store_asset(src, fetcher=self.fetcher)
+        if not asset:
+            return {}
+
+        width, height, variants = image_variants(asset)
+        self.assets.add(asset)
+        self.assets.update(variants)
+        html_attrs['src'] = asset.file.url
+        return {
+            'image': asset.file.name,  # The element's image is the stored file itself, nothing is copied
+            'image_width': width,
+            'image_height': height,
+            'image_variants': [{'src': variant.file.url, 'width': variant.width} for variant in variants],
+        }
 
     def _process_body(self, elem, parent):
         """Process body element (skip creating PageElement for body)."""
         children_order = 0
         for child in elem.children:
-            if child.name and child.name not in ['span', 'strong', 'em', 'b', 'input']:
-                self.build_tree(child, parent, children_order)
+            if child.name and child.name not in self.INLINE_TAGS:
+                self._build_node(child, parent, children_order)
                 children_order += 1
         return []
 
@@ -302,53 +559,257 @@ class ElementTreeBuilder:
         """Process child elements recursively."""
         children_order = 0
         for child in elem.children:
-            if child.name and child.name not in ['span', 'strong', 'em', 'b', 'input']:
-                self.build_tree(child, parent_element, children_order)
+            if child.name and child.name not in self.INLINE_TAGS:
+                self._build_node(child, parent_element, children_order)
                 children_order += 1
 
 
+class StreamingSoup(BeautifulSoup):
+    """
+    A BeautifulSoup (lxml) document parsed from text passed to ``feed`` piece by
+    piece, calling ``on_start(tag)`` and ``on_end(tag)`` as tags open and close.
+
+    Tags, strings and attributes come out exactly as ``BeautifulSoup(markup, 'lxml')``
+    makes them; ``on_end`` may drop the contents of finished tags.
+    """
+
+    def __init__(self, on_start, on_end):
+        self.on_start = self.on_end = None
+        super().__init__('', 'lxml')
+        # Start over like BeautifulSoup._feed does, but keep the lxml parser open for feed()
+        self.reset()
+        self.builder.initialize_soup(self)
+        self._parser = self.builder.parser_for(None)
+        self.on_start, self.on_end = on_start, on_end
+
+    def feed(self, text):
+        self._parser.feed(text)
+
+    def close(self):
+        self._parser.close()
+        self.endData()
+        while self.currentTag is not None and self.currentTag.name != self.ROOT_TAG_NAME:
+            self.popTag()
+        self.builder.soup = None
+
+    def handle_starttag(self, *args, **kwargs):
+        tag = super().handle_starttag(*args, **kwargs)
+        if tag is not None and self.on_start is not None:
+            self.on_start(tag)
+        return tag
+
+    def popTag(self):
+        tag = self.tagStack[-1] if self.tagStack else None
+        current = super().popTag()
+        if tag is not None and tag is not self and self.on_end is not None:
+            self.on_end(tag)
+        return current
+
+
+class StreamingTreeParser:
+    """
+    Builds the elements of a page while its HTML is parsed, chunk by chunk.
+
+    The result is the same as ``ElementTreeBuilder.build_elements(soup.body)``,
+    built bottom-up: a tag becomes its PageElement when its end tag is parsed (its
+    type only depends on the tag and its children), and its contents are dropped
+    right away. Besides the <head>, only the open tags and their direct children
+    (emptied, with just their classes) are kept, so the parsed document takes
+    memory by nesting depth rather than size. Images start downloading as soon as
+    their tag is seen.
+    """
+
+    KEPT_TAGS = ('link', 'title')  # Looked up in the whole document by the head processing
+
+    def __init__(self, tree_builder):
+        self.tree_builder = tree_builder
+        self.soup = StreamingSoup(self._start, self._end)
+        self.roots = None  # Set when </body> is parsed
+        self._body = None
+        self._building = []  # For each open tag: whether it becomes an element
+        self._built = {}  # id(tag) -> its PageElement, until the parent's end tag
+        self._kept = []  # <link> and <title> tags of the body, in document order
+
+    def parse(self, chunks, encoding=None):
+        """Parse the HTML ``chunks`` (bytes in ``encoding``); returns the root elements, None without a <body>."""
+        try:
+            decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+        except LookupError:
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        started = False
+        for chunk in chunks:
+            text = decoder.decode(chunk)
+            if text and not started:
+                started = True
+                text = text[1:] if text[0] == '\ufeff' else text  # BeautifulSoup drops a byte order mark too
+            if text:
+                self.soup.feed(text)
+        text = decoder.decode(b'', final=True)
+        if text:
+            self.soup.feed(text)
+        self.soup.close()
+        return self.roots
+
+    def document(self):
+        """The parsed document as far as the <head> processing needs it (title, stylesheets)."""
+        if self._body is not None:
+            for tag in self._kept:
+                self._body.append(tag)
+            self._kept = []
+        return self.soup
+
+    def _start(self, tag):
+        in_body = self._body is not None and self.roots is None
+        if tag.name == 'body' and self._body is None:
+            self._body = tag
+            building = in_body = True
+        else:
+            building = bool(self._building) and self._building[-1] and \
+                tag.name not in self.tree_builder.INLINE_TAGS
+        self._building.append(building)
+
+        if in_body:
+            if tag.name in self.KEPT_TAGS:
+                self._kept.append(tag)
+            url = self.tree_builder.asset_url(tag)
+            if url:
+                self.tree_builder.fetcher.prefetch([url], wait=False)
+
+    def _end(self, tag):
+        if not self._building.pop():
+            return
+        builder = self.tree_builder
+        children = [self._built.pop(id(child)) for child in tag.children
+                    if child.name and child.name not in builder.INLINE_TAGS]
+        # The parent is not built yet; it only matters for a div in a header, which is a container either way
+        el_type = builder._determine_element_type(tag, None)
+        element = None if el_type == 'body' else builder.new_element(tag, el_type)
+        for order, child in enumerate(children):
+            child.parent = element
+            child.order = order
+            if element is not None:
+                element._cached_children.append(child)
+
+        if tag is self._body:
+            if element is not None:
+                element.order = 0
+            self.roots = children if element is None else [element]
+        else:
+            self._built[id(tag)] = element
+
+        # Only the name and classes of a finished tag are needed any more, by its parent
+        if tag.name not in self.KEPT_TAGS:
+            tag.clear()
+            if tag is not self._body:
+                tag.attrs = {name: value for name, value in tag.attrs.items() if name == 'class'}
+        self.soup._most_recent_element = tag
+
+
 class PageParserService:
     """Main service for parsing and importing web pages."""
 
-    def __init__(self, url):
+    STAGES = ('download', 'stylesheets', 'images', 'saving')
+
+    def __init__(self, url, incremental=False, streaming=False, progress=None):
         self.url = url
+        self.incremental = incremental
+        self.streaming = streaming  # Build the elements while the HTML downloads, see StreamingTreeParser
+        self.progress = progress  # progress(stage, assets_done, assets_total), see _set_stage
+        self.stage = ''
         self.page = None
         self.static_base = None
+        self.http_cache_stats = None
+        self.tree_diff_stats = None  # Set by incremental re-imports of an existing page
+        self.requests = 0
+        self.bytes_downloaded = 0
 
     def parse_and_import(self):
         """Parse URL and import into database."""
         if not settings.STATIC_ROOT:
             raise ValueError("STATIC_ROOT is not defined in settings.py")
 
-        # Download HTML
-        response = requests.get(self.url, timeout=15)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'lxml')
+        http_cache = HttpCache() if settings.LANDING_HTTP_CACHE_DIR else None
+        with AssetFetcher(http_cache=http_cache) as fetcher:
+            if self.progress is not None:
+                fetcher.progress = lambda done, total: self.progress(self.stage, done, total)
+            try:
+                page = self._import(fetcher)
+            finally:
+                self.requests = fetcher.requests
+                self.bytes_downloaded = fetcher.bytes_downloaded
+        if http_cache is not None:
+            self.http_cache_stats = http_cache.stats
+        return page
+
+    def _import(self, fetcher):
+        """Import the page, with the HTML and all assets downloaded through ``fetcher``."""
+        self._set_stage('download', fetcher)
+        if self.streaming:
+            # The body's elements are built while the HTML downloads, before the page exists
+            response, chunks = fetcher.stream(self.url, timeout=15)
+            parser = StreamingTreeParser(ElementTreeBuilder(None, self.url, None, fetcher))
+            roots = parser.parse(chunks, response.encoding)
+            soup = parser.document()
+        else:
+            # Download HTML
+            response = fetcher.get(self.url, timeout=15)
+            soup = BeautifulSoup(response.text, 'lxml')
 
         # Create or update page
         title, slug = self._extract_page_info(soup)
-        self._cleanup_existing_page(slug)
-        self.page = Page.objects.create(title=title, slug=slug, external_url=self.url)
+        existing = Page.objects.filter(slug=slug).first() if self.incremental else None
+        if existing is not None:
+            # Keep the page and its elements, only the differences get written below
+            self.page = existing
+            self.page.title = title
+            self.page.external_url = self.url
+        else:
+            self._cleanup_existing_page(slug)
+            self.page = Page.objects.create(title=title, slug=slug, external_url=self.url)
 
         # Setup directories
         self._setup_static_directories()
 
         # Process CSS
-        css_processor = CSSProcessor(self.url, self.static_base, self.page.slug)
+        self._set_stage('stylesheets', fetcher)
+        css_processor = CSSProcessor(self.url, self.static_base, self.page.slug, fetcher)
         css_files = css_processor.download_css_files(soup)
         self.page.css_files = css_files
         self.page.save()
 
         # Build element tree
-        body = soup.body
-        if not body:
-            raise ValueError("No <body> found in HTML")
-
-        tree_builder = ElementTreeBuilder(self.page, self.url, self.static_base)
-        tree_builder.build_tree(body)
+        self._set_stage('images', fetcher)
+        if self.streaming:
+            if roots is None:
+                raise ValueError("No <body> found in HTML")
+            tree_builder = parser.tree_builder
+            tree_builder.page, tree_builder.static_base = self.page, self.static_base
+            for element in walk(roots):
+                element.page = self.page
+        else:
+            body = soup.body
+            if not body:
+                raise ValueError("No <body> found in HTML")
+
+            tree_builder = ElementTreeBuilder(self.page, self.url, self.static_base, fetcher)
+            # Download all images up front, concurrently; build_elements then finds them in the fetcher
+            fetcher.prefetch(tree_builder.asset_urls(body))
+            roots = tree_builder.build_elements(body)
+        self._set_stage('saving', fetcher)
+        if existing is not None:
+            self.tree_diff_stats = apply_tree(self.page, roots)
+        else:
+            tree_builder.save_tree(roots)
+        self.page.assets.set([*css_processor.assets, *tree_builder.assets])
 
         return self.page
 
+    def _set_stage(self, stage, fetcher):
+        """Report the start of one of ``STAGES`` with the downloads so far to ``progress``."""
+        self.stage = stage
+        if self.progress is not None:
+            self.progress(stage, fetcher.prefetches_done, fetcher.prefetched)
+
     def _extract_page_info(self, soup):
         """Extract title and generate slug."""
         title = soup.title.string.strip() if soup.title else urlparse(self.url).netloc
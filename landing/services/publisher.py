@@ -0,0 +1,99 @@
+"""
+Static publishing of landing pages.
+
+Published pages are written to ``LANDING_PUBLISH_ROOT`` in the same layout as their
+URLs (``landing/page/<slug>/index.html`` plus a gzipped copy), so Caddy can serve
+anonymous traffic straight from disk without reaching Django.
+"""
+import gzip
+import os
+import shutil
+
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+from landing.cache import page_element_stats
+from landing.models import Page, PageRebuild
+from landing.rendering import page_context
+from landing.services.files import write_atomic
+from landing.services.page_document import build_page_document, page_element_tree
+from landing.transactions import on_commit_once
+
+
+def published_dir(slug):
+    """Directory holding the published files of the page with this slug."""
+    url = reverse('page', kwargs={'slug': slug})
+    return os.path.join(settings.LANDING_PUBLISH_ROOT, url.strip('/'))
+
+
+def render_published_page(page):
+    """Render the page as an anonymous visitor sees it."""
+    root_elements = page_element_tree(page, page_element_stats(page))
+    return render_to_string(page.template, page_context(page, root_elements=root_elements))
+
+
+def write_published_page(page):
+    """Render the page and (re)write its static files. Returns the HTML path."""
+    html = render_published_page(page).encode('utf-8')
+    target_dir = published_dir(page.slug)
+    os.makedirs(target_dir, exist_ok=True)
+
+    html_path = os.path.join(target_dir, 'index.html')
+    # The gzip copy goes first, so a fresh index.html never sits next to a stale .gz
+    write_atomic(html_path + '.gz', gzip.compress(html, compresslevel=9, mtime=0))
+    write_atomic(html_path, html)
+    return html_path
+
+
+def remove_published_page(slug):
+    shutil.rmtree(published_dir(slug), ignore_errors=True)
+
+
+def publish_page(page):
+    """Mark the page as published; the import worker writes its files (``rebuild_queued_pages``)."""
+    page.is_published = True
+    page.save(update_fields=['is_published', 'updated_at'])
+
+
+def unpublish_page(page):
+    page.is_published = False
+    page.save(update_fields=['is_published', 'updated_at'])
+
+
+def schedule_republish(page_id):
+    """
+    Queue the page for ``rebuild_queued_pages`` once the current transaction
+    commits: the import worker rebuilds its document and re-renders it if published.
+
+    Several element changes inside one transaction (e.g. an admin save with inlines)
+    queue the page once.
+    """
+    def queue():
+        if Page.objects.filter(pk=page_id).exists():  # Not deleted by the transaction
+            PageRebuild.queue(page_id)
+
+    on_commit_once(('republish', page_id), queue, robust=True)
+
+
+def rebuild_queued_pages(limit=100):
+    """
+    Rebuild the documents of up to ``limit`` pages queued by ``schedule_republish``,
+    oldest first, and rewrite the files of those that are published; returns how
+    many were rebuilt.
+
+    A page is taken off the queue before its elements are read, so changes that
+    commit during the rebuild queue it again. Of several workers only the one
+    removing the entry rebuilds the page.
+    """
+    count = 0
+    for page_id in PageRebuild.objects.order_by('queued_at').values_list('page_id', flat=True)[:limit]:
+        if not PageRebuild.objects.filter(page_id=page_id).delete()[0]:
+            continue
+        page = Page.objects.filter(pk=page_id).first()
+        if page is not None:
+            build_page_document(page)
+            if page.is_published:
+                write_published_page(page)
+            count += 1
+    return count
@@ -0,0 +1,43 @@
+"""
+Deleting an element together with its descendants.
+
+MPTT's ``delete()`` collects the subtree, deletes it through the ORM's cascade
+and then shifts ``lft``/``rght`` of the rest of the tree. Here the subtree is
+the ``lft``..``rght`` range of its tree: it is removed with one DELETE and the
+gap closed with one UPDATE, whatever the size of the subtree. Images uploaded
+for the deleted elements are queued for ``delete_queued_media`` instead of being
+removed from the storage in the request; imported images are shared assets,
+deleted by ``prune_assets`` once no page refers to them.
+"""
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, When
+
+from landing.models import MediaCleanup, Page, PageElement, delete_element_rows
+from landing.services.publisher import schedule_republish
+
+
+def delete_subtree(element):
+    """Delete ``element`` and its descendants; returns how many elements were deleted."""
+    with transaction.atomic():
+        # Tree changes of a page are serialized on its row (see apply_batch); the bounds are read after the lock
+        Page.objects.select_for_update().filter(pk=element.page_id).first()
+        node = PageElement.objects.filter(pk=element.pk).values('tree_id', 'lft', 'rght').first()
+        if node is None:
+            return 0
+        tree_id, left, right = node['tree_id'], node['lft'], node['rght']
+        width = right - left + 1
+        rows = list(PageElement.objects.filter(tree_id=tree_id, lft__gte=left, lft__lte=right)
+                    .values_list('pk', 'image'))
+
+        MediaCleanup.queue(image for _, image in rows)
+        deleted = delete_element_rows(pk for pk, _ in rows)
+        # Ancestors only end later; everything after the subtree moves left by its width
+        PageElement.objects.filter(tree_id=tree_id, rght__gt=right).update(
+            lft=Case(When(lft__gt=right, then=F('lft') - width), default=F('lft'),
+                     output_field=PositiveIntegerField()),
+            rght=F('rght') - width,
+        )
+
+        Page.mark_changed(element.page_id)
+        schedule_republish(element.page_id)
+    return deleted
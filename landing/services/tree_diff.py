@@ -0,0 +1,231 @@
+"""
+Incremental re-import: apply a freshly parsed element tree to the stored one.
+
+New elements are matched to stored elements in three passes:
+
+1. unchanged subtrees (same structure and content), anywhere in the page;
+2. under matched parents, children with the same type, content and attributes;
+3. under matched parents, remaining children of the same type, in order.
+
+Matched rows keep their id and are only written when their content or tree
+position changed (a new parent or position also changes their ``version``);
+unmatched new elements are inserted, unmatched stored ones deleted and their
+uploaded images queued for ``delete_queued_media``. The MPTT fields of the whole page are recomputed like in
+``insert_element_tree``, so no per-row MPTT shifting happens either.
+"""
+import hashlib
+import json
+from collections import defaultdict, deque
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.utils import timezone
+
+from landing.models import MediaCleanup, Page, PageElement, delete_element_rows, next_tree_id, number_element_tree
+from landing.services.publisher import schedule_republish
+
+CONTENT_FIELDS = ('type', 'content', 'props', 'html_attrs', 'css_classes', 'image',
+                  'image_width', 'image_height', 'image_variants')
+TREE_FIELDS = ('parent', 'order', 'tree_id', 'lft', 'rght', 'level')
+
+
+@dataclass
+class TreeDiffStats:
+    """Rows written by an incremental re-import."""
+    inserted: int = 0
+    updated: int = 0  # Content changed (possibly moved too)
+    moved: int = 0  # Different parent or position among siblings
+    shifted: int = 0  # Only the MPTT numbering changed
+    deleted: int = 0
+    unchanged: int = 0
+
+    @property
+    def rows_touched(self):
+        return self.inserted + self.updated + self.moved + self.shifted + self.deleted
+
+    def __str__(self):
+        return (f"{self.rows_touched} rows touched: {self.inserted} inserted, {self.updated} updated, "
+                f"{self.moved} moved, {self.shifted} renumbered, {self.deleted} deleted, "
+                f"{self.unchanged} unchanged")
+
+
+def walk(roots):
+    """Elements of the trees in document order."""
+    stack = list(reversed(roots))
+    while stack:
+        element = stack.pop()
+        yield element
+        stack.extend(reversed(element._cached_children))
+
+
+def field_value(element, field):
+    value = getattr(element, field)
+    if field == 'image':  # Unsaved elements have None, loaded ones '' for no image
+        return value.name or ''
+    return value
+
+
+def content_signature(element):
+    return json.dumps([
+        element.type, element.content or '', element.props, element.html_attrs,
+        element.css_classes or '', element.image.name or '',
+        element.image_width, element.image_height, element.image_variants,
+    ], sort_keys=True, default=str)
+
+
+def subtree_hashes(roots, signatures):
+    """``{id(element): hash of its content and all of its descendants}``."""
+    hashes = {}
+    for element in reversed(list(walk(roots))):  # Children before parents
+        children = ','.join(hashes[id(child)] for child in element._cached_children)
+        hashes[id(element)] = hashlib.md5(f"{signatures[id(element)]}[{children}]".encode()).hexdigest()
+    return hashes
+
+
+def match_trees(old_roots, new_roots):
+    """Map ``id(new element)`` to the stored element it replaces."""
+    signatures = {id(element): content_signature(element) for element in walk(old_roots + new_roots)}
+    old_hashes = subtree_hashes(old_roots, signatures)
+    new_hashes = subtree_hashes(new_roots, signatures)
+    matches = {}
+    claimed = set()  # ids of matched stored elements
+
+    def claim_subtree(new, old):
+        matches[id(new)] = old
+        claimed.add(id(old))
+        for new_child, old_child in zip(new._cached_children, old._cached_children):
+            claim_subtree(new_child, old_child)
+
+    # 1. Unchanged subtrees, the largest first, wherever they are in the stored tree
+    by_hash = defaultdict(list)
+    for old in walk(old_roots):
+        by_hash[old_hashes[id(old)]].append(old)
+    stack = list(reversed(new_roots))
+    while stack:
+        new = stack.pop()
+        for old in by_hash.get(new_hashes[id(new)], ()):
+            if not any(id(element) in claimed for element in walk([old])):
+                claim_subtree(new, old)
+                break
+        else:
+            stack.extend(reversed(new._cached_children))
+
+    # 2. and 3. Children of matched parents (or roots), by content, then by type in order
+    def take(candidates):
+        while candidates:
+            old = candidates.popleft()
+            if id(old) not in claimed:
+                return old
+        return None
+
+    def match_children(new_children, old_children):
+        by_signature = defaultdict(deque)
+        by_type = defaultdict(deque)
+        for old in old_children:
+            if id(old) not in claimed:
+                by_signature[signatures[id(old)]].append(old)
+                by_type[old.type, old.get_tag()].append(old)
+        for candidates_of in (lambda new: by_signature[signatures[id(new)]],
+                              lambda new: by_type[new.type, new.get_tag()]):
+            for new in new_children:
+                if id(new) not in matches:
+                    old = take(candidates_of(new))
+                    if old is not None:
+                        matches[id(new)] = old
+                        claimed.add(id(old))
+        for new in new_children:
+            old = matches.get(id(new))
+            if old is not None:  # Children of inserted elements are inserted too
+                match_children(new._cached_children, old._cached_children)
+
+    match_children(new_roots, old_roots)
+    return matches
+
+
+def apply_tree(page, new_roots):
+    """
+    Bring the stored element tree of ``page`` in line with ``new_roots``.
+
+    ``new_roots`` are unsaved elements linked through ``_cached_children`` (see
+    ``ElementTreeBuilder.build_elements``). Returns a ``TreeDiffStats``.
+    """
+    stats = TreeDiffStats()
+    with transaction.atomic():
+        old_roots = page.get_element_tree()
+        old_elements = list(walk(old_roots))
+        old_parents = {element.pk: element.parent_id for element in old_elements}
+        old_values = {element.pk: {field: field_value(element, field) for field in CONTENT_FIELDS + TREE_FIELDS[1:]}
+                      for element in old_elements}
+        matches = match_trees(old_roots, new_roots)
+
+        # Keep the page's tree ids where possible; more roots get new ids after all existing trees
+        tree_ids = sorted({element.tree_id for element in old_roots})
+        if len(new_roots) > len(tree_ids):
+            first_new = next_tree_id()
+            tree_ids += range(first_new, first_new + len(new_roots) - len(tree_ids))
+        levels = number_element_tree(new_roots, tree_ids)
+
+        def row(element):
+            return matches.get(id(element), element)
+
+        inserts = [[element for element in level if id(element) not in matches] for level in levels]
+        content_updates, tree_updates = [], []
+        now = timezone.now()
+        for level in levels:
+            for element in level:
+                old = matches.get(id(element))
+                if old is None:
+                    element.parent = row(element.parent) if element.parent else None
+                    continue
+                for field in TREE_FIELDS[1:]:
+                    setattr(old, field, getattr(element, field))
+                old.parent = row(element.parent) if element.parent else None
+                for field in CONTENT_FIELDS:
+                    setattr(old, field, getattr(element, field))
+                before = old_values[old.pk]
+                content_changed = any(before[field] != field_value(old, field) for field in CONTENT_FIELDS)
+                moved = old_parents[old.pk] != (old.parent.pk if old.parent else None) or \
+                    before['order'] != old.order
+                if content_changed:
+                    old.updated_at = now
+                    old.version += 1
+                    content_updates.append(old)
+                    stats.updated += 1
+                elif moved or any(before[field] != field_value(old, field) for field in TREE_FIELDS[1:]):
+                    tree_updates.append(old)
+                    if moved:
+                        old.updated_at = now
+                        old.version += 1
+                        stats.moved += 1
+                    else:
+                        stats.shifted += 1
+                else:
+                    stats.unchanged += 1
+
+        # New rows first (top down, so parents have ids), then updates, then deletes
+        for elements in inserts:
+            for element in elements:
+                element.page = page
+                if element.parent is not None:
+                    element.parent_id = element.parent.pk
+            PageElement.objects.bulk_create(elements)
+            stats.inserted += len(elements)
+        for element in content_updates + tree_updates:
+            element.parent_id = element.parent.pk if element.parent else None
+        if content_updates:
+            PageElement.objects.bulk_update(content_updates, CONTENT_FIELDS + TREE_FIELDS + ('updated_at', 'version'))
+        if tree_updates:
+            PageElement.objects.bulk_update(tree_updates, TREE_FIELDS + ('updated_at', 'version'))
+
+        matched = {id(old) for old in matches.values()}
+        deleted = [element for element in old_elements if id(element) not in matched]
+        if deleted:
+            # One DELETE without the per-row MPTT gap closing and signals; the tree is renumbered above
+            delete_element_rows(element.pk for element in deleted)
+            MediaCleanup.queue(element.image.name for element in deleted)
+            stats.deleted = len(deleted)
+
+        if stats.rows_touched:
+            Page.mark_changed(page.pk)
+            schedule_republish(page.pk)
+    return stats
@@ -0,0 +1,46 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from landing.models import Page, PageElement
+from landing.services.publisher import remove_published_page, schedule_republish
+from landing.timing import execute_wrapper
+
+
+@receiver(post_save, sender=PageElement)
+@receiver(post_delete, sender=PageElement)
+def page_element_changed(sender, instance, **kwargs):
+    """Any element change (content, tree position, image) invalidates the page caches."""
+    Page.mark_changed(instance.page_id)
+    schedule_republish(instance.page_id)
+
+
+@receiver(pre_save, sender=Page)
+def page_slug_changed(sender, instance, **kwargs):
+    """Drop files published under the old URL when a page's slug changes."""
+    if instance.pk is None:
+        return
+    old_slug = Page.objects.filter(pk=instance.pk).values_list('slug', flat=True).first()
+    if old_slug and old_slug != instance.slug:
+        remove_published_page(old_slug)
+
+
+@receiver(post_save, sender=Page)
+def page_saved(sender, instance, **kwargs):
+    if instance.is_published:
+        schedule_republish(instance.pk)
+    else:
+        remove_published_page(instance.slug)
+
+
+@receiver(post_delete, sender=Page)
+def page_deleted(sender, instance, **kwargs):
+    remove_published_page(instance.slug)
+
+
+@receiver(connection_created)
+def time_queries(sender, connection, **kwargs):
+    """Count every connection's queries in the Server-Timing of the request that runs them."""
+    # The wrapper list outlives reconnects (a new connection per request with CONN_MAX_AGE=0)
+    if execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_wrapper)
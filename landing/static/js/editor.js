@@ -1,3 +1,11 @@
+// Changes are queued here and sent together to the page's batch endpoint (see saveChanges)
+const editorScript = document.currentScript;
+const pendingOperations = [];
+// Local copy of the page's elements by id, loaded once from the tree endpoint (see loadPageTree)
+const pageTree = new Map();
+// 'loading', 'ready' or 'failed'; controls that need the tree wait for it (see elementData)
+let pageTreeStatus = 'loading';
+
 document.addEventListener('DOMContentLoaded', function() {
     const urlParams = new URLSearchParams(window.location.search);
     const editMode = urlParams.get('edit') === '1';
@@ -5,6 +13,7 @@ document.addEventListener('DOMContentLoaded', function() {
     if (!editMode) return;
 
     console.log('🛠️ Editor ACTIVATED!');
+    loadPageTree();
 
     document.querySelectorAll('.editor-element').forEach((el, index) => {
         const elementId = el.dataset.elementId;
@@ -29,7 +38,13 @@ document.addEventListener('DOMContentLoaded', function() {
             </div>
             `;
         }
-        controls.innerHTML += `<div class="editor-control editor-config" title="Configure" data-action="config" data-id="${elementId}">
+        controls.innerHTML += `<div class="editor-control editor-move" title="Move up" data-action="up" data-id="${elementId}">
+                ⬆️
+            </div>
+            <div class="editor-control editor-move" title="Move down" data-action="down" data-id="${elementId}">
+                ⬇️
+            </div>
+            <div class="editor-control editor-config" title="Configure" data-action="config" data-id="${elementId}">
                 ⚙️
             </div>
             <div class="editor-control editor-delete" title="Delete" data-action="delete" data-id="${elementId}">
@@ -50,30 +65,176 @@ document.addEventListener('DOMContentLoaded', function() {
                 case 'edit':
                     editContent(id, el);
                     break;
+                case 'up':
+                    moveElement(id, el, -1);
+                    break;
+                case 'down':
+                    moveElement(id, el, 1);
+                    break;
                 case 'config':
-                    openConfig(id);
+                    openConfig(id, el);
                     break;
                 case 'delete':
-                    deleteElement(id);
+                    deleteElement(id, el);
                     break;
             }
         });
     });
+
+    window.addEventListener('beforeunload', (e) => {
+        if (pendingOperations.length) {
+            e.preventDefault();
+            e.returnValue = '';
+        }
+    });
 });
 
-// 📝 Edit content
-function editContent(elementId, element) {
-    fetch(`/landing/api/element/${elementId}/has-content/`)
-        .then(res => res.json())
-        .then(data => {
-            if (data.has_content) {
-                showInlineEdit(elementId, element, data.content);
-            } else {
-                alert('No editable content found');
+// 📦 Queued changes
+function queueOperation(operation, element) {
+    pendingOperations.push(operation);
+    element.classList.add('editor-pending');
+    showSaveBar();
+}
+
+function showSaveBar() {
+    let bar = document.querySelector('.editor-save-bar');
+    if (!bar) {
+        bar = document.createElement('div');
+        bar.className = 'editor-save-bar';
+        bar.innerHTML = `
+            <span class="editor-save-count"></span>
+            <button type="button" class="editor-save" onclick="saveChanges(this)">💾 Save</button>
+            <button type="button" class="editor-discard" onclick="discardChanges()">↩️ Discard</button>
+        `;
+        document.body.appendChild(bar);
+    }
+    const count = pendingOperations.length;
+    bar.querySelector('.editor-save-count').textContent = `${count} unsaved change${count === 1 ? '' : 's'}`;
+}
+
+window.saveChanges = function(btn) {
+    btn.disabled = true;
+    fetch(editorScript.dataset.batchUrl, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value
+        },
+        body: JSON.stringify({ operations: pendingOperations })
+    })
+    .then(res => res.json().then(data => ({ data, conflict: res.status === 409 })))
+    .then(({ data, conflict }) => {
+        if (data.success) {
+            pendingOperations.length = 0;
+            location.reload();
+        } else if (conflict) {
+            btn.disabled = false;
+            alert(`Nothing was saved: ${data.error}. Discard your changes to load the current page.`);
+        } else {
+            btn.disabled = false;
+            alert(`Nothing was saved: ${data.error}`);
+        }
+    })
+    .catch(() => {
+        btn.disabled = false;
+        alert('Nothing was saved: the server could not be reached');
+    });
+};
+
+window.discardChanges = function() {
+    if (confirm('Discard all unsaved changes?')) {
+        pendingOperations.length = 0;
+        location.reload();
+    }
+};
+
+// 🌳 Local copy of the page tree
+// Kept in sessionStorage between reloads; afterwards only elements changed since its version are fetched
+function loadPageTree() {
+    const treeUrl = editorScript.dataset.treeUrl;
+    const storageKey = `landing-tree:${treeUrl}`;
+    const stored = JSON.parse(sessionStorage.getItem(storageKey) || 'null');
+    const options = stored && stored.etag ? { headers: { 'If-None-Match': stored.etag } } : {};
+
+    return fetch(stored ? `${treeUrl}?since=${stored.version}` : treeUrl, options)
+        .then(res => {
+            if (res.status === 304) return null;
+            if (!res.ok) throw new Error(`HTTP ${res.status}`);
+            return res.json().then(data => ({ data, etag: res.headers.get('ETag') }));
+        })
+        .then(result => {
+            const elements = stored && stored.elements ? stored.elements : [];
+            const tree = result ? mergeTree(elements, result.data) : elements;
+            pageTree.clear();
+            tree.forEach(element => pageTree.set(element.id, element));
+            if (result) {
+                sessionStorage.setItem(storageKey, JSON.stringify({
+                    version: result.data.version, etag: result.etag, elements: tree
+                }));
             }
+            pageTreeStatus = 'ready';
+        })
+        .catch(err => {
+            pageTreeStatus = 'failed';
+            console.error('Failed to load the page tree', err);
         });
 }
 
+// The element's entry in the page tree, or null after telling the user why it cannot be edited yet
+function elementData(elementId) {
+    const data = pageTree.get(Number(elementId));
+    if (data) return data;
+    if (pageTreeStatus === 'loading') {
+        alert('The page elements are still loading, try again in a moment');
+    } else if (pageTreeStatus === 'failed') {
+        alert('The page elements could not be loaded, reload the page to edit it');
+    } else {
+        alert(`Element #${elementId} is no longer on this page, reload the page to edit it`);
+    }
+    return null;
+}
+
+// Elements of a tree response as objects; a delta response is applied to ``elements``
+function mergeTree(elements, data) {
+    const rows = data.elements.map(row => Object.fromEntries(data.fields.map((field, i) => [field, row[i]])));
+    if (!data.structure) return rows;
+
+    const byId = new Map(elements.map(element => [element.id, element]));
+    rows.forEach(element => byId.set(element.id, element));
+    // Every element still on the page, in tree order; moves change parent and order, deletions drop out
+    return data.structure
+        .filter(([id]) => byId.has(id))
+        .map(([id, parent, order]) => Object.assign(byId.get(id), { parent, order }));
+}
+
+function escapeHtml(value) {
+    const div = document.createElement('div');
+    div.textContent = value == null ? '' : String(value);
+    return div.innerHTML.replace(/"/g, '&quot;');
+}
+
+// Editor wrappers of the element's parent and siblings, as rendered
+function editorParent(element) {
+    return element.parentElement.closest('.editor-element');
+}
+
+function editorSiblings(element) {
+    const parent = editorParent(element);
+    return Array.from((parent || document).querySelectorAll('.editor-element'))
+        .filter(el => editorParent(el) === parent && !el.classList.contains('editor-deleted'));
+}
+
+// 📝 Edit content
+function editContent(elementId, element) {
+    const data = elementData(elementId);
+    if (!data) return;
+    if (data.content) {
+        showInlineEdit(elementId, element, data.content);
+    } else {
+        alert('No editable content found');
+    }
+}
+
 function showInlineEdit(elementId, element, content) {
     const inputContainer = document.createElement('div');
     inputContainer.className = 'editor-inline-edit';
@@ -84,7 +245,7 @@ function showInlineEdit(elementId, element, content) {
     `;
 
     inputContainer.innerHTML = `
-        <textarea class="editor-inline-input" placeholder="Edit content..." style="flex: 1; resize: vertical; min-height: 60px;">${content}</textarea>
+        <textarea class="editor-inline-input" placeholder="Edit content..." style="flex: 1; resize: vertical; min-height: 60px;"></textarea>
         <div class="editor-inline-buttons" style="margin-top: 12px; display: flex; gap: 8px; justify-content: flex-end;">
             <button onclick="saveInlineEdit(${elementId}, this)" style="padding: 8px 16px; background: #10b981; color: white; border: none; border-radius: 4px; cursor: pointer;">✅ Save</button>
             <button onclick="cancelInlineEdit(this)" style="padding: 8px 16px; background: #6b7280; color: white; border: none; border-radius: 4px; cursor: pointer;">❌ Cancel</button>
@@ -92,43 +253,76 @@ function showInlineEdit(elementId, element, content) {
     `;
 
     element.appendChild(inputContainer);
-    inputContainer.querySelector('.editor-inline-input').focus();
+    const input = inputContainer.querySelector('.editor-inline-input');
+    input.value = content;
+    input.focus();
 }
 
 window.saveInlineEdit = function(elementId, btn) {
+    const data = elementData(elementId);
+    if (!data) return;  // The edit stays open
     const inputContainer = btn.closest('.editor-inline-edit');
     const newContent = inputContainer.querySelector('.editor-inline-input').value;
+    const element = inputContainer.closest('.editor-element');
+    inputContainer.remove();
 
-    fetch(`/landing/api/element/${elementId}/update-content/`, {
-        method: 'POST',
-        headers: {
-            'Content-Type': 'application/json',
-            'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value
-        },
-        body: JSON.stringify({ content: newContent })
-    })
-    .then(res => res.json())
-    .then(data => {
-        if (data.success) {
-            location.reload();
-        }
-    });
+    // Preview in place; the page is rendered again once the changes are saved
+    const rendered = element.querySelector(':scope > :not(.editor-border):not(.editor-controls)');
+    if (rendered) {
+        rendered.innerHTML = newContent;
+    }
+    queueOperation({ op: 'content', id: data.id, content: newContent, version: data.version }, element);
+    data.content = newContent;
 };
 
 window.cancelInlineEdit = function(btn) {
     btn.closest('.editor-inline-edit').remove();
 };
 
+// ↕️ Move among siblings
+function moveElement(elementId, element, delta) {
+    const data = elementData(elementId);
+    if (!data) return;
+    const siblings = editorSiblings(element);
+    const position = siblings.indexOf(element) + delta;
+    if (position < 0 || position >= siblings.length) return;
+
+    if (delta < 0) {
+        siblings[position].before(element);
+    } else {
+        siblings[position].after(element);
+    }
+    const parent = editorParent(element);
+    queueOperation({
+        op: 'move',
+        id: data.id,
+        parent: parent ? Number(parent.dataset.elementId) : null,
+        position: position,
+        version: data.version
+    }, element);
+}
+
 // ⚙️ Configure modal
-function openConfig(elementId) {
-    fetch(`/landing/api/element/${elementId}/config/`)
-        .then(res => res.json())
-        .then(data => {
-            showConfigModal(data);
-        });
+function openConfig(elementId, element) {
+    const data = elementData(elementId);
+    if (!data) return;
+    showConfigModal({ id: data.id, form_html: configFormHtml(data) }, element);
 }
 
-function showConfigModal(data) {
+function configFormHtml(data) {
+    return `
+        <input type="hidden" name="element_id" value="${data.id}">
+        <div>
+            <label>Type: <strong>${escapeHtml(data.type)}</strong></label>
+        </div>
+        <div>
+            <label>CSS Classes:</label>
+            <input type="text" name="css_classes" value="${escapeHtml(data.css_classes)}" class="form-control">
+        </div>
+    `;
+}
+
+function showConfigModal(data, element) {
     document.body.insertAdjacentHTML('beforeend', `
         <div class="editor-modal" onclick="this.remove()">
             <div class="editor-modal-content" onclick="event.stopPropagation()">
@@ -147,21 +341,22 @@ function showConfigModal(data) {
         </div>
     `);
 
-    document.getElementById(`config-form-${data.id}`).addEventListener('submit', (e) => {
+    const form = document.getElementById(`config-form-${data.id}`);
+    form.addEventListener('submit', (e) => {
         e.preventDefault();
-        // Пока заглушка
-        console.log('💾 Config save:', new FormData(e.target));
+        const cssClasses = new FormData(e.target).get('css_classes') || '';
+        const stored = pageTree.get(data.id);
+        queueOperation({ op: 'config', id: data.id, css_classes: cssClasses, version: stored.version }, element);
+        stored.css_classes = cssClasses;
         e.target.closest('.editor-modal').remove();
     });
 }
 
 // 🗑️ Delete
-function deleteElement(elementId) {
-    if (confirm('🗑️ Delete this element? This cannot be undone.')) {
-        fetch(`/landing/api/element/${elementId}/delete/`, {
-            method: 'POST',
-            headers: {'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value}
-        })
-        .then(() => location.reload());
+function deleteElement(elementId, element) {
+    const data = elementData(elementId);
+    if (data && confirm('🗑️ Delete this element? It is removed when you save your changes.')) {
+        element.classList.add('editor-deleted');
+        queueOperation({ op: 'delete', id: data.id, version: data.version }, element);
     }
 }
\ No newline at end of file
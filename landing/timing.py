@@ -0,0 +1,125 @@
+"""
+Per-request timing of SQL and element rendering, reported by ``landing.middleware``.
+
+The middleware puts a ``RequestTimings`` into a context variable for the duration
+of the request; the hooks below add to it and do nothing outside of a request
+(management commands, publishing, tests without the middleware). Context
+variables are copied into ``sync_to_async`` threads, so queries and renders of
+the async views are counted too.
+"""
+from contextvars import ContextVar
+from time import perf_counter
+
+_current = ContextVar('landing_request_timings', default=None)
+
+
+class RequestTimings:
+    """SQL, render and element counters of one request. Durations are in seconds."""
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.spans = {}  # name -> seconds
+        self.element_types = {}  # element type -> [count, seconds of its own markup]
+        self.fragments = None  # FragmentStats of the page rendered by the request
+
+    def add(self, name, seconds):
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def add_element(self, element_type, seconds):
+        counter = self.element_types.get(element_type)
+        if counter is None:
+            self.element_types[element_type] = [1, seconds]
+        else:
+            counter[0] += 1
+            counter[1] += seconds
+
+    @property
+    def elements(self):
+        return sum(count for count, _ in self.element_types.values())
+
+    def total(self):
+        return perf_counter() - self.started
+
+    def server_timing(self):
+        """``Server-Timing`` header value, durations in milliseconds."""
+        metrics = [f'sql;dur={self.sql_time * 1000:.2f};desc="{self.sql_count} queries"']
+        if 'render' in self.spans:
+            metrics.append(f'render;dur={self.spans["render"] * 1000:.2f};desc="{self.elements} elements"')
+        for name, seconds in self.spans.items():
+            if name != 'render':
+                metrics.append(f'{name};dur={seconds * 1000:.2f}')
+        for element_type, (count, seconds) in sorted(self.element_types.items()):
+            metrics.append(f'el-{element_type};dur={seconds * 1000:.2f};desc="{count}"')
+        if self.fragments is not None:
+            metrics.append(f'fragment-hit;desc="{self.fragments.hits}"')
+            metrics.append(f'fragment-miss;desc="{self.fragments.misses}"')
+        metrics.append(f'total;dur={self.total() * 1000:.2f}')
+        return ', '.join(metrics)
+
+    def as_dict(self):
+        return {
+            'total_ms': round(self.total() * 1000, 2),
+            'sql_count': self.sql_count,
+            'sql_ms': round(self.sql_time * 1000, 2),
+            'elements': self.elements,
+            **({'fragment_hits': self.fragments.hits, 'fragment_misses': self.fragments.misses}
+               if self.fragments is not None else {}),
+            **{f'{name}_ms': round(seconds * 1000, 2) for name, seconds in self.spans.items()},
+            'element_types': {
+                element_type: {'count': count, 'ms': round(seconds * 1000, 2)}
+                for element_type, (count, seconds) in sorted(self.element_types.items())
+            },
+        }
+
+
+def start_request():
+    """Start timing the current request; returns the timings and the token to pass to ``end_request``."""
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def current_timings():
+    return _current.get()
+
+
+def resume(timings):
+    """Make ``timings`` current again, e.g. while a streamed response body is rendered."""
+    return _current.set(timings)
+
+
+def record_fragments(stats):
+    """Report the fragment cache ``stats`` (a ``FragmentStats``) of the page the current request renders."""
+    timings = _current.get()
+    if timings is not None:
+        timings.fragments = stats
+
+
+def timed_call(name, func, *args):
+    """Call ``func(*args)`` and add its duration to the span ``name`` of the current request."""
+    timings = _current.get()
+    if timings is None:
+        return func(*args)
+    started = perf_counter()
+    try:
+        return func(*args)
+    finally:
+        timings.add(name, perf_counter() - started)
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    """Database execute wrapper counting the queries of the current request (see ``signals``)."""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.sql_count += 1
+        timings.sql_time += perf_counter() - started
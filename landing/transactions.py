@@ -0,0 +1,33 @@
+"""
+``on_commit_once``: run a commit hook once per transaction for each key.
+
+Element signals fire per row, so deleting a page's elements or saving an admin
+form with inlines would otherwise touch and republish the page once per row.
+The pending keys are tracked per connection (connections are per thread) and
+only weakly reference their callbacks: a rollback drops Django's reference to
+the callback, which frees the key for the next transaction.
+"""
+import weakref
+
+from django.db import transaction
+
+_pending = weakref.WeakKeyDictionary()  # connection -> {key: weakref to the pending callback}
+
+
+def on_commit_once(key, func, using=None, robust=False):
+    """
+    ``transaction.on_commit(func)`` unless a callback for ``key`` is already
+    pending on the connection. Outside an atomic block ``func`` runs right away.
+    """
+    connection = transaction.get_connection(using)
+    pending = _pending.setdefault(connection, {})
+    ref = pending.get(key)
+    if ref is not None and ref() is not None:
+        return
+
+    def callback():
+        pending.pop(key, None)
+        func()
+
+    pending[key] = weakref.ref(callback)
+    transaction.on_commit(callback, using=using, robust=robust)
@@ -1,15 +1,23 @@
+from django.conf import settings
 from django.urls import path
 
-from landing import views, api_views
+from landing import views, api_views, async_views
+
+if settings.LANDING_ASYNC_VIEWS:
+    page_views = element_api = async_views
+else:
+    page_views, element_api = views, api_views
 
 urlpatterns = [
-    path('page/<slug:slug>/', views.page_view, name='page'),
-    path('page/<slug:slug>/signup/', views.signup_form, name='signup_form'),
-
-    path('api/element/<int:element_id>/has-content/', api_views.element_has_content, name='element_has_content'),
-    path('api/element/<int:element_id>/update-content/', api_views.update_element_content, name='update_element_content'),
-    path('api/element/<int:element_id>/config/', api_views.element_config, name='element_config'),
-    path('api/element/<int:element_id>/update-config/', api_views.update_element_config, name='update_element_config'),
-    path('api/element/<int:element_id>/delete/', api_views.delete_element, name='delete_element'),
+    path('page/<slug:slug>/', page_views.page_view, name='page'),
+    path('page/<slug:slug>/signup/', page_views.signup_form, name='signup_form'),
+
+    path('api/element/<int:element_id>/has-content/', element_api.element_has_content, name='element_has_content'),
+    path('api/element/<int:element_id>/update-content/', element_api.update_element_content, name='update_element_content'),
+    path('api/element/<int:element_id>/config/', element_api.element_config, name='element_config'),
+    path('api/element/<int:element_id>/update-config/', element_api.update_element_config, name='update_element_config'),
+    path('api/element/<int:element_id>/delete/', element_api.delete_element, name='delete_element'),
+    path('api/page/<slug:slug>/batch/', element_api.apply_element_batch, name='apply_element_batch'),
+    path('api/page/<slug:slug>/tree/', element_api.page_tree, name='page_tree'),
 
 ]
\ No newline at end of file
@@ -1,6 +1,15 @@
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
-from django_landing import settings
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.conf import settings
+from .cache import (acache_page_stream, cache_page_stream, get_cached_page, page_element_stats, page_validators,
+                    set_cached_page)
 from .models import Page, PageElement
+from .rendering import astream_page, page_context, stream_page
+from .services.page_document import page_element_tree
+from .timing import record_fragments
 from django.core.mail import send_mail
 from django.contrib import messages
 
@@ -10,20 +19,55 @@ def main_page(request):
 
 
 def page_view(request, slug):
-    page = get_object_or_404(Page, slug=slug)
-    root_elements = PageElement.objects.filter(page=page, parent=None)  # Только корневые элементы
+    # The page and its elements' document in one query (see landing.services.page_document)
+    page = get_object_or_404(Page.objects.select_related('document'), slug=slug)
     can_edit_page = Page.can_edit(request)
     edit_mode = request.GET.get('edit') == '1' and can_edit_page
 
-    context = {
-        'page': page,
-        'root_elements': root_elements,
-        'can_edit': can_edit_page,
-        'edit_mode': edit_mode,
-        'element_data': {}  # Для хранения данных элементов при редактировании
-    }
+    element_stats = page_element_stats(page)
 
-    return render(request, page.template, context)
+    # Answer revalidations with 304 before doing any rendering work (not in edit mode)
+    etag = last_modified = None
+    if not edit_mode:
+        etag, last_modified = page_validators(page, element_stats)
+        response = get_conditional_response(request, etag=etag, last_modified=int(last_modified.timestamp()))
+        if response is not None:
+            return add_validators(response, etag, last_modified)
+
+    # Editors always get a fresh render, everyone else is served from the page cache
+    if not can_edit_page:
+        cached_html = get_cached_page(page)
+        if cached_html is not None:
+            return add_validators(HttpResponse(cached_html), etag, last_modified)
+
+    # Editors see the element rows, the source of truth; everyone else the page's document while it is current
+    root_elements = page.get_element_tree() if can_edit_page else page_element_tree(page, element_stats)
+    context = page_context(page, can_edit=can_edit_page, edit_mode=edit_mode, root_elements=root_elements)
+    record_fragments(context['fragment_stats'])
+
+    # Large pages are sent root element by root element instead of being built in memory,
+    # and cached like the others once the whole page went out
+    if element_stats['count'] >= settings.LANDING_STREAM_THRESHOLD:
+        is_async = isinstance(request, ASGIRequest)
+        chunks = (astream_page if is_async else stream_page)(page.template, context, request)
+        if not can_edit_page:
+            chunks = (acache_page_stream if is_async else cache_page_stream)(page, chunks)
+        response = StreamingHttpResponse(chunks)
+        return add_validators(response, etag, last_modified)
+
+    response = render(request, page.template, context)
+    if not can_edit_page:
+        set_cached_page(page, response.content)
+    return add_validators(response, etag, last_modified)
+
+
+def add_validators(response, etag, last_modified):
+    """Set ETag/Last-Modified and make clients revalidate instead of guessing freshness."""
+    if etag is not None:
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+        patch_cache_control(response, no_cache=True)
+    return response
 
 
 def signup_form(request, slug):
@@ -13,4 +13,11 @@ def user(django_user_model, faker: Faker, password):
         last_name=faker.last_name(),
         middle_name=faker.first_name(),
         group=None,
-    )
\ No newline at end of file
+    )
+
+@fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+    cache.clear()
+    yield
+    cache.clear()
@@ -0,0 +1,13 @@
+from landing.models import Page, PageElement
+
+
+def make_page(slug='test-page', sections=2, items=3):
+    page = Page.objects.create(title='Test page', slug=slug)
+    for s in range(sections):
+        section = PageElement.objects.create(page=page, type='section', css_classes='section', order=s)
+        PageElement.objects.create(page=page, type='header', content=f'Section {s}', props={'level': 2},
+                                   parent=section, order=0)
+        card = PageElement.objects.create(page=page, type='card', parent=section, order=1)
+        for i in range(items):
+            PageElement.objects.create(page=page, type='text', content=f'Item {s}.{i}', parent=card, order=i)
+    return page
@@ -0,0 +1,52 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.test import AsyncRequestFactory, RequestFactory
+
+from landing import api_views, async_views, views
+from tests.factories import make_page
+
+
+def anonymous(request):
+    request.user = AnonymousUser()
+
+    async def auser():
+        return request.user
+
+    request.auser = auser
+    return request
+
+
+@pytest.mark.django_db
+def test_async_page_view_matches_sync_view():
+    page = make_page(sections=3, items=2)
+    url = f'/landing/page/{page.slug}/'
+
+    sync_response = views.page_view(anonymous(RequestFactory().get(url)), slug=page.slug)
+    async_response = async_to_sync(async_views.page_view)(anonymous(AsyncRequestFactory().get(url)), slug=page.slug)
+
+    assert async_response.status_code == sync_response.status_code == 200
+    assert async_response.content == sync_response.content
+    assert async_response['ETag'] == sync_response['ETag']
+
+
+@pytest.mark.django_db
+def test_async_element_api(client):
+    page = make_page(sections=1, items=2)
+    element = page.elements.get(content='Item 0.0')
+    api = f'/landing/api/element/{element.id}'
+
+    assert client.get(f'{api}/has-content/').json() == {'has_content': True, 'content': 'Item 0.0'}
+    client.post(f'{api}/update-content/', json.dumps({'content': 'New'}), content_type='application/json')
+    client.post(f'{api}/update-config/', {'css_classes': 'highlight'})
+
+    element.refresh_from_db()
+    assert (element.content, element.css_classes) == ('New', 'highlight')
+    assert client.get(f'{api}/config/').json() == api_views.element_config_data(element)
+
+    assert client.post(f'{api}/delete/').json() == {'success': True}
+    assert not page.elements.filter(pk=element.pk).exists()
+    assert client.get(f'{api}/config/').status_code == 404
+    assert client.post(f'{api}/config/').status_code == 405
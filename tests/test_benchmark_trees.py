@@ -0,0 +1,37 @@
+import pytest
+
+from benchmarks.trees import SHAPES, TreeShape, create_page, generate_tree, tree_depth, tree_size
+
+
+@pytest.mark.parametrize('name', sorted(SHAPES))
+def test_generated_tree_matches_shape(name):
+    shape = SHAPES[name]
+    roots = generate_tree(shape)
+
+    assert tree_size(roots) == shape.size
+    assert tree_depth(roots) <= shape.depth
+    assert len(roots) == shape.roots
+    assert generate_tree(shape) == roots
+
+
+def test_type_mix_is_respected():
+    roots = generate_tree(TreeShape('images', size=200, depth=3, mix={'card': 1, 'image': 5}))
+    types = set()
+    stack = list(roots)
+    while stack:
+        fields, children = stack.pop()
+        types.add(fields['type'])
+        stack.extend(children)
+
+    assert types == {'section', 'card', 'image'}
+
+
+@pytest.mark.django_db
+def test_create_page_renders(client):
+    shape = SHAPES['small']
+    page = create_page(shape, slug='bench-small')
+
+    assert page.elements.count() == shape.size
+    response = client.get(f'/landing/page/{page.slug}/')
+    assert response.status_code == 200
+    assert b'Heading' in response.content
@@ -0,0 +1,54 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from landing.models import PageElement
+from tests.factories import make_page
+
+
+@pytest.mark.django_db
+def test_etag_revalidation_returns_304_without_rendering(client):
+    page = make_page()
+    url = f'/landing/page/{page.slug}/'
+    response = client.get(url)
+    etag, last_modified = response['ETag'], response['Last-Modified']
+    assert 'no-cache' in response['Cache-Control']
+
+    with CaptureQueriesContext(connection) as ctx:
+        not_modified = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert not_modified.status_code == 304
+    assert not_modified['ETag'] == etag
+    assert not_modified.content == b''
+    assert len(ctx.captured_queries) == 2  # Page lookup and the validator aggregate
+
+    assert client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code == 304
+
+
+@pytest.mark.django_db
+def test_element_change_changes_validators(client):
+    page = make_page()
+    url = f'/landing/page/{page.slug}/'
+    etag = client.get(url)['ETag']
+
+    # Even a change that bypasses the model signals produces a new ETag
+    PageElement.objects.filter(page=page, content='Item 0.0').update(content='Changed', updated_at=timezone.now())
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response['ETag'] != etag
+
+    element = page.elements.get(content='Item 0.1')
+    element.delete()
+    assert client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code == 200
+
+
+@pytest.mark.django_db
+def test_edit_mode_is_never_conditional(client, admin_user):
+    page = make_page()
+    url = f'/landing/page/{page.slug}/'
+    etag = client.get(url)['ETag']
+    client.force_login(admin_user)
+
+    response = client.get(url, {'edit': '1'}, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert 'ETag' not in response
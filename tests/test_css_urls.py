@@ -0,0 +1,60 @@
+import pytest
+
+from landing.services.css_urls import css_encoding, escape, find_urls, rewrite_urls
+
+CSS = r'''@import "a.css" screen;
+@import url(  'b.css' ) layer(base);
+/* url(commented.png) @import "c.css"; */
+@font-face { src: url(f.eot?#iefix) format("embedded-opentype"), url("f.woff2") format('woff2') }
+@media print { @supports (display: grid) { .a { background: url(a\(1\).png) no-repeat, URL( "b c.png" ) } } }
+.s::after { content: "url(string.png)" } .m { mask: myurl(no.png) } .e { background: url(\66 .png) }
+'''
+
+
+def test_find_urls():
+    assert [(ref.url, ref.kind, ref.quote) for ref in find_urls(CSS)] == [
+        ('a.css', 'import', '"'),
+        ('b.css', 'import', "'"),
+        ('f.eot?#iefix', 'url', ''),
+        ('f.woff2', 'url', '"'),
+        ('a(1).png', 'url', ''),
+        ('b c.png', 'url', '"'),
+        ('f.png', 'url', ''),
+    ]
+
+
+def test_rewrite_keeps_everything_else():
+    rewritten = rewrite_urls(CSS, lambda url, kind: f'/new/{url}' if kind == 'url' else None)
+
+    assert rewritten == (
+        CSS.replace('url(f.eot?#iefix)', 'url(/new/f.eot?#iefix)')
+        .replace('"f.woff2"', '"/new/f.woff2"')
+        .replace(r'url(a\(1\).png)', r'url(/new/a\28 1\29 .png)')
+        .replace('"b c.png"', '"/new/b c.png"')
+        .replace(r'url(\66 .png)', 'url(/new/f.png)')
+    )
+    assert rewrite_urls(CSS, lambda url, kind: None) == CSS
+    assert [ref.url for ref in find_urls(rewritten)][2:] == [
+        '/new/f.eot?#iefix', '/new/f.woff2', '/new/a(1).png', '/new/b c.png', '/new/f.png']
+
+
+@pytest.mark.parametrize('url, quote, written', [
+    ('a b(c).png', '', r'a\20 b\28 c\29 .png'),
+    ('say "hi".png', '"', r'say \"hi\".png'),
+    ('say "hi".png', "'", 'say "hi".png'),
+])
+def test_escape(url, quote, written):
+    assert escape(url, quote) == written
+    css = f'.a {{ background: url({quote}{written}{quote}) }}'
+    assert [ref.url for ref in find_urls(css)] == [url]
+
+
+@pytest.mark.parametrize('content, content_type, encoding', [
+    (b'\xef\xbb\xbf@charset "iso-8859-1"; .a {}', 'text/css; charset=latin1', 'utf-8-sig'),
+    (b'@charset "iso-8859-1"; .a {}', 'text/css; charset=utf-8', 'iso8859-1'),
+    (b'.a {}', 'text/css; charset="windows-1251"', 'cp1251'),
+    (b'.a {}', 'text/css', 'utf-8'),
+    (b'@charset "bogus"; .a {}', 'text/css', 'utf-8'),
+])
+def test_css_encoding(content, content_type, encoding):
+    assert css_encoding(content, content_type) == encoding
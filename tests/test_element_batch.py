@@ -0,0 +1,127 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from landing import api_views
+from landing.models import PageElement
+from landing.services.element_batch import BatchError, apply_batch
+from tests.factories import make_page
+from tests.test_tree_diff import assert_valid_tree
+
+
+def element(page, content):
+    return page.elements.get(content=content)
+
+
+def tree(page):
+    """(content or type, depth) of every element of the page in tree order."""
+    return [(e.content or e.type, e.level) for e in page.elements.order_by('tree_id', 'lft')]
+
+
+def post_batch(client, page, operations):
+    return client.post(f'/landing/api/page/{page.slug}/batch/', json.dumps({'operations': operations}),
+                       content_type='application/json')
+
+
+@pytest.mark.django_db
+def test_batch_applies_all_operations_with_bulk_writes(admin_client):
+    make_page(slug='other', sections=1, items=1)  # Trees of another page around the edited one
+    page = make_page(sections=2, items=3)
+    card0, card1 = page.elements.filter(type='card').order_by('tree_id')
+    operations = [
+        {'op': 'content', 'id': element(page, 'Item 0.0').pk, 'content': 'First'},
+        {'op': 'config', 'id': element(page, 'Item 0.1').pk, 'css_classes': 'highlight'},
+        {'op': 'move', 'id': element(page, 'Item 1.2').pk, 'parent': card0.pk, 'position': 0},
+        {'op': 'move', 'id': element(page, 'Item 0.0').pk, 'parent': card1.pk},
+        {'op': 'delete', 'id': element(page, 'Section 1').pk},
+        {'op': 'move', 'id': card1.pk, 'parent': None, 'position': 0},
+    ]
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = post_batch(admin_client, page, operations)
+
+    assert response.status_code == 200
+    assert response.json() == {'success': True, 'updated': 2, 'moved': 2, 'shifted': 7, 'deleted': 1}
+    writes = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith(('UPDATE', 'DELETE', 'INSERT'))]
+    assert len([sql for sql in writes if 'landing_pageelement' in sql]) == 3  # Two bulk updates, one delete
+    assert tree(page) == [
+        ('card', 0), ('Item 1.0', 1), ('Item 1.1', 1), ('First', 1),
+        ('section', 0), ('Section 0', 1), ('card', 1), ('Item 1.2', 2), ('Item 0.1', 2), ('Item 0.2', 2),
+        ('section', 0),
+    ]
+    assert element(page, 'Item 0.1').css_classes == 'highlight'
+    assert_valid_tree(page)
+
+
+@pytest.mark.django_db
+def test_invalid_operation_rejects_the_whole_batch(admin_client):
+    page = make_page(sections=1, items=2)
+    other = make_page(slug='other', sections=1, items=1)
+    card = page.elements.get(type='card')
+    before = tree(page)
+
+    for operation, message in [
+        ({'op': 'content', 'id': element(other, 'Item 0.0').pk, 'content': 'x'}, 'no element'),
+        ({'op': 'move', 'id': card.pk, 'parent': element(page, 'Item 0.0').pk}, 'into itself'),
+        ({'op': 'move', 'id': card.pk, 'parent': None, 'position': 5}, 'position must be between 0 and 1'),
+        ({'op': 'config', 'id': card.pk, 'css_classes': 'x' * 256}, 'css_classes'),
+        ({'op': 'rename', 'id': card.pk}, 'op must be one of'),
+    ]:
+        response = post_batch(admin_client, page, [{'op': 'content', 'id': card.pk, 'content': 'Changed'}, operation])
+        assert response.status_code == 400
+        assert response.json()['operation'] == 1 and message in response.json()['error']
+    assert tree(page) == before
+
+    response = admin_client.post(f'/landing/api/page/{page.slug}/batch/', 'not json', content_type='application/json')
+    assert response.status_code == 400
+    with pytest.raises(BatchError, match='no element'):
+        apply_batch(page, [{'op': 'delete', 'id': card.pk}, {'op': 'content', 'id': card.pk, 'content': ''}])
+
+
+@pytest.mark.django_db
+def test_batch_requires_an_editor(client, admin_user):
+    page = make_page(sections=1, items=1)
+    operations = [{'op': 'delete', 'id': page.elements.get(type='section').pk}]
+
+    assert post_batch(client, page, operations).status_code == 403
+
+    request = RequestFactory().post('/', json.dumps({'operations': operations}), content_type='application/json')
+    request.user = admin_user
+    response = api_views.apply_element_batch(request, slug=page.slug)  # The WSGI view
+    assert json.loads(response.content)['deleted'] == 4
+    assert not PageElement.objects.filter(page=page).exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_batch_invalidates_the_page_render(admin_client, client):
+    page = make_page(sections=1, items=2)
+    url = f'/landing/page/{page.slug}/'
+    assert 'Item 0.1' in client.get(url).content.decode()
+
+    post_batch(admin_client, page, [{'op': 'content', 'id': element(page, 'Item 0.1').pk, 'content': 'Edited'}])
+
+    html = client.get(url).content.decode()
+    assert 'Edited' in html and 'Item 0.1' not in html
+
+
+@pytest.mark.django_db
+def test_moves_change_the_version_of_elements_with_a_new_position(admin_client):
+    page = make_page(sections=2, items=3)
+    versions = dict(page.elements.values_list('pk', 'version'))
+    item = element(page, 'Item 0.2')
+
+    response = post_batch(admin_client, page, [
+        {'op': 'move', 'id': item.pk, 'parent': item.parent_id, 'position': 0, 'version': item.version},
+    ])
+    assert response.status_code == 200
+
+    changed = {pk for pk, version in page.elements.values_list('pk', 'version') if version != versions[pk]}
+    assert changed == {element(page, f'Item 0.{i}').pk for i in range(3)}  # Item 0.0 and 0.1 moved down
+    # An edit based on the old position of a sibling is rejected
+    first = element(page, 'Item 0.0')
+    response = post_batch(admin_client, page, [{'op': 'move', 'id': first.pk, 'parent': None,
+                                                 'version': versions[first.pk]}])
+    assert response.status_code == 409
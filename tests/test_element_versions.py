@@ -0,0 +1,90 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from landing.models import VersionConflict
+from tests.factories import make_page
+from tests.test_element_batch import post_batch
+
+
+def post_content(client, element, content, version=None):
+    data = {'content': content} if version is None else {'content': content, 'version': version}
+    return client.post(f'/landing/api/element/{element.pk}/update-content/', json.dumps(data),
+                       content_type='application/json')
+
+
+@pytest.mark.django_db(transaction=True)
+def test_content_edit_writes_only_the_changed_columns(client):
+    page = make_page(sections=1, items=2)
+    element = page.elements.get(content='Item 0.1')
+    url = f'/landing/page/{page.slug}/'
+    assert 'Item 0.1' in client.get(url).content.decode()
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = post_content(client, element, 'Edited', version=1)
+
+    assert response.json() == {'success': True, 'version': 2}
+    updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "landing_pageelement"')]
+    assert len(updates) == 1
+    assert '"content"' in updates[0] and '"props"' not in updates[0] and '"html_attrs"' not in updates[0]
+    assert '"lft"' not in updates[0]
+
+    html = client.get(url).content.decode()
+    assert 'Edited' in html and 'Item 0.1' not in html
+
+
+@pytest.mark.django_db
+def test_outdated_edits_get_a_conflict(client):
+    page = make_page(sections=1, items=1)
+    element = page.elements.get(content='Item 0.0')
+    api = f'/landing/api/element/{element.pk}'
+
+    assert post_content(client, element, 'First', version=1).json()['version'] == 2
+    response = post_content(client, element, 'Second', version=1)  # Based on the version before "First"
+    assert response.status_code == 409
+    assert response.json()['version'] == 2
+    assert client.post(f'{api}/update-config/', {'css_classes': 'lead', 'version': '1'}).status_code == 409
+    assert client.post(f'{api}/update-config/', {'css_classes': 'lead', 'version': 'x'}).status_code == 400
+
+    assert client.post(f'{api}/update-config/', {'css_classes': 'lead', 'version': '2'}).json()['version'] == 3
+    assert post_content(client, element, 'Third').json()['version'] == 4  # No version: last write wins
+    element.refresh_from_db()
+    assert (element.content, element.css_classes, element.version) == ('Third', 'lead', 4)
+
+    element.delete()
+    with pytest.raises(VersionConflict) as conflict:
+        element.save_changes(['content'], expected_version=4)
+    assert conflict.value.current is None
+
+
+@pytest.mark.django_db
+def test_versions_in_batches_and_full_saves(admin_client):
+    page = make_page(sections=1, items=2)
+    first, second = page.elements.get(content='Item 0.0'), page.elements.get(content='Item 0.1')
+    second.save_changes(['content'])
+
+    response = post_batch(admin_client, page, [
+        {'op': 'content', 'id': first.pk, 'content': 'Changed', 'version': 1},
+        {'op': 'config', 'id': second.pk, 'css_classes': 'lead', 'version': 1},
+    ])
+    assert response.status_code == 409 and response.json()['version'] == 2
+    first.refresh_from_db()
+    assert (first.content, first.version) == ('Item 0.0', 1)
+
+    # Moves and deletions based on an outdated version are rejected too
+    for operation in ({'op': 'move', 'id': second.pk, 'position': 0}, {'op': 'delete', 'id': second.pk}):
+        assert post_batch(admin_client, page, [{**operation, 'version': 1}]).status_code == 409
+    assert page.elements.filter(pk=second.pk, order=1).exists()
+
+    post_batch(admin_client, page, [{'op': 'content', 'id': first.pk, 'content': 'Changed', 'version': 1}])
+    first.refresh_from_db()
+    assert first.version == 2
+
+    first.order = 5  # A new position goes through the MPTT save
+    first.save_changes(['order'], expected_version=2)
+    first.refresh_from_db()
+    assert (first.order, first.version) == (5, 3)
+    first.save()
+    assert first.version == 4
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from tests.factories import make_page
+from tests.test_server_timing import parse_server_timing
+
+
+def fragment_stats(response):
+    metrics = parse_server_timing(response['Server-Timing'])
+    return {'hits': metrics['fragment-hit']['desc'].strip('"'), 'misses': metrics['fragment-miss']['desc'].strip('"')}
+
+
+@pytest.mark.django_db
+def test_inline_edit_rerenders_only_path_to_root(client, admin_user):
+    page = make_page(sections=3, items=5)
+    client.force_login(admin_user)  # editors bypass the page cache, so fragments do the work
+    url = f'/landing/page/{page.slug}/'
+
+    cold = fragment_stats(client.get(url))
+    assert cold == {'hits': '0', 'misses': str(page.elements.count())}
+
+    warm = fragment_stats(client.get(url))
+    assert warm == {'hits': '3', 'misses': '0'}
+
+    element = page.elements.get(content='Item 1.2')
+    client.post(f'/landing/api/element/{element.id}/update-content/',
+                json.dumps({'content': 'Edited'}), content_type='application/json')
+
+    response = client.get(url)
+    # section -> card -> text are re-rendered, their untouched siblings come from the cache
+    assert fragment_stats(response) == {'hits': str(2 + 1 + 4), 'misses': '3'}
+    assert 'Edited' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_fragments_are_separate_for_edit_mode(client, admin_user):
+    page = make_page(sections=1, items=1)
+    client.force_login(admin_user)
+    url = f'/landing/page/{page.slug}/'
+
+    client.get(url)
+    html = client.get(url, {'edit': '1'}).content.decode()
+    assert 'data-element-id' in html
+    assert 'data-element-id' not in client.get(url).content.decode()
+
+
+@pytest.mark.django_db
+def test_deleting_child_changes_parent_fragment(client, admin_user):
+    page = make_page(sections=1, items=2)
+    client.force_login(admin_user)
+    url = f'/landing/page/{page.slug}/'
+    client.get(url)
+
+    page.elements.get(content='Item 0.1').delete()
+    html = client.get(url).content.decode()
+    assert 'Item 0.0' in html
+    assert 'Item 0.1' not in html
@@ -0,0 +1,57 @@
+from io import BytesIO
+
+import pytest
+from PIL import Image
+from django.test import override_settings
+
+from landing.services.assets import store_asset
+from landing.services.images import image_variants
+
+
+def encode(image, format):
+    buffer = BytesIO()
+    image.save(buffer, format)
+    return buffer.getvalue()
+
+
+@pytest.fixture()
+def media(tmp_path):
+    with override_settings(MEDIA_ROOT=str(tmp_path)):
+        yield tmp_path
+
+
+@pytest.mark.django_db
+def test_transparent_palette_image_keeps_its_alpha(media):
+    image = Image.new('P', (1000, 500))
+    image.putpalette([255, 0, 0, 0, 0, 255])
+    image.paste(1, (0, 0, 500, 500))
+    image.info['transparency'] = 0
+    asset = store_asset(encode(image, 'PNG'), 'logo.png', 'image/png')
+
+    width, height, variants = image_variants(asset)
+
+    assert (width, height) == (1000, 500)
+    assert [(variant.width, variant.height) for variant in variants] == [(480, 240), (960, 480)]
+    with Image.open(variants[0].file.path) as variant:
+        assert variant.format == 'WEBP' and variant.mode == 'RGBA'
+        assert variant.getpixel((0, 0))[3] == 255 and variant.getpixel((479, 0))[3] == 0
+
+
+@pytest.mark.django_db
+def test_small_image_without_smaller_webp_has_no_variants(media):
+    asset = store_asset(encode(Image.new('L', (1, 1)), 'GIF'), 'pixel.gif', 'image/gif')
+
+    assert image_variants(asset) == (1, 1, [])
+    asset.refresh_from_db()
+    assert (asset.width, asset.height) == (1, 1)
+    assert image_variants(asset) == (1, 1, [])
+
+
+@pytest.mark.django_db
+def test_unreadable_image_is_only_tried_once(media, django_assert_num_queries):
+    asset = store_asset(b'<svg xmlns="http://www.w3.org/2000/svg"/>', 'icon.svg', 'image/svg+xml')
+
+    assert image_variants(asset) == (None, None, [])
+    assert asset.width == 0
+    with django_assert_num_queries(0):
+        assert image_variants(asset) == (None, None, [])
@@ -0,0 +1,110 @@
+import time
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from landing.models import ImportJob
+from landing.services.import_jobs import (MAX_ATTEMPTS, Heartbeat, claim_next_job, enqueue_import,
+                                          requeue_stale_jobs)
+from landing.services.page_parser import PageParserService
+from tests.test_page_parser import IMAGES, site, site_url  # noqa: F401 (site is a fixture)
+
+
+@pytest.fixture()
+def import_dirs(tmp_path):
+    with override_settings(STATIC_ROOT=str(tmp_path / 'static'), MEDIA_ROOT=str(tmp_path / 'media')):
+        yield tmp_path
+
+
+@pytest.mark.django_db
+def test_admin_queues_the_import_and_polls_its_progress(site, import_dirs, admin_client, capsys):
+    response = admin_client.post(reverse('admin:landing_page_import'), {'url': site_url(site), 'incremental': 'on'})
+
+    job = ImportJob.objects.get()
+    assert response.status_code == 302
+    assert response.url == reverse('admin:landing_page_import_job', args=[job.pk])
+    assert (job.status, job.incremental, job.created_by.is_superuser) == (ImportJob.QUEUED, True, True)
+    assert not site.requests  # Nothing is downloaded in the admin request
+    assert 'Waiting for an import worker' in admin_client.get(response.url).content.decode()
+
+    call_command('import_worker', '--once')
+
+    status = admin_client.get(reverse('admin:landing_page_import_job_status', args=[job.pk])).json()
+    job.refresh_from_db()
+    assert status == {
+        'status': 'done',
+        'stage': 'saving',
+        'assets_done': IMAGES + 4,  # Images, header background, stylesheet and its background
+        'assets_total': IMAGES + 4,
+        'error': '',
+        'summary': job.summary,
+        'page_url': reverse('admin:landing_page_change', args=[job.page_id]),
+    }
+    assert job.page.title == 'Asset site'
+    assert job.finished_at >= job.started_at and job.attempts == 1
+    assert f"Imported Asset site ({job.page.slug})" in capsys.readouterr().out
+
+
+@pytest.mark.django_db
+def test_worker_records_failures_and_goes_on(site, import_dirs, capsys):
+    failing = enqueue_import(site_url(site, '/missing.png'))
+    ok = enqueue_import(site_url(site, '/about'))
+
+    call_command('import_worker', '--once')
+
+    failing.refresh_from_db()
+    ok.refresh_from_db()
+    assert failing.status == ImportJob.FAILED and 'HTTPError' in failing.error and failing.page is None
+    assert ok.status == ImportJob.DONE and ok.page.slug == 'about-us'
+    assert f"Job {failing.pk} failed" in capsys.readouterr().out
+
+
+@pytest.mark.django_db
+def test_progress_reports_every_stage(site, import_dirs):
+    reports = []
+    PageParserService(site_url(site), progress=lambda *report: reports.append(report)).parse_and_import()
+
+    stages = [stage for stage, _, _ in reports]
+    assert sorted(set(stages), key=stages.index) == list(PageParserService.STAGES)
+    assert reports[-1] == ('saving', IMAGES + 4, IMAGES + 4)
+    assert all(done <= total for _, done, total in reports)
+
+
+@pytest.mark.django_db
+def test_jobs_are_claimed_once_and_stale_ones_requeued():
+    first, second = enqueue_import('http://example.com/1'), enqueue_import('http://example.com/2')
+
+    assert claim_next_job('a').pk == first.pk
+    assert claim_next_job('b').pk == second.pk
+    assert claim_next_job('c') is None
+
+    assert requeue_stale_jobs() == 0
+    ImportJob.objects.filter(pk=first.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+    ImportJob.objects.filter(pk=second.pk).update(updated_at=timezone.now() - timedelta(hours=1),
+                                                  attempts=MAX_ATTEMPTS)
+    assert requeue_stale_jobs() == 1
+    first.refresh_from_db()
+    second.refresh_from_db()
+    assert (first.status, first.worker) == (ImportJob.QUEUED, '')
+    assert second.status == ImportJob.FAILED and second.error
+
+
+@pytest.mark.django_db(transaction=True)
+def test_heartbeat_keeps_a_silent_running_job_from_being_requeued():
+    enqueue_import('http://example.com/slow')
+    job = claim_next_job('a')
+    stale = timezone.now() - timedelta(hours=1)
+    ImportJob.objects.filter(pk=job.pk).update(updated_at=stale)
+
+    with Heartbeat(job, interval=0.01) as heartbeat:
+        deadline = time.monotonic() + 5
+        while ImportJob.objects.get(pk=job.pk).updated_at == stale and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert requeue_stale_jobs(timeout=60) == 0
+    assert not heartbeat.thread.is_alive()
+    job.refresh_from_db()
+    assert job.status == ImportJob.RUNNING
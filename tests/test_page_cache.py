@@ -0,0 +1,105 @@
+import json
+
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from landing.models import Page, PageElement
+from tests.factories import make_page
+
+
+def get_page(client, page, **params):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(f'/landing/page/{page.slug}/', params)
+    assert response.status_code == 200
+    return response.content.decode(), len(ctx.captured_queries)
+
+
+@pytest.mark.django_db
+def test_anonymous_views_are_served_from_cache(client):
+    page = make_page()
+
+    first_html, first_queries = get_page(client, page)
+    second_html, second_queries = get_page(client, page)
+
+    assert second_html == first_html
+    assert second_queries == 2  # Page lookup and the ETag/Last-Modified aggregate
+    assert second_queries < first_queries
+
+
+@pytest.mark.django_db(transaction=True)
+def test_editor_api_change_invalidates_cache(client):
+    page = make_page()
+    element = page.elements.get(content='Item 0.0')
+    get_page(client, page)
+
+    response = client.post(f'/landing/api/element/{element.id}/update-content/',
+                           json.dumps({'content': 'Changed item'}), content_type='application/json')
+    assert response.status_code == 200
+
+    html, _ = get_page(client, page)
+    assert 'Changed item' in html
+    assert 'Item 0.0' not in html
+
+
+@pytest.mark.django_db(transaction=True)
+def test_element_delete_and_page_save_invalidate_cache(client):
+    page = make_page()
+    get_page(client, page)
+
+    PageElement.objects.get(page=page, content='Section 1').delete()
+    html, _ = get_page(client, page)
+    assert 'Section 1' not in html
+
+    page = Page.objects.get(pk=page.pk)
+    page.title = 'Renamed page'
+    page.save()
+    html, _ = get_page(client, page)
+    assert '<title>Renamed page</title>' in html
+
+
+@pytest.mark.django_db
+def test_staff_bypass_cache(client, admin_user):
+    page = make_page()
+    get_page(client, page)
+    # Bypass signals so the page version stays the same and only a fresh render can see the change
+    PageElement.objects.filter(page=page, content='Item 0.0').update(content='Silent change',
+                                                                     updated_at=timezone.now())
+
+    html, _ = get_page(client, page)
+    assert 'Silent change' not in html
+
+    client.force_login(admin_user)
+    html, _ = get_page(client, page)
+    assert 'Silent change' in html
+    html, _ = get_page(client, page, edit='1')
+    assert 'Silent change' in html
+    assert 'data-element-id' in html
+
+
+@pytest.mark.django_db
+def test_page_is_touched_once_per_transaction(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        page = make_page(sections=3, items=3)
+    touched = page.updated_at
+
+    with CaptureQueriesContext(connection) as ctx, django_capture_on_commit_callbacks(execute=True):
+        page.elements.all().delete()
+    assert len([q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "landing_page" ')]) == 1
+    page.refresh_from_db()
+    assert page.updated_at > touched
+
+    # A rolled back change does not keep later ones from touching the page
+    try:
+        with transaction.atomic():
+            Page.mark_changed(page.pk)
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    touched = page.updated_at
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        Page.mark_changed(page.pk)
+    assert len(callbacks) == 1
+    page.refresh_from_db()
+    assert page.updated_at > touched
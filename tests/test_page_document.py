@@ -0,0 +1,109 @@
+import json
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.template.loader import render_to_string
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from landing.cache import page_element_stats, page_version
+from landing.models import Page, PageDocument, PageElement, PageRebuild
+from landing.rendering import page_context
+from landing.services.page_document import build_page_document, current_document, document_element_tree
+from tests.factories import make_page
+
+
+def rows_html(page):
+    return render_to_string(page.template, page_context(page))
+
+
+def document_html(page):
+    page = Page.objects.select_related('document').get(pk=page.pk)
+    document = current_document(page, page_element_stats(page))
+    assert document is not None
+    return render_to_string(page.template, page_context(page, root_elements=document_element_tree(document, page)))
+
+
+def view_queries(client, page):
+    """HTML and queries of an anonymous, uncached view of the page."""
+    cache.clear()
+    with CaptureQueriesContext(connection) as ctx:
+        html = client.get(f'/landing/page/{page.slug}/').content.decode()
+    return html, [q['sql'] for q in ctx.captured_queries]
+
+
+def reads_element_rows(queries):
+    return any('"landing_pageelement"."content"' in sql for sql in queries)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('compression', [0, 6])
+def test_document_renders_like_the_element_rows(compression):
+    page = make_page(sections=2, items=3)
+    image = page.elements.get(content='Item 1.2')
+    image.type, image.html_attrs = 'image', {'src': '/photo.png', 'alt': 'A "photo"', 'rel': ['a', 'b']}
+    image.image_variants, image.image_width, image.image_height = [{'src': '/photo-480.webp', 'width': 480}], 960, 640
+    image.save()
+    page.refresh_from_db()
+
+    with override_settings(LANDING_DOCUMENT_COMPRESSION=compression):
+        document = build_page_document(page)
+
+    assert document.compressed == bool(compression)
+    assert (document.element_count, document.version) == (page.elements.count(), page_version(page))
+    assert document_html(page) == rows_html(page)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_views_use_the_document_only_while_it_matches_the_rows(client, admin_client):
+    page = make_page(sections=2, items=2)
+    html, queries = view_queries(client, page)
+    assert reads_element_rows(queries) and not PageDocument.objects.exists()  # Views never build documents
+
+    page.refresh_from_db()
+    build_page_document(page)
+    document_html_, queries = view_queries(client, page)
+    assert document_html_ == html
+    assert len(queries) == 2 and not reads_element_rows(queries)  # The page with its document, the validators
+
+    # A change that bypasses the model signals still shows: the aggregate no longer matches the document
+    PageElement.objects.filter(page=page, content='Item 0.1').update(content='Silent', updated_at=timezone.now())
+    html, queries = view_queries(client, page)
+    assert 'Silent' in html and reads_element_rows(queries)
+    assert not [sql for sql in queries if sql.startswith(('INSERT', 'UPDATE'))]
+
+    element = page.elements.get(content='Item 1.0')
+    client.post(f'/landing/api/element/{element.pk}/update-content/', json.dumps({'content': 'Edited'}),
+                content_type='application/json')
+    assert 'Edited' in client.get(f'/landing/page/{page.slug}/').content.decode()
+    assert 'Edited' in admin_client.get(f'/landing/page/{page.slug}/').content.decode()
+
+
+@pytest.mark.django_db
+def test_document_is_rebuilt_by_the_worker_when_changes_commit(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        page = make_page(sections=1, items=1)
+    call_command('import_worker', '--once')
+    element = page.elements.get(content='Item 0.0')
+
+    with django_capture_on_commit_callbacks(execute=True):
+        element.content = 'Committed'
+        element.save_changes(['content'])
+
+    # The edit only queues the rebuild; views render the rows meanwhile
+    page.refresh_from_db()
+    assert PageRebuild.objects.filter(page=page).exists()
+    assert PageDocument.objects.get(page=page).version != page_version(page)
+    call_command('import_worker', '--once')
+    assert not PageRebuild.objects.exists()
+    assert PageDocument.objects.get(page=page).version == page_version(page)
+    assert 'Committed' in document_html(page)
+
+    PageDocument.objects.filter(page=page).update(format=0)  # Written by another version of the code
+    page = Page.objects.select_related('document').get(pk=page.pk)
+    assert current_document(page, page_element_stats(page)) is None
+    call_command('build_page_documents', '--stale')
+    assert 'Committed' in document_html(page)
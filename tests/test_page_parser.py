@@ -0,0 +1,488 @@
+import hashlib
+import os
+from datetime import timedelta
+from io import BytesIO
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PIL import Image
+from django.core.files.storage import default_storage
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from landing.models import Asset, Page
+from landing.services.assets import asset_path, prune_assets, store_asset, unreferenced_assets
+from landing.services.batch_import import import_urls
+from landing.services.page_parser import AssetFetcher, PageParserService
+from landing.services.tree_diff import walk
+
+IMAGES = 30
+THEME_CSS = """@charset "utf-8";
+@import url(fonts.css) screen;
+/* Écran: url(/img/commented.png) */
+@media (min-width: 600px) {
+  .a { background: url(/img/1.png) no-repeat, url( '../img/2.png' ) }
+}
+.b { cursor: url(/img/3.png#hot), auto; mask: url(#mask); content: "url(/img/none.png)" }
+.c { background-image: url(data:image/png;base64,AAAA) }
+.d { background: url(/missing.png) }
+"""
+
+
+def png(width, height, seed=0):
+    """A noisy RGB PNG, which compresses badly like a photo."""
+    image = Image.frombytes('RGB', (width, height), random.Random(seed).randbytes(width * height * 3))
+    buffer = BytesIO()
+    image.save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+PHOTO_PNG = png(1200, 800)
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests[self.path] = server.requests.get(self.path, 0) + 1
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            time.sleep(server.delay)
+            status, content_type, body = self.route()
+        finally:
+            with server.lock:
+                server.active -= 1
+        etag = f'"{server.version}-{hashlib.md5(body).hexdigest()}"'
+        if server.etags and status == 200 and self.headers.get('If-None-Match') == etag:
+            server.not_modified += 1
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if server.etags:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def route(self):
+        if self.path == '/':
+            images = ''.join(f'<img src="/img/{i}.png" alt="Image {i}">' for i in range(IMAGES))
+            html = (
+                '<html><head><title>Asset site</title><link rel="stylesheet" href="/style.css"></head>'
+                '<body><header style="background-image: url(/bg/header.png)"><h1>Hello</h1></header>'
+                f'<section>{images}<img src="/img/0.png"><img src="/missing.png"></section></body></html>'
+            )
+            return 200, 'text/html; charset=utf-8', html.encode()
+        if self.path == '/about':
+            return 200, 'text/html', b'<html><head><title>About us</title></head><body><p>About</p></body></html>'
+        if self.path == '/gallery':
+            return 200, 'text/html', (b'<html><head><title>Gallery</title></head><body><section>'
+                                      b'<img src="/photo.png" alt="Photo"><img src="/photo.png" loading="eager">'
+                                      b'<img src="/img/1.png"></section></body></html>')
+        if self.path == '/photo.png':
+            return 200, 'image/png', PHOTO_PNG
+        if self.path == '/fonts':
+            return 200, 'text/html', (b'<html><head><title>Fonts</title><link rel="stylesheet" href="/css/theme.css">'
+                                      b'<link rel="stylesheet" href="/css/parts/theme.css"></head><body><p>Hi</p></body></html>')
+        if self.path == '/css/theme.css':
+            return 200, 'text/css', THEME_CSS.encode()
+        if self.path == '/css/parts/theme.css':
+            return 200, 'text/css; charset=iso-8859-1', '/* Thème */ @import "../theme.css";'.encode('latin-1')
+        if self.path == '/css/fonts.css':
+            return 200, 'text/css', b'@font-face { font-family: F; src: url("/fonts/f.woff2") format("woff2"); }'
+        if self.path.startswith('/fonts/'):
+            return 200, 'font/woff2', f'font:{self.path}'.encode()
+        if self.path == '/style.css':
+            return 200, 'text/css', b'.hero { background-image: url(bg/hero.png) }'
+        if self.path == '/bg/hero.png':
+            return 200, 'image/png', b'png:/img/0.png'  # Same file as an <img> of the page
+        if self.path.endswith('.png') and self.path != '/missing.png':
+            return 200, 'image/png', f'png:{self.path}{self.server.changed.get(self.path, "")}'.encode()
+        return 404, 'text/plain', b'not found'
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture()
+def site():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SiteHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = {}
+    server.connections = server.active = server.max_active = 0
+    server.delay = 0.01
+    server.etags = False
+    server.version = 1
+    server.changed = {}
+    server.not_modified = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def site_url(server, path='/'):
+    return f'http://127.0.0.1:{server.server_address[1]}{path}'
+
+
+@pytest.mark.django_db
+def test_import_downloads_assets_once_and_concurrently(site, tmp_path):
+    with override_settings(STATIC_ROOT=str(tmp_path / 'static'), MEDIA_ROOT=str(tmp_path / 'media'),
+                           LANDING_ASSET_WORKERS=8, LANDING_ASSET_PER_HOST=4):
+        page = PageParserService(site_url(site)).parse_and_import()
+
+    images = page.elements.filter(type='image')
+    assert images.count() == IMAGES + 2
+    assert images.exclude(image='').count() == IMAGES + 1  # all but the missing one
+    assert all(count == 1 for count in site.requests.values())
+    assert site.requests['/missing.png'] == 1
+    assert 1 < site.max_active <= 4
+    assert site.connections <= 4
+
+    header = page.elements.get(type='pageheader')
+    header_asset = Asset.objects.get(sha256=hashlib.sha256(b'png:/bg/header.png').hexdigest())
+    assert header.props['background_image'] == header_asset.file.url
+    css = (tmp_path / 'static' / f'page_{page.slug}' / 'css' / 'style.css').read_text()
+    image_asset = Asset.objects.get(sha256=hashlib.sha256(b'png:/img/0.png').hexdigest())
+    assert f'url({image_asset.file.url})' in css
+    assert page.css_files == [f'page_{page.slug}/css/style.css']
+
+
+@pytest.mark.django_db
+def test_imported_images_are_stored_once(site, tmp_path):
+    media = tmp_path / 'media'
+    with override_settings(STATIC_ROOT=str(tmp_path / 'static'), MEDIA_ROOT=str(media)):
+        page = PageParserService(site_url(site)).parse_and_import()
+
+        # The <img> and CSS copies of /img/0.png, plus the header background
+        assert page.assets.count() == Asset.objects.count() == IMAGES + 1
+        stored = [path for path in media.rglob('*') if path.is_file()]
+        assert len(stored) == IMAGES + 1
+        assert all(path.parent.parent.name == 'assets' for path in stored)
+        images = page.elements.filter(type='image').exclude(image='').values_list('image', flat=True)
+        assert len(images) == IMAGES + 1 and len(set(images)) == IMAGES  # /img/0.png is used twice
+
+        # Re-importing writes nothing new; deleting the page leaves the files to prune_assets
+        page = PageParserService(site_url(site)).parse_and_import()
+        assert len([path for path in media.rglob('*') if path.is_file()]) == IMAGES + 1
+        page.delete()
+        assert prune_assets() == 0  # Stored too recently: they could belong to an import still running
+        assert prune_assets(grace=0) == IMAGES + 1
+        assert not [path for path in media.rglob('*') if path.is_file()]
+
+
+@pytest.mark.django_db
+def test_prune_spares_assets_an_import_reuses(tmp_path):
+    with override_settings(MEDIA_ROOT=str(tmp_path), LANDING_ASSET_PRUNE_GRACE=60):
+        asset = store_asset(b'old png', 'http://example.com/old.png', 'image/png')
+        Asset.objects.filter(pk=asset.pk).update(stored_at=timezone.now() - timedelta(minutes=5))
+        assert list(unreferenced_assets()) == [asset]
+
+        assert store_asset(b'old png').pk == asset.pk  # Found by an import that links it to its page later
+        assert prune_assets() == 0
+        assert asset.file.storage.exists(asset.file.name)
+
+
+@pytest.mark.django_db
+def test_concurrently_stored_asset_leaves_no_orphan_file(tmp_path, monkeypatch):
+    content = b'same png'
+    name = asset_path(hashlib.sha256(content).hexdigest(), '.png')
+
+    def exists(path):
+        # Another import stores the same content between the lookup and the insert
+        monkeypatch.undo()
+        store_asset(content, 'http://example.com/a.png', 'image/png')
+        return False
+
+    with override_settings(MEDIA_ROOT=str(tmp_path)):
+        monkeypatch.setattr(default_storage, 'exists', exists)
+        asset = store_asset(content, 'http://example.com/b.png', 'image/png')
+
+    assert asset.file.name == name and Asset.objects.count() == 1
+    assert [path.name for path in tmp_path.rglob('*') if path.is_file()] == [os.path.basename(name)]
+
+
+def test_fetcher_limits_concurrency_per_host(site):
+    urls = [site_url(site, f'/img/{i}.png') for i in range(20)]
+
+    with AssetFetcher(max_workers=10, per_host=3) as fetcher:
+        fetcher.prefetch(urls + urls[:5])
+        assert fetcher.get(urls[7]).content == b'png:/img/7.png'
+
+    assert site.max_active <= 3
+    assert site.connections <= 3
+    assert sum(site.requests.values()) == 20
+
+
+def test_fetcher_raises_prefetch_errors_on_get(site):
+    with AssetFetcher(max_workers=2, per_host=2) as fetcher:
+        fetcher.prefetch([site_url(site, '/missing.png')])
+        with pytest.raises(Exception, match='404'):
+            fetcher.get(site_url(site, '/missing.png'))
+
+
+@pytest.mark.django_db
+def test_imported_tree_matches_mptt_rebuild(tmp_path):
+    from bs4 import BeautifulSoup
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    from landing.models import Page, PageElement
+    from landing.services.page_parser import ElementTreeBuilder
+    from tests.factories import make_page
+
+    make_page(slug='existing', sections=2, items=2)  # Trees of another page before the import
+    items = ''.join(f'<li>Item {i}</li>' for i in range(5))
+    html = (
+        '<body><header><div><h1>Title</h1></div></header>'
+        f'<section><div class="row"><div class="col"><h2>A</h2><p>B</p></div></div><ul>{items}</ul></section>'
+        '<section><form action="/x"><label for="n">Name</label><textarea name="t"></textarea></form></section>'
+        '</body>'
+    )
+    page = Page.objects.create(title='Import', slug='import')
+
+    with CaptureQueriesContext(connection) as ctx:
+        roots = ElementTreeBuilder(page, 'http://example.com/', str(tmp_path)).build_tree(BeautifulSoup(html, 'lxml').body)
+
+    assert [root.type for root in roots] == ['pageheader', 'section', 'section']
+    assert len(ctx.captured_queries) < 15  # One insert per tree level, not per element
+
+    def snapshot():
+        return {e.pk: (e.parent_id, e.lft, e.rght, e.level) for e in PageElement.objects.filter(page=page)}
+
+    imported = snapshot()
+    assert len(imported) == 18
+    PageElement.objects.rebuild()
+    assert snapshot() == imported
+    assert [e.content for e in page.elements.filter(type='list_item').order_by('lft')] == \
+        [f'Item {i}' for i in range(5)]
+
+
+@pytest.mark.django_db
+def test_reimport_revalidates_with_the_http_cache(site, tmp_path):
+    site.etags = True
+    with override_settings(STATIC_ROOT=str(tmp_path / 'static'), MEDIA_ROOT=str(tmp_path / 'media'),
+                           LANDING_HTTP_CACHE_DIR=str(tmp_path / 'http_cache')):
+        first = PageParserService(site_url(site))
+        first.parse_and_import()
+        assert first.http_cache_stats.hits == 0
+        assert site.not_modified == 0
+
+        site.changed['/img/3.png'] = ':v2'
+        second = PageParserService(site_url(site))
+        page = second.parse_and_import()
+
+    stats = second.http_cache_stats
+    requested = first.http_cache_stats.requests
+    assert stats.requests == requested
+    assert stats.hits == site.not_modified == requested - 1  # Everything but the changed image
+    assert stats.hit_ratio('html') == stats.hit_ratio('css') == 1.0
+    assert stats.bytes_saved > 0
+    assert 'HTTP cache hits' in str(stats)
+    assert page.elements.filter(type='image').exclude(image='').count() == IMAGES + 1
+    assert Asset.objects.filter(sha256=hashlib.sha256(b'png:/img/3.png:v2').hexdigest()).exists()
+
+
+@pytest.mark.django_db
+def test_incremental_reimport_updates_changed_elements_only(site, tmp_path):
+    with override_settings(STATIC_ROOT=str(tmp_path / 'static'), MEDIA_ROOT=str(tmp_path / 'media')):
+        page = PageParserService(site_url(site)).parse_and_import()
+        ids = set(page.elements.values_list('pk', flat=True))
+
+        site.changed['/img/3.png'] = ':v2'
+        service = PageParserService(site_url(site), incremental=True)
+        reimported = service.parse_and_import()
+
+    assert reimported.pk == page.pk
+    assert set(page.elements.values_list('pk', flat=True)) == ids
+    assert (service.tree_diff_stats.updated, service.tree_diff_stats.rows_touched) == (1, 1)
+    changed = Asset.objects.get(sha256=hashlib.sha256(b'png:/img/3.png:v2').hexdigest())
+    assert page.elements.filter(image=changed.file.name).count() == 1
+    assert page.assets.filter(pk=changed.pk).exists()
+    assert page.assets.count() == IMAGES + 1  # The old /img/3.png is no longer referenced
+
+
+@pytest.mark.django_db
+def test_batch_import_isolates_failures(site, tmp_path, capsys):
+    url_file = tmp_path / 'urls.txt'
+    url_file.write_text(f"# Customer pages\n{site_url(site, '/about')}\n\n{site_url(site, '/missing.png')}\n")
+    with override_settings(STATIC_ROOT=str(tmp_path / 'static'), MEDIA_ROOT=str(tmp_path / 'media')):
+        with pytest.raises(CommandError, match='1 of 3 imports failed'):
+            call_command('parse_page', site_url(site), '--file', str(url_file), '--workers', '1')
+
+    assert set(Page.objects.values_list('slug', flat=True)) == {'asset-site', 'about-us'}
+    out = capsys.readouterr().out
+    assert '[3/3]' in out
+    assert f"{site_url(site, '/missing.png'):<40} FAILED" in out
+    assert '2 imported, 1 failed' in out
+
+
+def test_batch_import_in_worker_processes(site):
+    urls = [site_url(site, '/missing.png'), 'http://127.0.0.1:1/']
+
+    results = list(import_urls(urls + urls[:1], workers=2))
+
+    assert sorted(result.url for result in results) == sorted(urls)
+    assert all(not result.ok for result in results)
+    assert site.requests['/missing.png'] == 1
+    assert next(result for result in results if result.url == urls[0]).bytes_downloaded == len(b'not found')
+
+
+RICH_HTML = '''<!DOCTYPE html>
+<html><head><title> Rich — page </title><link rel="stylesheet" href="/a.css"></head>
+<body class="site">
+  <!-- navigation -->
+  <header style="background-image: url('/bg/header.png')"><div><h1>Héllo <em>wörld</em> 👋</h1></div></header>
+  <section id="s1"><div class="row"><div class="col">One</div><div class="col">Two &amp; <b>three</b></div></div>
+    <div><h2>Card</h2><p>Text with <span class="x" data-a='say "hi"'>a <strong>span</strong></span> &lt;tag&gt;</p></div>
+    <ul><li>A</li><li>B<!-- c --></li></ul><ol><li>1</li></ol>
+    <img src="/img/1.png" alt="One"><img class="grid" src="/img/2.png"><span><img src="/img/3.png"></span>
+    <link rel="stylesheet" href="/b.css">
+  </section>
+  <form action="/send" method="post"><label for="n">Name</label><input type="text" id="n" name="n">
+    <textarea name="t">Hi</textarea><button>Go</button><a href="/more">More</a></form>
+  <script>var x = "<p>not a tag</p>";</script>
+  <p>Tail<br>text</p>
+</body></html>'''
+
+
+def element_tree(roots):
+    return [(e.type, e.content, e.props, e.html_attrs, e.css_classes, e.image.name or '', e.order,
+             element_tree(e._cached_children)) for e in roots]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('chunk_size', [1, 7, 4096])
+def test_streaming_parse_builds_the_same_elements(site, tmp_path, chunk_size):
+    from bs4 import BeautifulSoup
+
+    from landing.services.page_parser import ElementTreeBuilder, StreamingTreeParser
+
+    base_url = site_url(site)
+    data = RICH_HTML.encode('utf-8')
+    with override_settings(MEDIA_ROOT=str(tmp_path / 'media')), AssetFetcher() as fetcher:
+        dom = ElementTreeBuilder(None, base_url, None, fetcher)
+        expected = dom.build_elements(BeautifulSoup(data.decode('utf-8'), 'lxml').body)
+        parser = StreamingTreeParser(ElementTreeBuilder(None, base_url, None, fetcher))
+        roots = parser.parse((data[i:i + chunk_size] for i in range(0, len(data), chunk_size)), 'utf-8')
+
+    assert element_tree(roots) == element_tree(expected)
+    assert parser.tree_builder.assets == dom.assets
+    soup = parser.document()
+    assert soup.title.string == ' Rich — page '
+    assert [link['href'] for link in soup.find_all('link', rel='stylesheet')] == ['/a.css', '/b.css']
+
+
+def test_streaming_parse_keeps_only_open_tags():
+    from landing.services.page_parser import ElementTreeBuilder, StreamingTreeParser
+
+    cards = ''.join(f'<div class="card"><h3>Card {i}</h3><p>Text {i}</p><p>More</p></div>' for i in range(20))
+    html = '<html><body>' + ''.join(f'<section>{cards}</section>' for _ in range(20)) + '</body></html>'
+    parser = StreamingTreeParser(ElementTreeBuilder(None, 'http://example.com/', None))
+    sizes = []
+    on_end = parser.soup.on_end
+    parser.soup.on_end = lambda tag: (on_end(tag), sizes.append(sum(1 for _ in parser.soup.descendants)))
+
+    roots = parser.parse([html.encode()])
+
+    assert len(roots) == 20 and sum(1 for _ in walk(roots)) == 20 * (1 + 20 * 4)
+    assert max(sizes) < 100  # The whole document has over 3000 tags and strings
+    assert not parser._built
+
+
+@pytest.mark.django_db
+def test_streaming_import_matches_dom_import(site, tmp_path):
+    site.etags = True
+    with override_settings(STATIC_ROOT=str(tmp_path / 'static'), MEDIA_ROOT=str(tmp_path / 'media'),
+                           LANDING_HTTP_CACHE_DIR=str(tmp_path / 'http_cache')):
+        expected = element_tree(PageParserService(site_url(site)).parse_and_import().get_element_tree())
+        streaming = PageParserService(site_url(site), streaming=True)
+        page = streaming.parse_and_import()
+        assert element_tree(page.get_element_tree()) == expected
+        assert streaming.http_cache_stats.hit_ratio('html') == 1.0
+
+        site.version += 1  # New ETags, nothing is revalidated
+        streaming = PageParserService(site_url(site), streaming=True)
+        page = streaming.parse_and_import()
+
+    assert element_tree(page.get_element_tree()) == expected
+    assert streaming.http_cache_stats.hits == 0
+    assert streaming.bytes_downloaded > 0
+    assert page.css_files == [f'page_{page.slug}/css/style.css']
+    assert page.assets.count() == IMAGES + 1
+
+
+@pytest.mark.django_db
+def test_import_rewrites_all_stylesheet_urls(site, tmp_path):
+    with override_settings(STATIC_ROOT=str(tmp_path / 'static'), MEDIA_ROOT=str(tmp_path / 'media')):
+        page = PageParserService(site_url(site, '/fonts')).parse_and_import()
+
+    def asset_url(content):
+        return Asset.objects.get(sha256=hashlib.sha256(content).hexdigest()).file.url
+
+    css_dir = tmp_path / 'static' / f'page_{page.slug}' / 'css'
+    assert page.css_files == [f'page_{page.slug}/css/theme.css', f'page_{page.slug}/css/theme-1.css']
+    assert (css_dir / 'theme.css').read_text() == (
+        THEME_CSS
+        .replace('url(/img/1.png)', f'url({asset_url(b"png:/img/1.png")})')
+        .replace("'../img/2.png'", f"'{asset_url(b'png:/img/2.png')}'")
+        .replace('url(/img/3.png#hot)', f'url({asset_url(b"png:/img/3.png")}#hot)')
+        .replace('url(/missing.png)', f'url({site_url(site, "/missing.png")})')
+    )
+    assert (css_dir / 'fonts.css').read_text() == \
+        f'@font-face {{ font-family: F; src: url("{asset_url(b"font:/fonts/f.woff2")}") format("woff2"); }}'
+    assert (css_dir / 'theme-1.css').read_bytes() == '/* Thème */ @import "theme.css";'.encode('latin-1')
+    assert page.assets.count() == 4
+    assert '/img/commented.png' not in site.requests and '/img/none.png' not in site.requests
+    assert site.requests['/css/theme.css'] == 1
+
+
+@pytest.mark.django_db
+def test_import_makes_responsive_image_variants(site, tmp_path, client):
+    with override_settings(STATIC_ROOT=str(tmp_path / 'static'), MEDIA_ROOT=str(tmp_path / 'media')):
+        page = PageParserService(site_url(site, '/gallery')).parse_and_import()
+        photo, eager, fake = page.elements.filter(type='image').order_by('order')
+
+        assert (photo.image_width, photo.image_height) == (1200, 800)
+        assert [variant['width'] for variant in photo.image_variants] == [480, 960, 1200]
+        variants = Asset.objects.filter(original__file=photo.image.name).order_by('width')
+        assert [variant.file.url for variant in variants] == [variant['src'] for variant in photo.image_variants]
+        assert [(variant.width, variant.height, variant.content_type) for variant in variants] == [
+            (480, 320, 'image/webp'), (960, 640, 'image/webp'), (1200, 800, 'image/webp')]
+        assert all(variant.size < len(PHOTO_PNG) for variant in variants)
+        assert eager.image_variants == photo.image_variants
+        assert set(page.assets.all()) == {photo_asset := Asset.objects.get(file=photo.image.name),
+                                          Asset.objects.get(file=fake.image.name), *variants}
+        assert (fake.image_width, fake.image_height, fake.image_variants) == (None, None, [])  # Not a real PNG
+        assert photo_asset.width == 1200 and Asset.objects.get(file=fake.image.name).width == 0
+
+        html = client.get(f'/landing/page/{page.slug}/').content.decode()
+        srcset = ', '.join(f"{variant.file.url} {variant.width}w" for variant in variants)
+        assert (f'src="{photo.image.url}" alt="Photo" srcset="{srcset}" sizes="(max-width: 1200px) 100vw, 1200px" '
+                f'width="1200" height="800" decoding="async"') in html  # One of the first images of the page
+        assert 'loading="eager" srcset=' in html
+        assert f'src="{fake.image.url}" loading="lazy" decoding="async"' in html
+
+        # The variants are made once per image, not again on re-import
+        count = Asset.objects.count()
+        page = PageParserService(site_url(site, '/gallery')).parse_and_import()
+        assert Asset.objects.count() == count
+        assert page.elements.filter(type='image').order_by('order').first().image_variants == photo.image_variants
@@ -0,0 +1,91 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test import AsyncRequestFactory, RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from landing import api_views, async_views
+from landing.services.page_tree import TREE_FIELDS
+from tests.factories import make_page
+from tests.test_element_batch import post_batch
+
+
+def tree_url(page, since=None):
+    return f'/landing/api/page/{page.slug}/tree/' + (f'?since={since}' if since is not None else '')
+
+
+def rows_by_id(data):
+    return {row[0]: dict(zip(data['fields'], row)) for row in data['elements']}
+
+
+@pytest.mark.django_db
+def test_tree_is_compact_json_from_one_query(admin_client):
+    page = make_page(sections=2, items=2)
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = admin_client.get(tree_url(page))
+
+    data = response.json()
+    assert data['fields'] == list(TREE_FIELDS)
+    assert [tuple(row) for row in data['elements']] == list(
+        page.elements.order_by('tree_id', 'lft').values_list('id', 'parent_id', 'order', 'type', 'content', 'props',
+                                                             'css_classes', 'version'))
+    element_queries = [q for q in ctx.captured_queries if 'landing_pageelement' in q['sql']]
+    assert len(element_queries) == 2  # The ETag aggregate and the tree itself
+    assert response['ETag'] and 'no-cache' in response['Cache-Control']
+
+    assert admin_client.get(tree_url(page), HTTP_IF_NONE_MATCH=response['ETag']).status_code == 304
+
+
+@pytest.mark.django_db(transaction=True)
+def test_delta_has_changed_elements_and_the_structure(admin_client):
+    page = make_page(sections=2, items=2)
+    full = admin_client.get(tree_url(page))
+    elements = rows_by_id(full.json())
+    ids = {row['content']: row['id'] for row in elements.values() if row['content']}
+    section1 = next(row['id'] for row in elements.values() if row['type'] == 'section' and row['order'] == 1)
+
+    unchanged = admin_client.get(tree_url(page, full.json()['version']))
+    assert unchanged.json()['elements'] == []
+    assert unchanged['ETag'] == full['ETag']
+
+    post_batch(admin_client, page, [
+        {'op': 'content', 'id': ids['Item 0.1'], 'content': 'Edited'},
+        {'op': 'move', 'id': ids['Item 1.0'], 'parent': None},
+        {'op': 'delete', 'id': section1},
+    ])
+    delta = admin_client.get(tree_url(page, full.json()['version']), HTTP_IF_NONE_MATCH=full['ETag'])
+
+    assert delta.status_code == 200 and delta['ETag'] != full['ETag']
+    data = delta.json()
+    assert data['since'] == full.json()['version'] < data['version']
+    assert sorted(rows_by_id(data)) == sorted([ids['Item 0.1'], ids['Item 1.0']])  # Edited, moved
+    assert rows_by_id(data)[ids['Item 0.1']]['content'] == 'Edited'
+    structure = {row[0]: (row[1], row[2]) for row in data['structure']}
+    assert structure[ids['Item 1.0']] == (None, 2)  # Now the last root
+    assert section1 not in structure and ids['Item 1.1'] not in structure
+    assert len(structure) == len(elements) - 4  # Section 1, its header, card and Item 1.1
+
+
+@pytest.mark.django_db
+def test_tree_is_for_editors_only_and_validates_since(client, admin_client, admin_user):
+    page = make_page(sections=1, items=1)
+
+    assert client.get(tree_url(page)).status_code == 403
+    assert admin_client.get(tree_url(page, 'yesterday')).status_code == 400
+    assert admin_client.get(tree_url(page) + '?since=-1').status_code == 400
+
+    sync_request = RequestFactory().get(tree_url(page))
+    async_request = AsyncRequestFactory().get(tree_url(page))
+    sync_request.user = async_request.user = admin_user
+
+    async def auser():
+        return admin_user
+
+    async_request.auser = auser
+    sync_response = api_views.page_tree(sync_request, slug=page.slug)
+    async_response = async_to_sync(async_views.page_tree)(async_request, slug=page.slug)
+    assert json.loads(sync_response.content) == json.loads(async_response.content)
+    assert sync_response['ETag'] == async_response['ETag']
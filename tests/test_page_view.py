@@ -0,0 +1,53 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.factories import make_page
+
+
+def count_page_queries(client, page):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(f'/landing/page/{page.slug}/')
+    assert response.status_code == 200
+    return len(ctx.captured_queries), response
+
+
+@pytest.mark.django_db
+def test_page_view_renders_tree_in_order(client):
+    page = make_page(sections=2, items=2)
+
+    _, response = count_page_queries(client, page)
+    html = response.content.decode()
+
+    positions = [html.index(text) for text in ('Section 0', 'Item 0.0', 'Item 0.1', 'Section 1', 'Item 1.1')]
+    assert positions == sorted(positions)
+
+
+@pytest.mark.django_db
+def test_page_view_query_count_does_not_grow_with_page(client):
+    small = make_page(slug='small', sections=1, items=1)
+    large = make_page(slug='large', sections=10, items=20)
+
+    small_queries, _ = count_page_queries(client, small)
+    large_queries, _ = count_page_queries(client, large)
+
+    assert large.elements.count() > 10 * small.elements.count()
+    assert large_queries == small_queries
+
+
+@pytest.mark.django_db
+def test_get_element_tree_caches_children():
+    page = make_page(sections=3, items=4)
+
+    with CaptureQueriesContext(connection) as ctx:
+        roots = page.get_element_tree()
+        walked = []
+        stack = list(roots)
+        while stack:
+            node = stack.pop()
+            walked.append(node)
+            stack.extend(node.get_cached_children())
+
+    assert len(ctx.captured_queries) == 1
+    assert [root.order for root in roots] == [0, 1, 2]
+    assert len(walked) == page.elements.count()
@@ -0,0 +1,85 @@
+import gzip
+import os
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from landing.models import Page, PageRebuild
+from landing.services.publisher import published_dir, rebuild_queued_pages
+from tests.factories import make_page
+
+
+@pytest.fixture(autouse=True)
+def publish_root(settings, tmp_path):
+    settings.LANDING_PUBLISH_ROOT = str(tmp_path / 'published')
+    return tmp_path / 'published'
+
+
+def read_published(slug):
+    path = os.path.join(published_dir(slug), 'index.html')
+    with open(path, 'rb') as f:
+        html = f.read()
+    with open(path + '.gz', 'rb') as f:
+        assert gzip.decompress(f.read()) == html
+    return html.decode()
+
+
+@pytest.mark.django_db
+def test_publish_command_writes_same_html_as_page_view(client, publish_root, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        page = make_page()
+        call_command('publish_pages', page.slug)
+
+    assert published_dir(page.slug) == str(publish_root / 'landing' / 'page' / page.slug)
+    assert read_published(page.slug) == client.get(f'/landing/page/{page.slug}/').content.decode()
+    assert Page.objects.get(pk=page.pk).is_published
+    assert [name for name in os.listdir(published_dir(page.slug)) if name.startswith('.tmp')] == []
+
+
+@pytest.mark.django_db
+def test_element_change_republishes_once_per_transaction(client, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        page = make_page()
+        call_command('publish_pages', page.slug)
+
+    with CaptureQueriesContext(connection) as ctx, django_capture_on_commit_callbacks(execute=True) as callbacks:
+        for element in page.elements.filter(type='text'):
+            element.content = f'Updated {element.id}'
+            element.save()
+
+    assert len(callbacks) == 2  # One page touch, one republish
+    assert len([q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "landing_page" ')]) == 1
+    assert 'Item 0.0' in read_published(page.slug)  # Until the worker re-renders it
+
+    assert rebuild_queued_pages() == 1
+    html = read_published(page.slug)
+    assert 'Item 0.0' not in html
+    assert html.count('Updated ') == page.elements.filter(type='text').count()
+
+
+@pytest.mark.django_db
+def test_unpublish_and_delete_remove_files(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        first, second = make_page(slug='first'), make_page(slug='second')
+        call_command('publish_pages', all=True)
+    assert os.path.exists(published_dir('first'))
+
+    call_command('publish_pages', 'first', unpublish=True)
+    assert not os.path.exists(published_dir('first'))
+    assert not Page.objects.get(pk=first.pk).is_published
+
+    second.delete()
+    assert not os.path.exists(published_dir('second'))
+
+
+@pytest.mark.django_db
+def test_deleted_page_is_not_queued(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        page = make_page()
+    PageRebuild.objects.all().delete()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        page.delete()  # Deletes the elements first, which schedules a republish
+    assert not PageRebuild.objects.exists()
@@ -0,0 +1,143 @@
+import re
+from pathlib import Path
+
+import pytest
+from django.core.cache import cache
+from django.test import override_settings
+
+from landing.models import Page, PageElement
+from landing.rendering import render_elements, render_node, render_node_template
+from tests.factories import make_page
+
+FIXTURES = Path(__file__).parent / 'fixtures'
+
+
+@pytest.fixture()
+def elements(db):
+    page = Page.objects.create(title='Render page', slug='render-page')
+    section = PageElement.objects.create(page=page, type='section', css_classes='hero dark', order=0,
+                                         html_attrs={'id': 'hero', 'data-x': 'a & b'})
+    return [
+        section,
+        PageElement.objects.create(page=page, type='header', content='Title', props={'level': 1},
+                                   parent=section, order=0),
+        PageElement.objects.create(page=page, type='header', content='Styled', order=1, parent=section,
+                                   props={'level': 2, 'background_image': '/media/bg.png'},
+                                   html_attrs={'style': 'color: red'}),
+        PageElement.objects.create(page=page, type='text', content='Some <b>bold</b> text',
+                                   css_classes='lead', parent=section, order=2),
+        PageElement.objects.create(page=page, type='image', image='page_render-page/images/cat.png',
+                                   html_attrs={'src': '/original.png', 'alt': 'A "cat"'},
+                                   parent=section, order=3),
+        PageElement.objects.create(page=page, type='button', content='Go', props={'href': '/next'},
+                                   html_attrs={'href': '/next?a=1&b=2', 'rel': ['noopener', 'nofollow']},
+                                   parent=section, order=4),
+        PageElement.objects.create(page=page, type='container', parent=section, order=5),
+    ]
+
+
+@pytest.mark.parametrize('edit_mode', [False, True])
+def test_compiled_renderer_matches_template(elements, edit_mode):
+    for element in elements:
+        children_html = '<p>child</p>' if element.type == 'section' else ''
+        assert render_node(element, children_html, edit_mode) == \
+            render_node_template(element, children_html, edit_mode)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('compiled', [True, False])
+@pytest.mark.parametrize('edit_mode', [False, True])
+def test_render_matches_the_original_template_output(compiled, edit_mode):
+    # Rendered by the element template tag before render_node existed (elements without escaped characters
+    # or images, whose markup has changed on purpose since)
+    page = Page.objects.create(pk=1, title='Render page', slug='render-page')
+    section = PageElement.objects.create(pk=10, page=page, type='section', css_classes='hero dark', order=0,
+                                         html_attrs={'id': 'hero'})
+    PageElement.objects.create(pk=11, page=page, type='header', content='Title', props={'level': 1},
+                               parent=section, order=0)
+    PageElement.objects.create(pk=12, page=page, type='text', content='Some <b>bold</b> text', css_classes='lead',
+                               parent=section, order=1)
+    container = PageElement.objects.create(pk=13, page=page, type='container', parent=section, order=2)
+    PageElement.objects.create(pk=14, page=page, type='text', content='Nested', parent=container, order=0)
+    PageElement.objects.create(pk=15, page=page, type='button', content='Go', props={'href': '/next'},
+                               html_attrs={'href': '/next', 'rel': 'noopener'}, parent=container, order=1)
+    PageElement.objects.create(pk=16, page=page, type='container', parent=section, order=3)
+
+    golden = FIXTURES / f"rendered_section{'_edit' if edit_mode else ''}.html"
+    cache.clear()
+    with override_settings(LANDING_COMPILED_RENDERER=compiled):
+        assert render_elements({'edit_mode': edit_mode}, page.get_element_tree()) == golden.read_text()
+
+
+def test_attribute_values_are_escaped(elements):
+    section, _, styled, _, image, button, _ = elements
+
+    assert 'id="hero" data-x="a &amp; b"' in render_node(section, '')
+    assert ' style="background-image: url(/media/bg.png);; color: red"' in render_node(styled, '')
+    assert 'src="/media/page_render-page/images/cat.png" alt="A &quot;cat&quot;"' in render_node(image, '')
+    assert 'href="/next?a=1&amp;b=2" rel="noopener nofollow"' in render_node(button, '')
+
+
+def test_image_attributes(elements):
+    image = elements[4]
+    assert render_node(image, '').endswith('alt="A &quot;cat&quot;" loading="lazy" decoding="async">\n    \n    \n</img>\n\n')
+
+    image.image_width, image.image_height = 1200, 800
+    image.image_variants = [{'src': '/media/a.webp', 'width': 480}, {'src': '/media/b.webp', 'width': 1200}]
+    image.html_attrs['srcset'] = '/remote-2x.png 2x'
+    assert (' srcset="/media/a.webp 480w, /media/b.webp 1200w" sizes="(max-width: 1200px) 100vw, 1200px"'
+            ' width="1200" height="800" loading="lazy"') in render_node(image, '')
+    assert render_node(image, '') == render_node_template(image, '')
+
+    # The original is the candidate at its own width when no variant has it
+    image.image_variants = image.image_variants[:1]
+    assert ' srcset="/media/a.webp 480w, /media/page_render-page/images/cat.png 1200w"' in render_node(image, '')
+
+    # The source page's own size and loading hints win
+    image.html_attrs.update({'width': '600', 'loading': 'eager'})
+    html = render_node(image, '')
+    assert 'sizes="(max-width: 600px) 100vw, 600px"' in html
+    assert 'width="600" loading="eager"' in html and 'height=' not in html and html.count('loading=') == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_first_images_of_a_page_load_eagerly(client):
+    page = make_page(sections=3, items=2)
+    for element in page.elements.filter(content__in=['Item 0.1', 'Item 1.0', 'Item 1.1', 'Item 2.0']):
+        element.type, element.html_attrs = 'image', {'src': f'/{element.content}.png'}
+        element.save()
+
+    def loading():
+        html = client.get(f'/landing/page/{page.slug}/').content.decode()
+        return re.findall(r'<img src="/Item (\d\.\d)\.png"( loading="lazy")?', html)
+
+    cache.clear()
+    assert loading() == [('0.1', ''), ('1.0', ''), ('1.1', ' loading="lazy"'), ('2.0', ' loading="lazy"')]
+    with override_settings(LANDING_EAGER_IMAGES=0):
+        cache.clear()
+        assert all(lazy for _, lazy in loading())
+
+    # The unchanged sections below are rendered again, not taken from the fragment cache, as
+    # the images before them no longer are the same
+    cache.clear()
+    loading()
+    element = page.elements.get(content='Item 0.1')
+    element.type = 'text'
+    element.save()
+    assert loading() == [('1.0', ''), ('1.1', ''), ('2.0', ' loading="lazy"')]
+
+
+@pytest.mark.django_db
+def test_page_output_is_identical_for_both_renderers(client, admin_user):
+    page = make_page(sections=2, items=3)
+    client.force_login(admin_user)
+    pages = {}
+    for compiled in (True, False):
+        cache.clear()
+        with override_settings(LANDING_COMPILED_RENDERER=compiled):
+            html = client.get(f'/landing/page/{page.slug}/').content.decode()
+            edit_html = client.get(f'/landing/page/{page.slug}/', {'edit': '1'}).content.decode()
+            # The masked CSRF token differs on every request
+            pages[compiled] = html, re.sub(r'name="csrfmiddlewaretoken" value="[^"]*"', '', edit_html)
+
+    assert pages[True] == pages[False]
@@ -0,0 +1,99 @@
+import json
+import logging
+import re
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from landing.timing import current_timings, execute_wrapper
+from tests.factories import make_page
+from tests.test_streaming import read_streaming
+
+
+def parse_server_timing(header):
+    metrics = {}
+    for metric in header.split(', '):
+        name, *params = metric.split(';')
+        metrics[name] = dict(param.split('=', 1) for param in params)
+    return metrics
+
+
+@pytest.mark.django_db
+def test_page_view_reports_sql_and_render_timings(client):
+    page = make_page(sections=2, items=3)
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(f'/landing/page/{page.slug}/')
+
+    metrics = parse_server_timing(response['Server-Timing'])
+    assert metrics['sql']['desc'] == f'"{len(ctx.captured_queries)} queries"'
+    assert metrics['render']['desc'] == f'"{page.elements.count()} elements"'
+    assert metrics['el-text']['desc'] == '"6"'
+    assert metrics['el-section']['desc'] == '"2"'
+    assert float(metrics['total']['dur']) >= float(metrics['render']['dur'])
+    assert current_timings() is None
+
+
+@pytest.mark.django_db
+def test_cached_page_renders_no_elements(client):
+    page = make_page(sections=1, items=1)
+    client.get(f'/landing/page/{page.slug}/')
+
+    metrics = parse_server_timing(client.get(f'/landing/page/{page.slug}/')['Server-Timing'])
+
+    assert 'render' not in metrics
+    assert not any(name.startswith('el-') for name in metrics)
+
+
+@pytest.mark.django_db
+def test_async_request_path_is_timed(async_client):
+    page = make_page(sections=1, items=2)
+
+    response = async_to_sync(async_client.get)(f'/landing/page/{page.slug}/')
+
+    metrics = parse_server_timing(response['Server-Timing'])
+    assert int(re.search(r'\d+', metrics['sql']['desc']).group()) >= 3
+    assert metrics['render']['desc'] == '"5 elements"'
+
+
+@pytest.mark.django_db
+@override_settings(LANDING_STREAM_THRESHOLD=1, LANDING_TIMING_LOG=True)
+def test_streamed_page_is_logged_after_the_body(client, caplog):
+    page = make_page(sections=2, items=2)
+
+    with caplog.at_level(logging.INFO, logger='landing.timing'):
+        response = client.get(f'/landing/page/{page.slug}/')
+        assert 'render' not in parse_server_timing(response['Server-Timing'])
+        assert not caplog.records
+        read_streaming(response)
+
+    [record] = caplog.records
+    data = json.loads(record.getMessage())
+    assert data['path'] == f'/landing/page/{page.slug}/'
+    assert data['elements'] == page.elements.count()
+    assert data['element_types']['card']['count'] == 2
+
+
+@pytest.mark.django_db
+@override_settings(LANDING_SERVER_TIMING=False)
+def test_server_timing_can_be_disabled(client):
+    page = make_page(sections=1, items=1)
+
+    response = client.get(f'/landing/page/{page.slug}/')
+    assert 'Server-Timing' not in response and 'X-Fragment-Cache' not in response
+
+
+@pytest.mark.django_db
+def test_queries_are_counted_once_after_reconnects(client):
+    page = make_page(sections=1, items=1)
+    for _ in range(3):  # What reconnecting for every request does
+        connection_created.send(sender=type(connection), connection=connection)
+    assert connection.execute_wrappers.count(execute_wrapper) == 1
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(f'/landing/page/{page.slug}/')
+    assert parse_server_timing(response['Server-Timing'])['sql']['desc'] == f'"{len(ctx.captured_queries)} queries"'
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import RequestFactory, override_settings
+
+from landing import views
+from landing.cache import get_cached_page
+from landing.rendering import astream_page, page_context, stream_page
+from tests.factories import make_page
+
+
+def read_streaming(response):
+    if not response.is_async:
+        return b''.join(response.streaming_content)
+
+    async def collect():
+        return b''.join([chunk async for chunk in response.streaming_content])
+
+    return async_to_sync(collect)()
+
+
+@pytest.mark.django_db
+def test_streamed_page_matches_buffered_page(client):
+    page = make_page(sections=4, items=3)
+    url = f'/landing/page/{page.slug}/'
+    buffered = client.get(url)
+    assert not buffered.streaming
+
+    cache.clear()
+    with override_settings(LANDING_STREAM_THRESHOLD=1):
+        streamed = client.get(url)
+        assert streamed.streaming
+        assert read_streaming(streamed) == buffered.content
+        assert streamed['ETag'] == buffered['ETag']
+
+
+@pytest.mark.django_db
+@override_settings(LANDING_STREAM_THRESHOLD=1)
+def test_streamed_pages_are_cached_once_sent(client, admin_client):
+    page = make_page(sections=2, items=2)
+    page.refresh_from_db()
+    url = f'/landing/page/{page.slug}/'
+
+    streamed = client.get(url)
+    assert get_cached_page(page) is None  # Nothing is cached before the last chunk went out
+    html = read_streaming(streamed)
+    assert get_cached_page(page) == html
+    cached = client.get(url)
+    assert not cached.streaming and cached.content == html
+
+    # Not for editors, nor from streams that were not sent completely
+    cache.clear()
+    read_streaming(admin_client.get(url))
+    assert get_cached_page(page) is None
+    request = RequestFactory().get(url)
+    request.user = AnonymousUser()
+    response = views.page_view(request, slug=page.slug)
+    next(response.streaming_content)
+    response.close()  # The client went away
+    assert get_cached_page(page) is None
+    assert b''.join(views.page_view(request, slug=page.slug).streaming_content) == html
+    assert get_cached_page(page) == html
+
+
+@pytest.mark.django_db
+@override_settings(LANDING_STREAM_THRESHOLD=1)
+def test_streamed_pages_over_the_size_limit_are_not_cached(client):
+    page = make_page(sections=2, items=2)
+    page.refresh_from_db()
+    url = f'/landing/page/{page.slug}/'
+    html = read_streaming(client.get(url))
+    cache.clear()
+
+    with override_settings(LANDING_PAGE_CACHE_MAX_SIZE=len(html) - 1):
+        assert read_streaming(client.get(url)) == html
+        assert get_cached_page(page) is None
+        request = RequestFactory().get(url)
+        request.user = AnonymousUser()
+        assert b''.join(views.page_view(request, slug=page.slug).streaming_content) == html
+        assert get_cached_page(page) is None
+    with override_settings(LANDING_PAGE_CACHE_MAX_SIZE=len(html)):
+        read_streaming(client.get(url))
+        assert get_cached_page(page) == html
+
+
+@pytest.mark.django_db
+def test_stream_sends_head_before_elements():
+    page = make_page(sections=3, items=1)
+    chunks = list(stream_page(page.template, page_context(page)))
+
+    assert '<head>' in chunks[0]
+    assert 'Section' not in chunks[0]
+    # head, then for every root element: its HTML and the (empty) gap after it
+    assert len(chunks) == 1 + 2 * 3
+    assert 'Section 0' in chunks[1] and 'Section 1' in chunks[3] and 'Section 2' in chunks[5]
+    assert chunks[-1].rstrip().endswith('</html>')
+
+
+@pytest.mark.django_db
+def test_async_stream_yields_same_chunks():
+    page = make_page(sections=2, items=2)
+    context = page_context(page)
+
+    async def collect():
+        return [chunk async for chunk in astream_page(page.template, context)]
+
+    assert asyncio.run(collect()) == list(stream_page(page.template, context))
@@ -0,0 +1,66 @@
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from landing.models import MediaCleanup, PageElement
+from landing.services.assets import delete_queued_media, store_asset
+from landing.services.subtree import delete_subtree
+from tests.factories import make_page
+from tests.test_tree_diff import assert_valid_tree
+
+
+def numbering(page):
+    """(content or type, lft, rght, level) of the page's elements in tree order."""
+    return [(e.content or e.type, e.lft, e.rght, e.level) for e in page.elements.order_by('tree_id', 'lft')]
+
+
+@pytest.mark.django_db
+def test_subtree_delete_matches_mptt_delete_in_constant_queries():
+    mptt_page = make_page(slug='mptt', sections=2, items=3)
+    page = make_page(sections=2, items=3)
+
+    for content in ('Section 0', 'Item 1.1'):  # A subtree followed by siblings, a leaf inside a card
+        mptt_page.elements.get(content=content).delete()
+        with CaptureQueriesContext(connection) as ctx:
+            assert delete_subtree(page.elements.get(content=content)) == 1
+        writes = [q['sql'] for q in ctx.captured_queries if 'landing_pageelement' in q['sql']
+                  and q['sql'].startswith(('UPDATE', 'DELETE'))]
+        assert len(writes) == 2  # One DELETE of the range, one UPDATE closing the gap
+
+    card = page.elements.filter(type='card').first()
+    mptt_page.elements.filter(type='card').first().delete()
+    assert delete_subtree(card) == 4
+    assert delete_subtree(card) == 0  # Already gone
+
+    assert numbering(page) == numbering(mptt_page)
+    assert_valid_tree(page)
+
+
+@pytest.mark.django_db
+def test_uploaded_images_are_deleted_later_and_assets_kept(client, tmp_path):
+    with override_settings(MEDIA_ROOT=str(tmp_path)):
+        page = make_page(sections=1, items=2)
+        other = make_page(slug='other', sections=1, items=1)
+        asset = store_asset(b'imported png', 'http://example.com/photo.png', 'image/png')
+        asset.pages.add(page, other)
+        first, second = page.elements.filter(type='text')
+        # Imported images are the shared asset files, as PageParserService stores them
+        PageElement.objects.filter(pk__in=[first.pk, other.elements.get(type='text').pk]).update(image=asset.file.name)
+        second.image.save('upload.png', ContentFile(b'uploaded png'))  # Uploaded in the admin
+        assert asset.file.name.startswith('assets/')
+
+        assert client.post(f'/landing/api/element/{first.pk}/delete/').json() == {'success': True}
+        assert not MediaCleanup.objects.exists()  # The asset stays until prune_assets finds it unreferenced
+
+        client.post(f'/landing/api/element/{page.elements.get(type="card").pk}/delete/')
+        assert list(MediaCleanup.objects.values_list('name', flat=True)) == [second.image.name]
+        assert default_storage.exists(second.image.name)  # Not in the request
+        MediaCleanup.objects.create(name=asset.file.name)  # Even if queued, asset files are left alone
+        assert delete_queued_media() == 1
+        assert not default_storage.exists(second.image.name)
+        assert default_storage.exists(asset.file.name) and not MediaCleanup.objects.exists()
+        assert store_asset(b'imported png').file.name == asset.file.name
+        assert [e.type for e in page.elements.order_by('lft')] == ['section', 'header']
@@ -0,0 +1,140 @@
+import pytest
+from bs4 import BeautifulSoup
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from landing.models import MediaCleanup, Page, PageElement
+from landing.services.page_parser import ElementTreeBuilder
+from landing.services.tree_diff import apply_tree
+from tests.factories import make_page
+
+ITEMS = ['One', 'Two', 'Three', 'Four']
+
+
+def html(title='Title', items=ITEMS, extra=''):
+    lis = ''.join(f'<li>{item}</li>' for item in items)
+    return (
+        f'<body><header><div><h1>{title}</h1></div></header>'
+        f'<section><div class="row"><h2>A</h2><p>B</p></div><ul>{lis}</ul>{extra}</section>'
+        '<section><p>Footer</p></section></body>'
+    )
+
+
+def builder(page, tmp_path):
+    return ElementTreeBuilder(page, 'http://example.com/', str(tmp_path))
+
+
+def body(markup):
+    return BeautifulSoup(markup, 'lxml').body
+
+
+def snapshot(page):
+    return {e.pk: (e.parent_id, e.tree_id, e.lft, e.rght, e.level) for e in PageElement.objects.filter(page=page)}
+
+
+def reimport(page, tmp_path, markup):
+    return apply_tree(page, builder(page, tmp_path).build_elements(body(markup)))
+
+
+@pytest.fixture()
+def page(tmp_path):
+    make_page(slug='other', sections=2, items=2)  # Trees of another page around the imported one
+    page = Page.objects.create(title='Import', slug='import')
+    builder(page, tmp_path).build_tree(body(html()))
+    return page
+
+
+def contents(page):
+    return [e.content for e in page.elements.filter(type='list_item').order_by('tree_id', 'lft')]
+
+
+def assert_valid_tree(page):
+    def numbering():  # rebuild() renumbers tree ids over all pages, so they are left out
+        return {pk: (parent, lft, rght, level) for pk, (parent, _, lft, rght, level) in snapshot(page).items()}
+
+    applied = numbering()
+    PageElement.objects.rebuild()
+    assert numbering() == applied
+
+
+@pytest.mark.django_db
+def test_unchanged_reimport_writes_nothing(page, tmp_path):
+    before = snapshot(page)
+
+    with CaptureQueriesContext(connection) as ctx:
+        stats = reimport(page, tmp_path, html())
+
+    assert stats.rows_touched == 0
+    assert stats.unchanged == len(before)
+    assert snapshot(page) == before
+    assert not [q for q in ctx.captured_queries if not q['sql'].startswith(('SELECT', 'SAVEPOINT', 'RELEASE'))]
+
+
+@pytest.mark.django_db
+def test_changed_text_updates_one_row(page, tmp_path):
+    heading = page.elements.get(type='header', content='Title')
+    before = snapshot(page)
+
+    stats = reimport(page, tmp_path, html(title='New title'))
+
+    assert (stats.updated, stats.rows_touched) == (1, 1)
+    assert snapshot(page) == before
+    heading.refresh_from_db()
+    assert heading.content == 'New title'
+
+
+@pytest.mark.django_db
+def test_inserted_and_deleted_elements(page, tmp_path):
+    ids = dict(page.elements.filter(type='list_item').values_list('content', 'pk'))
+    page.elements.filter(content='Two').update(image='pages/import/images/uploaded.png')  # Uploaded in the admin
+
+    stats = reimport(page, tmp_path, html(items=['One', 'Three', 'Four'], extra='<p>New</p>'))
+
+    assert (stats.inserted, stats.deleted, stats.updated) == (1, 1, 0)
+    assert list(MediaCleanup.objects.values_list('name', flat=True)) == ['pages/import/images/uploaded.png']
+    assert contents(page) == ['One', 'Three', 'Four']
+    kept = dict(page.elements.filter(type='list_item').values_list('content', 'pk'))
+    assert all(kept[item] == ids[item] for item in ('One', 'Three', 'Four'))
+    assert page.elements.filter(type='text', content='New', parent__type='section').exists()
+    assert_valid_tree(page)
+
+
+@pytest.mark.django_db
+def test_replaced_element_is_updated_in_place(page, tmp_path):
+    two = page.elements.get(content='Two')
+
+    stats = reimport(page, tmp_path, html(items=['One', 'Zwei', 'Three', 'Four']))
+
+    assert (stats.updated, stats.rows_touched) == (1, 1)
+    two.refresh_from_db()
+    assert two.content == 'Zwei'
+
+
+@pytest.mark.django_db
+def test_moved_elements_keep_their_ids(page, tmp_path):
+    ids = dict(page.elements.filter(type='list_item').values_list('content', 'pk'))
+
+    stats = reimport(page, tmp_path, html(items=['Four', 'One', 'Two', 'Three']))
+
+    assert stats.inserted == stats.deleted == stats.updated == 0
+    assert stats.moved == len(ITEMS)
+    # New versions, so edits based on the old positions conflict
+    assert set(page.elements.filter(type='list_item').values_list('version', flat=True)) == {2}
+    assert contents(page) == ['Four', 'One', 'Two', 'Three']
+    assert dict(page.elements.filter(type='list_item').values_list('content', 'pk')) == ids
+    assert_valid_tree(page)
+
+
+@pytest.mark.django_db
+def test_subtree_moved_to_another_parent(page, tmp_path):
+    row = page.elements.get(css_classes__contains='row')
+    markup = html().replace('<div class="row"><h2>A</h2><p>B</p></div>', '')
+    markup = markup.replace('<p>Footer</p>', '<div class="row"><h2>A</h2><p>B</p></div><p>Footer</p>')
+
+    stats = reimport(page, tmp_path, markup)
+
+    assert stats.inserted == stats.deleted == stats.updated == 0
+    row.refresh_from_db()
+    assert row.parent.get_children().last().content == 'Footer'
+    assert [child.content for child in row.get_children()] == ['A', 'B']
+    assert_valid_tree(page)